@@ -0,0 +1,135 @@
+"""Concurrent-voter throughput: sync (WSGI) stack versus async (ASGI) stack.
+
+Run from the repository root:
+
+    python benchmarks/async_bench.py                 # 200 voters, 8 sync workers, 64 in flight
+    python benchmarks/async_bench.py 1000 16 256     # voters, sync workers, async concurrency
+
+Each voter loads the ballot page and casts a vote. The sync stack pushes the
+requests through Django's WSGI handler from a pool of threads, one per
+gunicorn sync worker; the async stack drives the ASGI handler (as uvicorn
+does) with that many requests in flight on one event loop. Both run the same
+views against a throwaway SQLite file, so every ballot still queues for
+SQLite's single writer: compare the two rows with each other, not with a
+PostgreSQL deployment.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'safeballot.settings')
+os.environ.setdefault('AES_KEY_HEX', '00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+DB_DIR = tempfile.mkdtemp(prefix='safeballot-bench-')
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(DB_DIR, 'bench.sqlite3'),
+    # wait for the writer lock instead of failing under concurrency
+    'OPTIONS': {'timeout': 60},
+}
+settings.ALLOWED_HOSTS = ['*']
+django.setup()
+
+from datetime import timedelta  # noqa: E402
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from elections.models import Candidate, Election, Vote, VoterStatus  # noqa: E402
+
+
+def make_election(label, voters):
+    now = timezone.now()
+    election = Election.objects.create(
+        title=f'Bench {label}',
+        start_time=now - timedelta(hours=1),
+        end_time=now + timedelta(hours=1),
+        status='active',
+    )
+    candidates = Candidate.objects.bulk_create([Candidate(election=election, name=f'C{i}') for i in range(3)])
+    users = User.objects.bulk_create([User(username=f'{label}-{i}') for i in range(voters)])
+    VoterStatus.objects.bulk_create([VoterStatus(user=u, election=election) for u in users])
+    return election, [c.id for c in candidates], users
+
+
+def report(name, latencies, elapsed, election):
+    stored = Vote.objects.filter(election=election).count()
+    lat = sorted(latencies)
+    p95 = lat[int(len(lat) * 0.95) - 1] if lat else 0
+    print(
+        f'{name:<6} {len(lat) / elapsed:>9.1f} votes/s  p50 {statistics.median(lat) * 1000:>7.1f} ms  '
+        f'p95 {p95 * 1000:>7.1f} ms  stored {stored}/{len(lat)}'
+    )
+
+
+def bench_sync(voters, workers):
+    election, candidate_ids, users = make_election('sync', voters)
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+    url = f'/vote/{election.id}/'
+
+    def vote(i):
+        start = time.perf_counter()
+        clients[i].get(url)
+        clients[i].post(url, {'candidate_id': candidate_ids[i % len(candidate_ids)]})
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(vote, range(voters)))
+    report('sync', latencies, time.perf_counter() - start, election)
+
+
+def bench_async(voters, concurrency):
+    election, candidate_ids, users = make_election('async', voters)
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        async_client = AsyncClient()
+        async_client.cookies = client.cookies
+        clients.append(async_client)
+    url = f'/vote/{election.id}/'
+
+    async def run():
+        gate = asyncio.Semaphore(concurrency)
+
+        async def vote(i):
+            async with gate:
+                start = time.perf_counter()
+                await clients[i].get(url)
+                await clients[i].post(url, {'candidate_id': candidate_ids[i % len(candidate_ids)]})
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*(vote(i) for i in range(voters)))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run())
+    report('async', latencies, time.perf_counter() - start, election)
+
+
+def main(voters, workers, concurrency):
+    call_command('migrate', verbosity=0)
+    print(f'{voters} voters, {workers} sync workers, {concurrency} async requests in flight, '
+          f'CRYPTO_WORKERS={settings.CRYPTO_WORKERS}')
+    bench_sync(voters, workers)
+    bench_async(voters, concurrency)
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [200, 8, 64][len(args):]))
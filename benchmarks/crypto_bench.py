@@ -0,0 +1,169 @@
+"""Microbenchmarks for elections/utils/crypto.py.
+
+Run from the repository root:
+
+    python benchmarks/crypto_bench.py                        # JSON report on stdout
+    python benchmarks/crypto_bench.py --quick                # smaller sizes, for a smoke run
+    python benchmarks/crypto_bench.py --compare benchmarks/baselines/crypto.json
+    python benchmarks/crypto_bench.py --output benchmarks/baselines/crypto.json   # refresh the baseline
+
+Reports, as JSON:
+
+- ``latency_us``: single-call ``encrypt_vote``/``decrypt_vote`` latency with
+  and without associated data, plus the per-call key setup the ballot
+  functions used to pay before the keyring (read ``AES_KEY_HEX``, unhexlify,
+  validate, build ``AESGCM``) next to a keyring lookup;
+- ``aad_overhead_pct``: extra cost of the associated-data path;
+- ``batch_ballots_per_s``: sealing and tallying (``count_chunk``) a batch;
+- ``workers_ballots_per_s``: ``count_votes`` over chunked ballots per worker count.
+
+``--compare`` prints every ``ballots_per_s`` figure against a baseline and
+exits non-zero when one drops by more than ``--max-regression`` percent. Any
+change to the ballot envelope or key handling should be checked this way:
+ballots/second bounds every recount.
+"""
+import argparse
+import binascii
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('AES_KEY_HEX', '00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff')
+
+import cryptography  # noqa: E402
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # noqa: E402
+
+from elections.utils.crypto import count_chunk, count_votes, decrypt_vote, encrypt_vote, get_keyring  # noqa: E402
+
+CHOICES = [f'candidate:{i}' for i in range(1, 5)]
+AAD = '1'
+
+
+def _per_call_key_setup():
+    # what encrypt_vote/decrypt_vote did on every call before the keyring
+    key = binascii.unhexlify(os.getenv('AES_KEY_HEX'))
+    if len(key) != 32:
+        raise RuntimeError('bad key')
+    return AESGCM(key)
+
+
+def _keyring_lookup():
+    return get_keyring().active
+
+
+def _usec(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def _rate(fn, n, repeat=3):
+    """Best ballots/second of ``fn()`` processing ``n`` ballots."""
+    best = min(_timed(fn) for _ in range(repeat))
+    return n / best
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_latency(number):
+    ct_aad = encrypt_vote('candidate:42', associated_data=AAD)
+    ct_plain = encrypt_vote('candidate:42')
+    return {
+        'key_setup_per_call': _usec(_per_call_key_setup, number),
+        'key_setup_keyring': _usec(_keyring_lookup, number),
+        'encrypt_vote': _usec(lambda: encrypt_vote('candidate:42'), number),
+        'encrypt_vote_aad': _usec(lambda: encrypt_vote('candidate:42', associated_data=AAD), number),
+        'decrypt_vote': _usec(lambda: decrypt_vote(ct_plain), number),
+        'decrypt_vote_aad': _usec(lambda: decrypt_vote(ct_aad, associated_data=AAD), number),
+    }
+
+
+def bench_batch(n):
+    rows = [(i, encrypt_vote(CHOICES[i % len(CHOICES)], associated_data=AAD)) for i in range(n)]
+    return {
+        'encrypt': _rate(lambda: [encrypt_vote(CHOICES[i % len(CHOICES)], associated_data=AAD) for i in range(n)], n),
+        'count_chunk': _rate(lambda: count_chunk(rows, AAD), n),
+    }
+
+
+def bench_workers(n, chunk_size, worker_counts):
+    rows = [(i, encrypt_vote(CHOICES[i % len(CHOICES)], associated_data=AAD)) for i in range(n)]
+    chunks = [rows[i:i + chunk_size] for i in range(0, n, chunk_size)]
+    result = {}
+    for workers in worker_counts:
+        # one repeat: each run pays the pool start-up, as a recount does
+        result[str(workers)] = _rate(lambda: count_votes(chunks, AAD, workers=workers), n, repeat=1)
+    return result
+
+
+def run(quick=False):
+    number, batch, scale, chunk = (2000, 5000, 20000, 2000) if quick else (20000, 50000, 200000, 5000)
+    latency = bench_latency(number)
+    return {
+        'env': {
+            'python': platform.python_version(),
+            'cryptography': cryptography.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+        },
+        'latency_us': {k: round(v, 3) for k, v in latency.items()},
+        'aad_overhead_pct': {
+            'encrypt': round((latency['encrypt_vote_aad'] / latency['encrypt_vote'] - 1) * 100, 1),
+            'decrypt': round((latency['decrypt_vote_aad'] / latency['decrypt_vote'] - 1) * 100, 1),
+        },
+        'batch_ballots_per_s': {k: round(v) for k, v in bench_batch(batch).items()},
+        'workers_ballots_per_s': {
+            k: round(v) for k, v in bench_workers(scale, chunk, sorted({1, 2, 4, os.cpu_count() or 1})).items()
+        },
+    }
+
+
+def compare(baseline, report, max_regression):
+    """Print ballots/second against ``baseline``; return False if any dropped past ``max_regression`` percent."""
+    ok = True
+    for section in ('batch_ballots_per_s', 'workers_ballots_per_s'):
+        for name, now in report[section].items():
+            before = baseline.get(section, {}).get(name)
+            if not before:
+                continue
+            change = (now - before) / before * 100
+            flag = ''
+            if change < -max_regression:
+                flag = '  REGRESSION'
+                ok = False
+            key = f'{section}.{name}'
+            print(f'{key:<34} {before:>10} -> {now:>10} ballots/s ({change:+.1f}%){flag}', file=sys.stderr)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ballot crypto microbenchmarks (JSON output)')
+    parser.add_argument('--quick', action='store_true', help='Smaller sizes for a fast smoke run')
+    parser.add_argument('--output', default=None, help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', default=None, help='Baseline report to compare ballots/second against')
+    parser.add_argument('--max-regression', type=float, default=15.0, help='Allowed ballots/second drop in percent (default: 15)')
+    args = parser.parse_args()
+    report = run(quick=args.quick)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get('env', {}).get('quick') != args.quick:
+            print('warning: baseline was recorded with different --quick sizes', file=sys.stderr)
+        if not compare(baseline, report, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
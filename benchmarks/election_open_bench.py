@@ -0,0 +1,100 @@
+"""Election-opening load test at several concurrency levels, with release-to-release comparison.
+
+Run from the repository root:
+
+    python benchmarks/election_open_bench.py                          # 200 voters at 1, 8 and 32 in flight
+    python benchmarks/election_open_bench.py --voters 2000 --concurrency 16,64 --output new.json
+    python benchmarks/election_open_bench.py --compare old.json       # fail if a p95 regressed
+
+Each level seeds a fresh election and voters (``elections.utils.loadtest``)
+and drives login, dashboard and vote for every voter, in-process or against
+``--url``. By default the run uses a throwaway SQLite file; ``--settings-db``
+uses the database from the project settings instead (e.g. a local
+PostgreSQL). The JSON report holds one ``loadtest`` report per level.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'safeballot.settings')
+os.environ.setdefault('AES_KEY_HEX', '00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--voters', type=int, default=200)
+    parser.add_argument('--concurrency', default='1,8,32', help='Comma-separated levels')
+    parser.add_argument('--url', default=None, help='Base URL of a running server (default: in-process)')
+    parser.add_argument('--settings-db', action='store_true', help='Use the configured database, not a throwaway SQLite file')
+    parser.add_argument('--output', default=None, help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', default=None, help='Earlier report to compare p95 latencies against')
+    parser.add_argument('--max-regression', type=float, default=20.0, help='Allowed p95 increase in percent (default: 20)')
+    return parser.parse_args()
+
+
+def compare(old: dict, new: dict, max_regression: float) -> bool:
+    """Print p95 changes per level and endpoint; return False if any exceeds ``max_regression``."""
+    ok = True
+    old_runs = {r['concurrency']: r for r in old['runs']}
+    for run in new['runs']:
+        before = old_runs.get(run['concurrency'])
+        if before is None:
+            continue
+        for endpoint, stats in run['endpoints'].items():
+            prev = before['endpoints'].get(endpoint)
+            if not prev or not prev['p95_ms']:
+                continue
+            change = (stats['p95_ms'] - prev['p95_ms']) / prev['p95_ms'] * 100
+            flag = ''
+            if change > max_regression:
+                flag = '  REGRESSION'
+                ok = False
+            print(f'c={run["concurrency"]:<4} {endpoint:<20} p95 {prev["p95_ms"]:>9.1f} -> {stats["p95_ms"]:>9.1f} ms '
+                  f'({change:+.1f}%){flag}', file=sys.stderr)
+    return ok
+
+
+def main():
+    args = parse_args()
+    if not args.settings_db:
+        settings.DATABASES['default'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(tempfile.mkdtemp(prefix='safeballot-bench-'), 'bench.sqlite3'),
+            # wait for the writer lock instead of failing under concurrency
+            'OPTIONS': {'timeout': 60},
+        }
+    settings.ALLOWED_HOSTS = ['*']
+    django.setup()
+    from django.core.management import call_command
+    from elections.utils.loadtest import cleanup, run_load, seed
+
+    if not args.settings_db:
+        call_command('migrate', verbosity=0)
+    runs = []
+    for level in [int(c) for c in args.concurrency.split(',')]:
+        run = seed(args.voters)
+        try:
+            runs.append(run_load(run, concurrency=level, base_url=args.url))
+        finally:
+            cleanup(run)
+    report = {'voters': args.voters, 'runs': runs}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as fh:
+            if not compare(json.load(fh), report, args.max_regression):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Tally cost of AES-GCM ballots versus homomorphic ElGamal ballots.
+
+Run from the repository root:
+
+    python benchmarks/homomorphic_bench.py              # 10k, 100k, 1M ballots
+    python benchmarks/homomorphic_bench.py 10000 50000  # custom sizes
+
+AES recounts decrypt every ballot (``count_votes``); ElGamal recounts multiply
+all ballots into one aggregate and decrypt only that. With the running
+aggregate kept by ``record_vote`` a results read is just the final decryption
+("elgamal read"), whatever the number of ballots. ElGamal ballots are cycled
+from a pool of pre-sealed ballots so the run measures tally cost, not ballot
+generation; the per-ballot sealing cost, paid at vote time, is reported
+separately.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('AES_KEY_HEX', '00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff')
+
+from elections.utils import homomorphic  # noqa: E402
+from elections.utils.crypto import count_votes, encrypt_vote  # noqa: E402
+
+CANDIDATES = [1, 2, 3, 4]
+POOL = 256
+
+
+def bench_aes(n):
+    rows = [(i, encrypt_vote(f'candidate:{CANDIDATES[i % len(CANDIDATES)]}', associated_data='1')) for i in range(n)]
+    start = time.perf_counter()
+    counts, _ = count_votes([rows], associated_data='1')
+    elapsed = time.perf_counter() - start
+    assert sum(counts.values()) == n
+    return elapsed
+
+
+def bench_elgamal(n, x, h, pool):
+    start = time.perf_counter()
+    aggregate = {}
+    for i in range(n):
+        homomorphic.combine(aggregate, homomorphic.loads(pool[i % POOL]))
+    combined = time.perf_counter() - start
+    start = time.perf_counter()
+    counts = homomorphic.decrypt_aggregate(x, aggregate, upper=n)
+    read = time.perf_counter() - start
+    assert sum(counts.values()) == n
+    return combined + read, read
+
+
+def main(sizes):
+    x, h = homomorphic.generate_keypair()
+    start = time.perf_counter()
+    pool = [homomorphic.dumps(homomorphic.encrypt_choice(h, CANDIDATES, CANDIDATES[i % len(CANDIDATES)])) for i in range(POOL)]
+    seal_ms = (time.perf_counter() - start) / POOL * 1000
+    print(f'ElGamal seal: {seal_ms:.2f} ms/ballot ({len(CANDIDATES)} candidates, includes one-off table setup)')
+    print(f'{"ballots":>10} {"aes recount s":>14} {"elgamal recount s":>18} {"elgamal read s":>15}')
+    for n in sizes:
+        aes = bench_aes(n)
+        recount, read = bench_elgamal(n, x, h, pool)
+        print(f'{n:>10} {aes:>14.2f} {recount:>18.2f} {read:>15.2f}')
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
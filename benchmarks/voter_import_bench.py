@@ -0,0 +1,105 @@
+"""Voter-roll import throughput in rows/second.
+
+Run from the repository root:
+
+    python benchmarks/voter_import_bench.py                 # 100k-row CSV, default chunk size
+    python benchmarks/voter_import_bench.py 1000000 10000   # rows, chunk size
+
+Seeds ``rows`` users, writes a CSV naming them (plus 1% unknown usernames and
+1% repeated rows) to a temporary file and imports it into a fresh election
+with ``elections.utils.voter_import.import_voters``, streaming from disk as an
+upload would. The per-row import it replaced (one ``User`` lookup and one
+``get_or_create`` per row) is timed on the first 2000 rows for comparison.
+Runs against a throwaway SQLite file.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'safeballot.settings')
+os.environ.setdefault('AES_KEY_HEX', '00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+DB_DIR = tempfile.mkdtemp(prefix='safeballot-bench-')
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(DB_DIR, 'bench.sqlite3'),
+}
+django.setup()
+
+from datetime import timedelta  # noqa: E402
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from elections.models import Election, VoterStatus  # noqa: E402
+from elections.utils.voter_import import import_voters  # noqa: E402
+
+LEGACY_ROWS = 2000
+
+
+def make_election(label):
+    now = timezone.now()
+    return Election.objects.create(title=f'Import {label}', start_time=now + timedelta(days=1), end_time=now + timedelta(days=2))
+
+
+def write_csv(rows):
+    path = os.path.join(DB_DIR, 'roll.csv')
+    with open(path, 'w', newline='') as fh:
+        fh.write('username\n')
+        for i in range(rows):
+            fh.write(f'voter-{i}\n')
+            if i % 100 == 0:
+                fh.write(f'ghost-{i}\n')
+            if i % 100 == 50:
+                fh.write(f'voter-{i}\n')
+    return path
+
+
+def legacy_import(election, names):
+    for username in names:
+        try:
+            user = User.objects.get(username=username)
+            VoterStatus.objects.get_or_create(user=user, election=election)
+        except User.DoesNotExist:
+            continue
+
+
+def main(rows, chunk_size):
+    call_command('migrate', verbosity=0)
+    for start in range(0, rows, 10000):
+        User.objects.bulk_create([User(username=f'voter-{i}') for i in range(start, min(rows, start + 10000))])
+    path = write_csv(rows)
+
+    election = make_election('bulk')
+    with open(path, newline='') as fh:
+        report = import_voters(election, fh, chunk_size=chunk_size)
+
+    legacy = make_election('legacy')
+    names = [f'voter-{i}' for i in range(min(rows, LEGACY_ROWS))]
+    started = time.perf_counter()
+    legacy_import(legacy, names)
+    legacy_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        'rows': report.rows,
+        'chunk_size': chunk_size or settings.VOTER_IMPORT_CHUNK_SIZE,
+        'imported': report.imported,
+        'duplicate': report.duplicate,
+        'unknown': report.unknown,
+        'seconds': round(report.seconds, 3),
+        'rows_per_s': round(report.rows / report.seconds),
+        'per_row_rows_per_s': round(len(names) / legacy_seconds),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [100000, None][len(args):]))
@@ -1,11 +1,16 @@
 from django.contrib import admin
-from .models import Profile, Election, Candidate, Vote, VoterStatus, Feedback
+from .models import Profile, Election, Candidate, Vote, VoterStatus, Feedback, ElectionTally, ElectionResult, BallotLedger, PendingBallot, VoterImport
 
 admin.site.register(Profile)
 admin.site.register(Election)
 admin.site.register(Candidate)
 admin.site.register(Vote)
 admin.site.register(VoterStatus)
+admin.site.register(ElectionTally)
+admin.site.register(ElectionResult)
+admin.site.register(BallotLedger)
+admin.site.register(PendingBallot)
+admin.site.register(VoterImport)
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
 	list_display = ('subject', 'name', 'email', 'created_at', 'user')
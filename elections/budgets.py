@@ -0,0 +1,78 @@
+"""Query-count and latency budgets for every URL name in ``elections/urls.py``.
+
+``BUDGETS`` declares, per URL name, who requests it, the most queries one
+request may run and a latency ceiling (ms) at each of ``SCALES`` (number of
+elections seeded for the ``BudgetTests`` in ``elections/tests.py``, which seed
+each scale once and request every URL); a view whose query count grows with
+the number of elections (an N+1) breaks its budget at the larger scales.
+
+Query budgets are the same at every scale on purpose. Views with a known N+1
+are flagged ``known_n_plus_one`` and run as expected failures until fixed;
+remove the flag when the view is fixed so the budget guards it from then on.
+Latency ceilings are generous wall-clock limits for a developer machine. They
+are only checked when ``BUDGET_LATENCY`` is set, since loaded CI runners would
+make them flaky; ``BUDGET_LATENCY_FACTOR`` scales them on slower machines.
+"""
+import os
+from typing import NamedTuple
+
+SCALES = (10, 1000, 10000)
+POOL_VOTERS = 20
+ELIGIBLE_PER_ELECTION = 5
+CHECK_LATENCY = bool(os.getenv('BUDGET_LATENCY'))
+LATENCY_FACTOR = float(os.getenv('BUDGET_LATENCY_FACTOR', '1'))
+
+
+class Budget(NamedTuple):
+    user: str  # 'anonymous', 'voter', 'admin' or 'superuser'
+    queries: int
+    ms: tuple  # latency ceiling per entry of SCALES
+    kwargs: dict = {}  # URL kwargs; '@key' values are looked up in the seeded fixture (see elections/tests.py)
+    status: int = 200
+    known_n_plus_one: bool = False
+
+
+_STATIC = (150, 150, 150)
+
+BUDGETS = {
+    'index': Budget('superuser', 5, (250, 250, 400)),
+    'register': Budget('anonymous', 0, _STATIC),
+    'login': Budget('anonymous', 0, _STATIC),
+    'logout': Budget('voter', 0, _STATIC, status=302),
+    'voter_dashboard': Budget('voter', 4, (200, 250, 400)),
+    'about': Budget('anonymous', 0, _STATIC),
+    'how_it_works': Budget('anonymous', 0, _STATIC),
+    'social_proof': Budget('anonymous', 0, _STATIC),
+    'contact': Budget('anonymous', 0, _STATIC),
+    'privacy': Budget('anonymous', 0, _STATIC),
+    'terms': Budget('anonymous', 0, _STATIC),
+    'data_policy': Budget('anonymous', 0, _STATIC),
+    'vote': Budget('voter', 6, (200, 200, 250), {'election_id': '@active'}),
+    'ballot_link': Budget('anonymous', 2, (200, 200, 250), {'token': '@ballot_token'}),
+    'results': Budget('voter', 5, (200, 200, 250), {'election_id': '@concluded'}),
+    'admin_dashboard': Budget('superuser', 4, (250, 250, 400)),
+    'admin_election_list': Budget('superuser', 4, (250, 250, 400), {'status': 'concluded'}),
+    'create_election': Budget('admin', 2, _STATIC),
+    'edit_election': Budget('superuser', 3, (200, 200, 250), {'election_id': '@active'}),
+    'delete_election': Budget('superuser', 3, _STATIC, {'election_id': '@concluded'}),
+    'upload_voters': Budget('superuser', 3, _STATIC, {'election_id': '@active'}),
+    'voter_import_status': Budget('superuser', 3, _STATIC, {'import_id': '@voter_import'}),
+    # the rejected rows are read from their own table, streamed
+    'voter_import_rejected': Budget('superuser', 4, _STATIC, {'import_id': '@voter_import'}),
+    'publish_results': Budget('superuser', 3, _STATIC, {'election_id': '@active'}),
+    'rotate_publish_key': Budget('superuser', 3, _STATIC, {'election_id': '@active'}),
+    'export_results_csv': Budget('voter', 5, (200, 200, 250), {'election_id': '@concluded'}),
+    'ledger': Budget('voter', 5, _STATIC, {'election_id': '@concluded'}),
+    'ledger_proof': Budget('voter', 6, _STATIC, {'election_id': '@concluded', 'leaf_index': 0}),
+    'create_candidate': Budget('superuser', 3, _STATIC, {'election_id': '@active'}),
+    # streams until the election concludes: the concluded target sends one event and closes
+    # (the fourth query is the shared turnout computation, whenever the cached one is stale)
+    'turnout_stream': Budget('superuser', 4, _STATIC, {'election_id': '@concluded'}),
+    'list_candidates': Budget('superuser', 5, _STATIC, {'election_id': '@active'}),
+    'edit_candidate': Budget('superuser', 4, _STATIC, {'election_id': '@active', 'candidate_id': '@active_candidate'}),
+    'delete_candidate': Budget('superuser', 4, _STATIC, {'election_id': '@active', 'candidate_id': '@active_candidate'}),
+    'confirm_email': Budget('anonymous', 0, _STATIC, status=400),
+    'admin_pending_users': Budget('superuser', 3, _STATIC),
+    'admin_approve_user': Budget('superuser', 4, _STATIC, {'profile_id': '@pending_profile'}),
+}
+
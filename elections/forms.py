@@ -1,5 +1,7 @@
 from django import forms
 
+from .models import Election
+
 class VoteForm(forms.Form):
     candidate_id = forms.IntegerField()
 
@@ -9,6 +11,13 @@ class ElectionForm(forms.Form):
     description = forms.CharField(widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 6}), required=False)
     start_time = forms.DateTimeField(widget=forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}))
     end_time = forms.DateTimeField(widget=forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}))
+    # only honoured on creation; the scheme cannot change once ballots exist
+    ballot_scheme = forms.ChoiceField(
+        choices=Election.BALLOT_SCHEME_CHOICES,
+        initial=Election.SCHEME_AES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
 
 
 class VoterUploadForm(forms.Form):
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from elections.models import Election, ElectionResult
+from elections.utils.ledger import audit_ledger
+
+
+class Command(BaseCommand):
+    help = 'Recompute ballot ledger roots from the stored ballots and compare them with the ledger heads and published roots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_ids', nargs='*', type=int, help='Elections to audit (default: all)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Ballots read per query (default: TALLY_CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        elections = Election.objects.all().order_by('id')
+        if options['election_ids']:
+            elections = elections.filter(id__in=options['election_ids'])
+            if not elections.exists():
+                raise CommandError('No matching elections')
+        failures = 0
+        for election in elections:
+            report = audit_ledger(election, chunk_size=options['chunk_size'])
+            ok = report['match']
+            published = ElectionResult.objects.filter(election=election).first()
+            if published and published.ledger_root and (published.ledger_size, published.ledger_root) != (report['size'], report['root']):
+                ok = False
+            if ok:
+                self.stdout.write(f'Election {election.id}: OK size={report["size"]} root={report["root"]}')
+                continue
+            failures += 1
+            self.stdout.write(self.style.ERROR(
+                f'Election {election.id}: MISMATCH recomputed={report["size"]}/{report["root"]} '
+                f'stored={report["stored_size"]}/{report["stored_root"]} '
+                f'published={published.ledger_size if published else None}/{published.ledger_root if published else None} '
+                f'unindexed={report["unindexed"]} gaps={report["gaps"]}'
+            ))
+        if failures:
+            raise CommandError(f'{failures} ledger(s) failed the audit')
@@ -0,0 +1,44 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from elections.utils.ingest import FLUSH_STATS, drain, flush_due, queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Move ballots staged by the ingestion queue into the ballot table in group commits.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Ballots per commit (default: INGEST_BATCH_SIZE)')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds a ballot may wait for a full batch (default: INGEST_FLUSH_INTERVAL)')
+        parser.add_argument('--once', action='store_true', help='Flush everything currently staged and exit')
+        parser.add_argument('--stats', action='store_true', help='Print queue depth and oldest ballot age as JSON and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue_stats()))
+            return
+        batch_size = options['batch_size'] or settings.INGEST_BATCH_SIZE
+        interval = settings.INGEST_FLUSH_INTERVAL if options['interval'] is None else options['interval']
+        if options['once']:
+            flushed = drain(batch_size=batch_size)
+            self.stdout.write(f'Flushed {flushed} ballots in {FLUSH_STATS["flushes"]} batches')
+            return
+        self.stdout.write(f'Flushing batches of up to {batch_size} ballots every {interval}s (Ctrl-C to stop)')
+        try:
+            while True:
+                flushed = flush_due(batch_size, interval)
+                if not flushed:
+                    time.sleep(interval / 2)
+                    continue
+                stats = queue_stats()
+                self.stdout.write(
+                    f'Flushed {flushed} ballots in {FLUSH_STATS["seconds_last"] * 1000:.1f} ms '
+                    f'(queue depth {stats["depth"]}, oldest {stats["oldest_age_seconds"]:.2f}s, '
+                    f'max flush {FLUSH_STATS["seconds_max"] * 1000:.1f} ms)'
+                )
+        except KeyboardInterrupt:
+            # the current batch either committed or rolled back; staged ballots stay staged
+            self.stdout.write(f'Stopped after {FLUSH_STATS["ballots"]} ballots in {FLUSH_STATS["flushes"]} batches')
@@ -0,0 +1,72 @@
+import csv
+import os
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from elections.models import Election
+from elections.utils.ballot_links import issue_ballot_links, revoke_ballot_links
+
+
+class Command(BaseCommand):
+    help = 'Issue signed single-use ballot links to the voters of an election who have not voted and hold no link (or revoke them).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_id', type=int)
+        parser.add_argument('--base-url', help='Public address of the site, e.g. https://vote.example.org')
+        parser.add_argument('--output', help='Write username,email,url rows to this CSV')
+        parser.add_argument('--email', action='store_true', help='Email each voter their link')
+        parser.add_argument('--rotate', action='store_true',
+                            help='Also replace the links of voters who already hold one, invalidating those')
+        parser.add_argument('--revoke', action='store_true', help='Invalidate every outstanding link instead')
+
+    def handle(self, *args, **options):
+        try:
+            election = Election.objects.get(pk=options['election_id'])
+        except Election.DoesNotExist:
+            raise CommandError(f'No election {options["election_id"]}')
+        if options['revoke']:
+            self.stdout.write(f'{revoke_ballot_links(election)} link(s) revoked')
+            return
+        if not options['base_url'] or not (options['output'] or options['email']):
+            raise CommandError('Pass --base-url and at least one of --output FILE or --email')
+        if options['output'] and os.path.exists(options['output']):
+            raise CommandError(f'{options["output"]} already exists; refusing to overwrite ballot links')
+
+        base = options['base_url'].rstrip('/')
+        sender = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+        out = None
+        if options['output']:
+            # the links are bearer credentials: readable by the operator only, from the moment the file exists
+            fd = os.open(options['output'], os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+            out = os.fdopen(fd, 'w', newline='', encoding='utf-8')
+        issued = emailed = 0
+        try:
+            writer = csv.writer(out) if out else None
+            if writer:
+                writer.writerow(['username', 'email', 'url'])
+            for batch in issue_ballot_links(election, rotate=options['rotate']):
+                messages = []
+                for username, email, token in batch:
+                    url = base + reverse('ballot_link', args=[token])
+                    if writer:
+                        writer.writerow([username, email, url])
+                    if options['email'] and email:
+                        messages.append((
+                            f'Your ballot: {election.title}',
+                            f'Cast your vote in "{election.title}" here (the link works once and is personal):\n\n{url}\n',
+                            sender, [email],
+                        ))
+                if out:
+                    # on disk before the generator saves this batch's nonces
+                    out.flush()
+                    os.fsync(out.fileno())
+                if messages:
+                    emailed += send_mass_mail(messages, fail_silently=True)
+                issued += len(batch)
+        finally:
+            if out:
+                out.close()
+        self.stdout.write(f'{issued} link(s) issued, {emailed} emailed')
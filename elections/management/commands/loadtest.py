@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from elections.utils.loadtest import cleanup, run_load, seed
+
+
+class Command(BaseCommand):
+    help = 'Simulate an election opening: seed voters, drive login/dashboard/vote concurrently and report latency as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=100, help='Eligible voters to seed (default: 100)')
+        parser.add_argument('--concurrency', type=int, default=10, help='Voters in flight at once (default: 10)')
+        parser.add_argument('--candidates', type=int, default=3, help='Candidates on the ballot (default: 3)')
+        parser.add_argument('--url', default=None, help='Base URL of a running server (default: in-process test client)')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded voters and election afterwards')
+
+    def handle(self, *args, **options):
+        if options['voters'] < 1 or options['concurrency'] < 1 or options['candidates'] < 1:
+            raise CommandError('--voters, --concurrency and --candidates must be positive')
+        run = seed(options['voters'], options['candidates'])
+        try:
+            report = run_load(run, concurrency=options['concurrency'], base_url=options['url'])
+        finally:
+            if not options['keep']:
+                cleanup(run)
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(text + '\n')
+            self.stdout.write(f'Wrote {options["output"]} ({report["votes_completed"]}/{report["voters"]} votes)')
+        else:
+            self.stdout.write(text)
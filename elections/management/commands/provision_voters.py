@@ -0,0 +1,49 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from elections.models import Election
+from elections.utils.provisioning import provision_voters
+
+
+class Command(BaseCommand):
+    help = 'Create confirmed, approved voter accounts in bulk from a CSV, optionally putting them on an election roll.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='CSV with a username column; email, first_name, last_name and phone are optional')
+        parser.add_argument('--election', type=int, help='Put the voters on this election\'s roll')
+        parser.add_argument('--credentials', help='Where to write the one-time passwords (username,password CSV)')
+        parser.add_argument('--no-passwords', action='store_true',
+                            help='Give the accounts unusable passwords instead of one-time passwords')
+        parser.add_argument('--workers', type=int, help='Password-hashing processes (default: PROVISION_WORKERS)')
+        parser.add_argument('--batch-size', type=int, help='Accounts per insert batch (default: PROVISION_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        passwords = not options['no_passwords']
+        if passwords and not options['credentials']:
+            raise CommandError('Pass --credentials FILE to receive the one-time passwords, or --no-passwords')
+        if passwords and os.path.exists(options['credentials']):
+            raise CommandError(f'{options["credentials"]} already exists; refusing to overwrite credentials')
+        election = None
+        if options['election']:
+            try:
+                election = Election.objects.get(pk=options['election'])
+            except Election.DoesNotExist:
+                raise CommandError(f'No election {options["election"]}')
+
+        credentials = None
+        if passwords:
+            # one-time passwords: readable by the operator only, from the moment the file exists
+            fd = os.open(options['credentials'], os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+            credentials = os.fdopen(fd, 'w', newline='', encoding='utf-8')
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as fh:
+                report = provision_voters(
+                    fh, election=election, passwords=passwords, credentials=credentials,
+                    workers=options['workers'], batch_size=options['batch_size'],
+                )
+        finally:
+            if credentials is not None:
+                credentials.close()
+        self.stdout.write(json.dumps(report, indent=2))
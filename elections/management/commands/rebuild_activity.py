@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from elections.models import Election
+from elections.utils.activity import rebuild_activity
+
+
+class Command(BaseCommand):
+    help = 'Re-derive the hourly vote-activity rollup from the stored ballots (backfill or repair).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_ids', nargs='*', type=int, help='Elections to rebuild (default: all)')
+
+    def handle(self, *args, **options):
+        elections = None
+        if options['election_ids']:
+            elections = Election.objects.filter(id__in=options['election_ids'])
+            if not elections.exists():
+                raise CommandError('No matching elections')
+        self.stdout.write(f'{rebuild_activity(elections)} hourly bucket(s) rebuilt')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from elections.models import Election
+from elections.utils.results import rebuild_snapshot, verify_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the results snapshots of concluded elections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_ids', nargs='*', type=int, help='Elections to process (default: all concluded)')
+        parser.add_argument('--verify', action='store_true', help='Recount the ballots and compare against the stored snapshot instead of rebuilding')
+
+    def handle(self, *args, **options):
+        elections = Election.objects.filter(status='concluded').order_by('id')
+        if options['election_ids']:
+            elections = elections.filter(id__in=options['election_ids'])
+            if not elections.exists():
+                raise CommandError('No matching concluded elections')
+        if not options['verify']:
+            for election in elections:
+                snapshot = rebuild_snapshot(election)
+                self.stdout.write(f'Election {election.id}: rebuilt ({snapshot.total_votes} votes)')
+            return
+        mismatched = 0
+        for election in elections:
+            report = verify_snapshot(election)
+            if report['match']:
+                self.stdout.write(f'Election {election.id}: OK')
+                continue
+            mismatched += 1
+            self.stdout.write(self.style.ERROR(
+                f'Election {election.id}: MISMATCH stored={report["stored"]} derived={report["derived"]}'
+            ))
+        if mismatched:
+            raise CommandError(f'{mismatched} snapshot(s) do not match the ballots')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from elections.models import Election
+from elections.utils.tally import reconcile_tally
+
+
+class Command(BaseCommand):
+    help = 'Re-derive election tallies from the encrypted ballots and report (or repair) any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_ids', nargs='*', type=int, help='Elections to check (default: all)')
+        parser.add_argument('--repair', action='store_true', help='Overwrite drifted tallies with the recount')
+        parser.add_argument('--workers', type=int, default=None, help='Decryption processes (default: TALLY_WORKERS)')
+
+    def handle(self, *args, **options):
+        elections = Election.objects.all().order_by('id')
+        if options['election_ids']:
+            elections = elections.filter(id__in=options['election_ids'])
+            if not elections.exists():
+                raise CommandError('No matching elections')
+        drifted = 0
+        for election in elections:
+            report = reconcile_tally(election, repair=options['repair'], workers=options['workers'])
+            if report['undecryptable']:
+                self.stdout.write(self.style.WARNING(
+                    f'Election {election.id}: {report["undecryptable"]} ballots could not be decrypted'
+                ))
+            if report['busy']:
+                self.stdout.write(self.style.WARNING(
+                    f'Election {election.id}: tally kept changing during the recount; skipped, rerun when voting is quieter'
+                ))
+                continue
+            if report['match']:
+                self.stdout.write(f'Election {election.id}: OK ({sum(report["derived"].values())} ballots)')
+                continue
+            drifted += 1
+            action = 'repaired' if options['repair'] else 'DRIFT'
+            self.stdout.write(self.style.ERROR(
+                f'Election {election.id}: {action} stored={report["stored"]} derived={report["derived"]}'
+            ))
+        if drifted and not options['repair']:
+            raise CommandError(f'{drifted} election(s) have drifted tallies; rerun with --repair to fix')
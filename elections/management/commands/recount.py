@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from elections.models import Election
+from elections.utils.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Re-derive the eligible, votes and candidates counters on each election and report (or repair) drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('election_ids', nargs='*', type=int, help='Elections to check (default: all)')
+        parser.add_argument('--check', action='store_true', help='Report drift without repairing it (exit non-zero if any)')
+
+    def handle(self, *args, **options):
+        elections = Election.objects.all()
+        if options['election_ids']:
+            elections = elections.filter(id__in=options['election_ids'])
+            if not elections.exists():
+                raise CommandError('No matching elections')
+        drifted = recount(elections, repair=not options['check'])
+        action = 'DRIFT' if options['check'] else 'repaired'
+        for entry in drifted:
+            self.stdout.write(self.style.ERROR(
+                f'Election {entry["id"]}: {action} stored={entry["stored"]} derived={entry["derived"]}'
+            ))
+        if drifted and options['check']:
+            raise CommandError(f'{len(drifted)} election(s) have drifted counters; rerun without --check to repair')
+        self.stdout.write(f'{len(drifted)} election(s) {"drifted" if options["check"] else "repaired"}')
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from elections.utils.voter_import import claim_next_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued voter-roll imports, resuming any whose worker stopped mid-import.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs queued now and exit')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait when no job is queued (default: 2)')
+
+    def handle(self, *args, **options):
+        if not options['once']:
+            self.stdout.write('Running voter imports as they are queued (Ctrl-C to stop)')
+        try:
+            while True:
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['interval'])
+                    continue
+                self._run(job)
+        except KeyboardInterrupt:
+            self.stdout.write('Import worker stopped')
+
+    def _run(self, job):
+        resumed = f' (resuming after row {job.rows})' if job.rows else ''
+        self.stdout.write(f'Import {job.id} into "{job.election.title}"{resumed}')
+        job = run_import_job(job)
+        if job.status == 'failed':
+            self.stderr.write(f'Import {job.id} failed: {job.error}')
+        else:
+            self.stdout.write(
+                f'Import {job.id}: {job.rows} rows, {job.imported} imported, '
+                f'{job.duplicate} duplicate, {job.unknown} unknown'
+            )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from elections.utils.schedule import apply_due_transitions, next_transition
+
+
+class Command(BaseCommand):
+    help = 'Start and conclude elections when their start and end times arrive, running the on-conclude hooks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Apply the transitions due now and exit')
+        parser.add_argument('--max-sleep', type=float, default=30.0,
+                            help='Longest wait between checks, to notice elections created or edited meanwhile (default: 30s)')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            self._report(apply_due_transitions())
+            return
+        self.stdout.write('Applying election transitions as they fall due (Ctrl-C to stop)')
+        try:
+            while True:
+                counts = apply_due_transitions()
+                if any(counts.values()):
+                    self._report(counts)
+                due = next_transition()
+                wait = options['max_sleep']
+                if due is not None:
+                    wait = min(wait, max(0.0, (due - timezone.now()).total_seconds()))
+                time.sleep(wait)
+        except KeyboardInterrupt:
+            self.stdout.write('Scheduler stopped')
+
+    def _report(self, counts):
+        self.stdout.write(
+            f'{counts["activated"]} activated, {counts["reverted"]} back to pending, {counts["concluded"]} concluded'
+        )
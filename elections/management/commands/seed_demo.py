@@ -4,7 +4,7 @@ import datetime
 
 from django.contrib.auth import get_user_model
 from elections.models import Election, Candidate, VoterStatus, Vote
-from elections.utils.crypto import encrypt_vote
+from elections.utils.ballots import BallotRejected, cast_ballot
 
 
 class Command(BaseCommand):
@@ -51,14 +51,11 @@ class Command(BaseCommand):
 
         # cast demo votes if none exist
         if Vote.objects.filter(election=election).count() == 0:
-            Vote.objects.create(election=election, encrypted_vote_data=encrypt_vote(str(alice.id), associated_data=str(election.id)))
-            Vote.objects.create(election=election, encrypted_vote_data=encrypt_vote(str(bob.id), associated_data=str(election.id)))
-            # mark voters as voted
-            for username, _, _ in voters:
-                user = User.objects.get(username=username)
-                vs = VoterStatus.objects.get(user=user, election=election)
-                vs.has_voted = True
-                vs.save()
+            for (username, _, _), cand in zip(voters, (alice, bob)):
+                try:
+                    cast_ballot(User.objects.get(username=username), election, cand.id)
+                except BallotRejected as exc:
+                    self.stdout.write(f'Skipped demo vote for {username}: {exc}')
             self.stdout.write('Cast demo votes for Alice and Bob')
         else:
             self.stdout.write('Votes already exist; skipping casting')
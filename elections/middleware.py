@@ -0,0 +1,75 @@
+from functools import partial
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth import middleware as auth_middleware
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+
+class Role(NamedTuple):
+    """What a user may do, resolved once per request."""
+    name: str  # 'anonymous', 'superuser', or the profile role ('voter' or 'admin')
+    is_admin: bool  # superuser, staff or profile role 'admin'
+    is_superuser: bool
+
+    @property
+    def is_authenticated(self):
+        return self.name != 'anonymous'
+
+
+ANONYMOUS = Role('anonymous', False, False)
+# recorded in sessions started before ProfileModelBackend replaced it
+LEGACY_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+def resolve_role(user) -> Role:
+    """The :class:`Role` of ``user``, computed on first use and kept on the user object."""
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return ANONYMOUS
+    role = getattr(user, '_role', None)
+    if role is None:
+        if user.is_superuser:
+            role = Role('superuser', True, True)
+        else:
+            try:
+                profile_role = user.profile.role
+            except Exception:
+                # no profile yet: treated as a voter, like the default role
+                profile_role = 'voter'
+            role = Role('admin' if profile_role == 'admin' else 'voter', user.is_staff or profile_role == 'admin', False)
+        user._role = role
+    return role
+
+
+def _session_user(request):
+    # a session that names the old backend would otherwise be treated as logged
+    # out, since that backend is no longer in AUTHENTICATION_BACKENDS
+    if request.session.get(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+        request.session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    return auth_middleware.get_user(request)
+
+
+async def _asession_user(request):
+    if await request.session.aget(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+        await request.session.aset(BACKEND_SESSION_KEY, settings.AUTHENTICATION_BACKENDS[0])
+    return await auth_middleware.auser(request)
+
+
+class RoleMiddleware(MiddlewareMixin):
+    """Sets ``request.role``, resolved on first access from the user loaded with their profile.
+
+    Must come after ``AuthenticationMiddleware``. Views, templates (``is_admin``)
+    and the permission helpers in ``elections.views`` all read the same object.
+    Sessions started before ``ProfileModelBackend`` name Django's
+    ``ModelBackend``; they are moved to the current backend when the user is
+    loaded, so the switch logs nobody out.
+    """
+
+    def process_request(self, request):
+        if LEGACY_BACKEND not in settings.AUTHENTICATION_BACKENDS:
+            # AuthenticationMiddleware's lazy loaders, after adopting old sessions
+            request.user = SimpleLazyObject(lambda: _session_user(request))
+            request.auser = partial(_asession_user, request)
+        request.role = SimpleLazyObject(lambda: resolve_role(request.user))
@@ -0,0 +1,107 @@
+import binascii
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 2000
+ENVELOPE_V1 = 1
+NONCE_LEN = 12
+
+
+def _to_envelope(text):
+    # "<key id>:<hex>" or bare hex (no key id) -> binary envelope v1
+    key_id, _, hex_data = text.rpartition(':')
+    data = binascii.unhexlify(hex_data)
+    kid = key_id.encode('ascii')
+    return bytes((ENVELOPE_V1, len(kid))) + kid + data
+
+
+def _to_text(blob):
+    blob = bytes(blob)
+    kid_end = 2 + blob[1]
+    key_id = blob[2:kid_end].decode('ascii')
+    hex_data = binascii.hexlify(blob[kid_end:]).decode('ascii')
+    return f'{key_id}:{hex_data}' if key_id else hex_data
+
+
+def _convert(model, src, dst, fn):
+    qs = model.objects.order_by('pk')
+    last_pk = 0
+    while True:
+        rows = list(qs.filter(pk__gt=last_pk).only('pk', src)[:CHUNK_SIZE])
+        if not rows:
+            return
+        for row in rows:
+            setattr(row, dst, fn(getattr(row, src)))
+        model.objects.bulk_update(rows, [dst])
+        last_pk = rows[-1].pk
+
+
+def forwards(apps, schema_editor):
+    _convert(apps.get_model('elections', 'Vote'), 'encrypted_vote_data', 'encrypted_ballot', _to_envelope)
+    _convert(apps.get_model('elections', 'ElectionTally'), 'sealed_counts', 'sealed_blob', _to_envelope)
+
+
+def backwards(apps, schema_editor):
+    _convert(apps.get_model('elections', 'Vote'), 'encrypted_ballot', 'encrypted_vote_data', _to_text)
+    _convert(apps.get_model('elections', 'ElectionTally'), 'sealed_blob', 'sealed_counts', _to_text)
+
+
+class Migration(migrations.Migration):
+    # data conversion runs in chunks; keep each chunk in its own transaction
+    atomic = False
+
+    dependencies = [
+        ('elections', '0008_electiontally'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='encrypted_ballot',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='electiontally',
+            name='sealed_blob',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='encrypted_vote_data',
+            field=models.TextField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='electiontally',
+            name='sealed_counts',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(
+            model_name='vote',
+            name='encrypted_vote_data',
+        ),
+        migrations.RemoveField(
+            model_name='electiontally',
+            name='sealed_counts',
+        ),
+        migrations.RenameField(
+            model_name='vote',
+            old_name='encrypted_ballot',
+            new_name='encrypted_vote_data',
+        ),
+        migrations.RenameField(
+            model_name='electiontally',
+            old_name='sealed_blob',
+            new_name='sealed_counts',
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='encrypted_vote_data',
+            field=models.BinaryField(),
+        ),
+        migrations.AlterField(
+            model_name='electiontally',
+            name='sealed_counts',
+            field=models.BinaryField(),
+        ),
+    ]
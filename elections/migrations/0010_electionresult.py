@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0009_binary_ballots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ElectionResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rows', models.JSONField(default=list)),
+                ('winners', models.JSONField(default=list)),
+                ('winners_display', models.JSONField(default=list)),
+                ('total_votes', models.PositiveIntegerField(default=0)),
+                ('total_voters', models.PositiveIntegerField(default=0)),
+                ('casting_percentage', models.FloatField(default=0)),
+                ('margin_votes', models.PositiveIntegerField(default=0)),
+                ('margin_percentage', models.FloatField(default=0)),
+                ('chart_labels', models.JSONField(default=list)),
+                ('chart_values', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('election', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result', to='elections.election')),
+            ],
+        ),
+    ]
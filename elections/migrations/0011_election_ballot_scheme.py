@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0010_electionresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='election',
+            name='ballot_scheme',
+            field=models.CharField(choices=[('aes-gcm', 'AES-GCM (ballots decrypted to tally)'), ('elgamal', 'Exponential ElGamal (homomorphic tally)')], default='aes-gcm', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='election',
+            name='elgamal_public_key',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='election',
+            name='elgamal_secret_key',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
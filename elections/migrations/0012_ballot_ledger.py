@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0011_election_ballot_scheme'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='electionresult',
+            name='ledger_root',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='electionresult',
+            name='ledger_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vote',
+            name='ledger_index',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='BallotLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('root', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('election', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='elections.election')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('index', models.PositiveBigIntegerField()),
+                ('digest', models.CharField(max_length=64)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_nodes', to='elections.election')),
+            ],
+            options={
+                'unique_together': {('election', 'level', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0012_ballot_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingBallot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('encrypted_vote_data', models.BinaryField()),
+                ('accepted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_ballots', to='elections.election')),
+            ],
+        ),
+    ]
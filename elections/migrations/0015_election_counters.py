@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:08
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model):
+    return Coalesce(Subquery(
+        model.objects.filter(election=OuterRef('pk')).order_by()
+        .values('election').annotate(n=Count('pk')).values('n'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def populate(apps, schema_editor):
+    apps.get_model('elections', 'Election').objects.update(
+        eligible_count=_count(apps.get_model('elections', 'VoterStatus')),
+        votes_cast=_count(apps.get_model('elections', 'Vote')),
+        candidates_count=_count(apps.get_model('elections', 'Candidate')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0014_vote_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='election',
+            name='candidates_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='election',
+            name='eligible_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='election',
+            name='votes_cast',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
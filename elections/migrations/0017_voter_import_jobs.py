@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:15
+
+import elections.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0016_voterimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voterimport',
+            name='csv_file',
+            field=models.FileField(blank=True, storage=elections.models._voter_import_storage, upload_to='%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='voterimport',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='voterimport',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # imports recorded before jobs existed ran inline and are done
+        migrations.AddField(
+            model_name='voterimport',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='done', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='voterimport',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='voterimport',
+            name='total_rows',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='voterimport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
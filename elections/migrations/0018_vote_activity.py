@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill(apps, schema_editor):
+    VoteActivity = apps.get_model('elections', 'VoteActivity')
+    rows = (
+        apps.get_model('elections', 'Vote').objects
+        .annotate(h=TruncHour('timestamp', tzinfo=datetime.timezone.utc))
+        .values('election_id', 'h').annotate(n=Count('id')).order_by()
+    )
+    VoteActivity.objects.bulk_create(
+        [VoteActivity(election_id=r['election_id'], hour=r['h'], count=r['n']) for r in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0017_voter_import_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='elections.election')),
+            ],
+            options={
+                'unique_together': {('election', 'hour')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
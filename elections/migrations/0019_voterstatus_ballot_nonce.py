@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0018_vote_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voterstatus',
+            name='ballot_nonce',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:21
+
+import csv
+import io
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_rejected_rows(apps, schema_editor):
+    VoterImport = apps.get_model('elections', 'VoterImport')
+    RejectedVoterRow = apps.get_model('elections', 'RejectedVoterRow')
+    for report in VoterImport.objects.exclude(rejected_csv='').only('id', 'rejected_csv').iterator():
+        reader = csv.reader(io.StringIO(report.rejected_csv))
+        next(reader, None)  # header
+        RejectedVoterRow.objects.bulk_create(
+            [
+                RejectedVoterRow(voter_import_id=report.id, line=int(line), username=username, reason=reason)
+                for line, username, reason in reader
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0019_voterstatus_ballot_nonce'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RejectedVoterRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.PositiveIntegerField()),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('reason', models.CharField(max_length=40)),
+                ('voter_import', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rejected_rows', to='elections.voterimport')),
+            ],
+        ),
+        migrations.RunPython(move_rejected_rows, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='voterimport',
+            name='rejected_csv',
+        ),
+    ]
@@ -1,3 +1,7 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -30,10 +34,46 @@ class Election(models.Model):
     # Rate limiting for publish key verification
     publish_attempts = models.IntegerField(default=0)
     publish_blocked_until = models.DateTimeField(null=True, blank=True)
+    # How ballots are sealed and tallied; see elections.utils.ballots
+    SCHEME_AES = 'aes-gcm'
+    SCHEME_ELGAMAL = 'elgamal'
+    BALLOT_SCHEME_CHOICES = [
+        (SCHEME_AES, 'AES-GCM (ballots decrypted to tally)'),
+        (SCHEME_ELGAMAL, 'Exponential ElGamal (homomorphic tally)'),
+    ]
+    ballot_scheme = models.CharField(max_length=16, choices=BALLOT_SCHEME_CHOICES, default=SCHEME_AES)
+    # Per-election ElGamal key pair; the secret is sealed with the AES keyring
+    elgamal_public_key = models.TextField(blank=True)
+    elgamal_secret_key = models.BinaryField(null=True, blank=True)
+    # Denormalized counters, kept in step with F() updates (elections.utils.counters);
+    # `manage.py recount` re-derives them from the rows
+    eligible_count = models.PositiveIntegerField(default=0)
+    votes_cast = models.PositiveIntegerField(default=0)
+    candidates_count = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = ('eligible_count', 'votes_cast', 'candidates_count')
+    LOW_TURNOUT = 0.3
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # the counters only move through F() updates; a full save of an instance
+        # loaded earlier must not write its stale copies back over them
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def turnout_pct(self):
+        return round(self.votes_cast / self.eligible_count * 100, 2) if self.eligible_count else 0
+
+    @property
+    def low_turnout(self):
+        return bool(self.eligible_count) and self.votes_cast / self.eligible_count < self.LOW_TURNOUT and self.status == 'active'
+
 class Candidate(models.Model):
     election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='candidates')
     name = models.CharField(max_length=255)
@@ -46,16 +86,204 @@ class Candidate(models.Model):
 
 class Vote(models.Model):
     election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='votes')
-    encrypted_vote_data = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # ballot envelope, see elections.utils.crypto.seal_envelope
+    encrypted_vote_data = models.BinaryField()
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # position of this ballot in the election's Merkle ledger (None: not yet appended)
+    ledger_index = models.PositiveBigIntegerField(null=True, blank=True)
 
     def __str__(self):
         return f'Vote for {self.election.title} @ {self.timestamp.isoformat()}'
 
+class VoteActivity(models.Model):
+    """Ballots stored per election per hour (``hour`` is the start of the UTC hour).
+
+    Kept up to date as ballots are stored (see ``elections.utils.activity``),
+    so activity charts read a handful of rows however many ballots there are.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='activity')
+    hour = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('election', 'hour')
+
+    def __str__(self):
+        return f'{self.count} votes in {self.election.title} @ {self.hour.isoformat()}'
+
+class PendingBallot(models.Model):
+    """A ballot accepted by the ingestion queue but not yet moved into ``Vote``.
+
+    Written in the transaction that claims the voter's ``has_voted`` flag, so an
+    accepted ballot is durable; ``flush_ballots`` moves batches into ``Vote``
+    and deletes them in one transaction (see ``elections.utils.ingest``).
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='pending_ballots')
+    encrypted_vote_data = models.BinaryField()
+    accepted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'Pending ballot for {self.election.title} @ {self.accepted_at.isoformat()}'
+
+
+class VoterImportStorage(FileSystemStorage):
+    """Uploaded voter rolls, under ``VOTER_IMPORT_DIR`` and outside MEDIA_ROOT so they are never served."""
+
+    # read on every access rather than cached, so the setting can be overridden
+    @property
+    def base_location(self):
+        return settings.VOTER_IMPORT_DIR
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def _voter_import_storage():
+    return VoterImportStorage()
+
+
+class VoterImport(models.Model):
+    """One voter-roll CSV import into an election, run as a background job.
+
+    The uploaded CSV is kept in ``csv_file`` until the job finishes. ``rows``
+    and the counts are checkpointed in the transaction of each chunk, so a job
+    that dies resumes after the last committed chunk (see
+    ``elections.utils.voter_import``). The rows that were not imported are
+    kept as ``rejected_rows`` (:class:`RejectedVoterRow`); duplicates are only
+    counted.
+    """
+    STATUS_CHOICES = [('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')]
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='voter_imports')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', db_index=True)
+    csv_file = models.FileField(storage=_voter_import_storage, upload_to='%Y/%m/', blank=True)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    rows = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    duplicate = models.PositiveIntegerField(default=0)
+    unknown = models.PositiveIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+
+    def __str__(self):
+        return f'Voter import into {self.election.title} @ {self.created_at.isoformat()} ({self.status})'
+
+    @property
+    def progress_pct(self):
+        if self.status == 'done':
+            return 100
+        return round(self.rows / self.total_rows * 100, 1) if self.total_rows else 0
+
+
+class RejectedVoterRow(models.Model):
+    """A CSV row of a :class:`VoterImport` that was not imported.
+
+    Each chunk inserts its own rejects in its transaction, so the cost of an
+    import stays linear however many rows are rejected, and a resumed job
+    keeps the rejects of the chunks already committed.
+    """
+    voter_import = models.ForeignKey(VoterImport, on_delete=models.CASCADE, related_name='rejected_rows')
+    line = models.PositiveIntegerField()
+    username = models.CharField(max_length=150, blank=True)
+    reason = models.CharField(max_length=40)
+
+    def __str__(self):
+        return f'Line {self.line} of import {self.voter_import_id}: {self.reason}'
+
+
+class ElectionTally(models.Model):
+    """Running per-election tally, kept sealed with the ballot key.
+
+    ``sealed_counts`` holds the AES-GCM encrypted JSON mapping of ballot choice
+    (e.g. ``candidate:<id>``) to count. It is updated in the same transaction
+    that stores each ``Vote`` so results can be read without decrypting every
+    ballot. A single row per election means a database observer cannot tell
+    which candidate a new ballot went to.
+    """
+    election = models.OneToOneField(Election, on_delete=models.CASCADE, related_name='tally')
+    sealed_counts = models.BinaryField()
+    ballots_counted = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Tally for {self.election.title} ({self.ballots_counted} ballots)'
+
+class BallotLedger(models.Model):
+    """Head of an election's append-only Merkle tree over ballot ciphertexts.
+
+    ``root`` is the RFC 6962 tree hash over the first ``size`` ballots (hex).
+    The row is locked while a ballot is appended, which serialises appends.
+    """
+    election = models.OneToOneField(Election, on_delete=models.CASCADE, related_name='ledger')
+    size = models.PositiveBigIntegerField(default=0)
+    root = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Ledger for {self.election.title} ({self.size} ballots)'
+
+
+class LedgerNode(models.Model):
+    """A complete subtree of a ballot ledger: leaves ``[index * 2^level, (index + 1) * 2^level)``.
+
+    Only complete subtrees are stored, so nodes never change once written.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='ledger_nodes')
+    level = models.PositiveSmallIntegerField()
+    index = models.PositiveBigIntegerField()
+    digest = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('election', 'level', 'index')
+
+    def __str__(self):
+        return f'{self.election_id}/{self.level}/{self.index}'
+
+
+class ElectionResult(models.Model):
+    """Results snapshot, computed once when an election concludes.
+
+    ``rows`` holds one entry per choice (``choice``, ``raw_choice``, ``count``,
+    ``percentage``) in display order; ``winners`` the raw choices of the
+    winner(s). ``results_view`` and the CSV export serve this row directly.
+    """
+    election = models.OneToOneField(Election, on_delete=models.CASCADE, related_name='result')
+    rows = models.JSONField(default=list)
+    winners = models.JSONField(default=list)
+    winners_display = models.JSONField(default=list)
+    total_votes = models.PositiveIntegerField(default=0)
+    total_voters = models.PositiveIntegerField(default=0)
+    casting_percentage = models.FloatField(default=0)
+    margin_votes = models.PositiveIntegerField(default=0)
+    margin_percentage = models.FloatField(default=0)
+    chart_labels = models.JSONField(default=list)
+    chart_values = models.JSONField(default=list)
+    # ballot ledger head published with the results
+    ledger_root = models.CharField(max_length=64, blank=True)
+    ledger_size = models.PositiveBigIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Results for {self.election.title} ({self.total_votes} votes)'
+
+    @property
+    def tally(self):
+        return {r['raw_choice']: r['count'] for r in self.rows}
+
+    @property
+    def percentages(self):
+        return {r['raw_choice']: r['percentage'] for r in self.rows}
+
 class VoterStatus(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     election = models.ForeignKey(Election, on_delete=models.CASCADE)
     has_voted = models.BooleanField(default=False)
+    # nonce of the voter's current ballot link (elections.utils.ballot_links); cleared when they vote
+    ballot_nonce = models.CharField(max_length=32, blank=True, default='')
 
     class Meta:
         unique_together = ('user', 'election')
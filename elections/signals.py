@@ -1,7 +1,15 @@
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from .models import Profile
+from django.core.mail import send_mail
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import Candidate, Election, Profile, VoterStatus
+from .utils.counters import bump
+from .utils.stats import invalidate_site_stats
+
+# Sent once per election when it concludes, by the scheduler (automatic=True)
+# or by an admin publishing early (automatic=False). Receivers get ``election``.
+election_concluded = Signal()
 
 
 @receiver(post_save, sender=User)
@@ -16,3 +24,52 @@ def save_user_profile(sender, instance, **kwargs):
         instance.profile.save()
     except Profile.DoesNotExist:
         Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Election)
+@receiver(post_delete, sender=Election)
+@receiver(post_save, sender=VoterStatus)
+@receiver(post_delete, sender=VoterStatus)
+def drop_site_stats(sender, **kwargs):
+    # homepage KPIs depend on the set of elections and their voter rolls
+    invalidate_site_stats()
+
+
+@receiver(post_save, sender=VoterStatus)
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=VoterStatus)
+@receiver(post_delete, sender=Candidate)
+def count_roll_and_candidates(sender, instance, created=None, origin=None, **kwargs):
+    if created is False or isinstance(origin, Election) or getattr(origin, 'model', None) is Election:
+        # plain re-save, or removed along with its election
+        return
+    field = 'eligible_count' if sender is VoterStatus else 'candidates_count'
+    bump(instance.election_id, **{field: 1 if created else -1})
+
+
+@receiver(post_save, sender=Election)
+def drop_next_transition(sender, **kwargs):
+    # a new or edited election may move the next scheduled transition
+    from .utils.schedule import forget_next_transition
+    forget_next_transition()
+
+
+@receiver(election_concluded)
+def snapshot_results(sender, election, **kwargs):
+    from .utils.results import build_snapshot
+    build_snapshot(election)
+
+
+@receiver(election_concluded)
+def notify_creator(sender, election, automatic=False, **kwargs):
+    creator = election.created_by
+    if creator is None or not creator.email:
+        return
+    how = 'reached its end time' if automatic else 'was published'
+    send_mail(
+        subject=f'Results available: {election.title}',
+        message=f'The election "{election.title}" {how} and its results are now available.',
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com'),
+        recipient_list=[creator.email],
+        fail_silently=True,
+    )
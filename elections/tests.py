@@ -1,14 +1,52 @@
 # Cleaned tests module: moved all runtime code into setUp/test methods and removed stray top-level statements
 import os
 os.environ.setdefault('AES_KEY_HEX', '00112233445566778899aabbccddeeff00112233445566778899aabbccddeeff')
-from django.test import TestCase
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import BACKEND_SESSION_KEY
 from django.contrib.auth.models import User
 from django.utils import timezone
-from elections.models import Election, Candidate, Vote, VoterStatus
-from elections.utils.crypto import encrypt_vote, decrypt_vote
+from elections.budgets import BUDGETS, CHECK_LATENCY, LATENCY_FACTOR, SCALES, Budget
+from elections.models import Election, Candidate, Vote, VoterStatus, ElectionTally, ElectionResult, PendingBallot, VoterImport, VoteActivity, Profile, RejectedVoterRow
+from elections.middleware import resolve_role
+from elections.utils.crypto import encrypt_vote, decrypt_vote, count_votes, get_keyring, reload_keyring, parse_envelope
+from unittest import mock
+from asgiref.sync import sync_to_async
+import binascii
+from elections.utils.tally import count_ballots, read_tally, reconcile_tally
+from elections.utils import homomorphic
+from elections.utils.ballots import AlreadyVoted, InvalidBallotLink, InvalidCandidate, NotEligible, cast_ballot, seal_ballot
+from elections.utils.ballot_links import issue_ballot_links, make_ballot_token
+from elections.utils.ingest import flush_due, flush_pending, queue_stats
+from elections.utils.results import build_snapshot
+from elections.utils.ledger import audit_ledger, inclusion_proof, ledger_head, verify_inclusion
+from elections.utils.loadtest import percentile
+from elections.utils.activity import hour_of, rebuild_activity, turnout_series
+from elections.utils.stats import compute_dashboard_kpis, compute_site_stats, invalidate_site_stats, refresh_dashboard_kpis, site_stats
+from elections.views import ELECTIONS_PER_PAGE
+from django.conf import settings
+from django.core.cache import cache
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from elections.signals import election_concluded
+from elections.utils.live import astream_turnout, stream_turnout, turnout_snapshot
+from elections.utils.schedule import apply_due_transitions, next_transition
+from elections.utils.counters import recount
+from elections.utils.provisioning import provision_voters
+from elections.utils.voter_import import claim_next_job, create_import_job, import_voters, run_import_job
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+import csv
 import datetime
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
 
 
 class CryptoTests(TestCase):
@@ -19,6 +57,54 @@ class CryptoTests(TestCase):
         pt = decrypt_vote(ct)
         self.assertEqual(pt, plaintext)
 
+    def test_keyring_is_cached_and_tags_key_id(self):
+        self.assertIs(get_keyring(), get_keyring())
+        ct = encrypt_vote('candidate:1')
+        self.assertEqual(parse_envelope(ct)[0], get_keyring().active_id)
+
+    def test_binary_envelope_decrypts_from_buffer(self):
+        ct = encrypt_vote('candidate:42', associated_data='5')
+        self.assertIsInstance(ct, bytes)
+        # 2 header bytes + key id + 12 byte nonce + plaintext + 16 byte tag
+        self.assertEqual(len(ct), 2 + len(get_keyring().active_id) + 12 + len('candidate:42') + 16)
+        # PostgreSQL hands BinaryField values back as memoryview
+        self.assertEqual(decrypt_vote(memoryview(ct), associated_data='5'), 'candidate:42')
+
+    def test_key_rotation_keeps_old_ballots_readable(self):
+        old_key = os.environ['AES_KEY_HEX']
+        old_ct = encrypt_vote('candidate:7', associated_data='3')
+        # a ballot written before ciphertexts carried a key id
+        nonce = b'\x00' * 12
+        legacy_ct = binascii.hexlify(nonce + get_keyring().active.encrypt(nonce, b'candidate:8', b'3')).decode('ascii')
+        new_key = 'ff' * 32
+        env = {'AES_KEY_HEX': new_key, 'AES_KEY_ID': '2', 'AES_RETIRED_KEYS': f'1:{old_key}'}
+        try:
+            with mock.patch.dict(os.environ, env):
+                reload_keyring()
+                new_ct = encrypt_vote('candidate:9', associated_data='3')
+                self.assertEqual(parse_envelope(new_ct)[0], '2')
+                self.assertEqual(decrypt_vote(old_ct, associated_data='3'), 'candidate:7')
+                self.assertEqual(decrypt_vote(legacy_ct, associated_data='3'), 'candidate:8')
+                self.assertEqual(decrypt_vote(new_ct, associated_data='3'), 'candidate:9')
+            reload_keyring()
+            with self.assertRaises(RuntimeError):
+                decrypt_vote(new_ct, associated_data='3')
+        finally:
+            reload_keyring()
+
+    def test_count_votes_in_worker_processes(self):
+        rows = [(i, encrypt_vote(f'candidate:{i % 3}', associated_data='9')) for i in range(30)]
+        rows.append((99, encrypt_vote('candidate:0', associated_data='8')))  # wrong election
+        chunks = [rows[i:i + 4] for i in range(0, len(rows), 4)]
+        serial = count_votes(iter(chunks), associated_data='9', workers=1)
+        parallel = count_votes(iter(chunks), associated_data='9', workers=2)
+        self.assertEqual(serial, ({'candidate:0': 10, 'candidate:1': 10, 'candidate:2': 10}, 1))
+        self.assertEqual(parallel, serial)
+        # PostgreSQL returns BinaryField values as memoryview
+        views = [[(i, memoryview(ct)) for i, ct in chunk] for chunk in chunks]
+        self.assertEqual(count_votes(iter(views), associated_data='9', workers=1), serial)
+        self.assertEqual(count_votes(iter(views), associated_data='9', workers=2), serial)
+
 
 class VotingTests(TestCase):
     def setUp(self):
@@ -74,6 +160,59 @@ class VotingTests(TestCase):
         self.assertContains(r, 'candidate:')
 
 
+class AsyncViewTests(TestCase):
+    """The voter-facing views are async; drive them through the ASGI handler."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('asa', password='pass')
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='AsyncTest',
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            status='active',
+        )
+        self.candidate = Candidate.objects.create(election=self.election, name='Ava')
+        VoterStatus.objects.create(user=self.user, election=self.election)
+
+    async def test_vote_dashboard_and_results_over_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        r = await self.async_client.get('/dashboard/')
+        self.assertContains(r, 'AsyncTest')
+        url = f'/vote/{self.election.id}/'
+        r = await self.async_client.post(url, {'candidate_id': self.candidate.id})
+        self.assertContains(r, 'Thanks')
+        r = await self.async_client.post(url, {'candidate_id': self.candidate.id})
+        self.assertContains(r, 'already voted')
+        self.assertEqual(await Vote.objects.filter(election=self.election).acount(), 1)
+        await Election.objects.filter(pk=self.election.pk).aupdate(end_time=timezone.now() - datetime.timedelta(minutes=1))
+        r = await self.async_client.get(f'/results/{self.election.id}/')
+        self.assertContains(r, 'Ava')
+        self.assertTrue(await ElectionResult.objects.filter(election=self.election).aexists())
+
+    async def test_refused_ballots_are_not_sealed(self):
+        outsider = await User.objects.acreate_user('outsider', password='pass')
+        url = f'/vote/{self.election.id}/'
+        with mock.patch('elections.utils.ballots.seal_ballot', wraps=seal_ballot) as seal:
+            await self.async_client.aforce_login(outsider)
+            r = await self.async_client.post(url, {'candidate_id': self.candidate.id})
+            self.assertEqual(r.status_code, 403)
+            await self.async_client.aforce_login(self.user)
+            await VoterStatus.objects.filter(user=self.user).aupdate(has_voted=True)
+            r = await self.async_client.post(url, {'candidate_id': self.candidate.id})
+            self.assertContains(r, 'already voted')
+            seal.assert_not_called()
+            await VoterStatus.objects.filter(user=self.user).aupdate(has_voted=False)
+            r = await self.async_client.post(url, {'candidate_id': self.candidate.id})
+            self.assertContains(r, 'Thanks')
+            seal.assert_called_once()
+
+    async def test_anonymous_voter_is_redirected_to_login(self):
+        r = await self.async_client.get(f'/vote/{self.election.id}/')
+        self.assertEqual(r.status_code, 302)
+        self.assertIn('/login/', r['Location'])
+
+
 class AdminTests(TestCase):
     def setUp(self):
         self.admin = User.objects.create_user('admin', password='pass')
@@ -131,10 +270,1332 @@ class ExportTests(TestCase):
             election=self.election,
             encrypted_vote_data=encrypt_vote(f'candidate:{self.candidate.id}', associated_data=str(self.election.id)),
         )
+        # inserted directly, so the hourly rollup is derived here
+        rebuild_activity([self.election])
 
     def test_export_csv(self):
         self.client.login(username='eve', password='pass')
         url = reverse('export_results_csv', args=[self.election.id])
         r = self.client.get(url)
         self.assertEqual(r.status_code, 200)
-        self.assertIn('choice,count', r.content.decode('utf-8'))
+        self.assertTrue(r.streaming)
+        body = b''.join(r.streaming_content).decode('utf-8')
+        self.assertIn('choice,count', body)
+        self.assertIn(f'candidate:{self.candidate.id},1,100.0,{self.candidate.id},Zed', body)
+
+    def test_export_ndjson_with_hourly_counts(self):
+        self.client.login(username='eve', password='pass')
+        url = reverse('export_results_csv', args=[self.election.id])
+        r = self.client.get(url, {'format': 'ndjson', 'hourly': '1'})
+        self.assertEqual(r['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(r.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual([line['type'] for line in lines], ['election', 'result', 'hour'])
+        self.assertEqual(lines[1]['candidate_name'], 'Zed')
+        self.assertEqual(lines[2]['votes'], 1)
+
+    def test_export_rejects_unknown_format(self):
+        self.client.login(username='eve', password='pass')
+        r = self.client.get(reverse('export_results_csv', args=[self.election.id]), {'format': 'xml'})
+        self.assertEqual(r.status_code, 400)
+
+
+class TallyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('tally', password='pass')
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='TallyTest',
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            status='active',
+        )
+        self.candidate = Candidate.objects.create(election=self.election, name='Tess')
+        VoterStatus.objects.create(user=self.user, election=self.election, has_voted=False)
+
+    def test_vote_view_updates_sealed_tally(self):
+        self.client.login(username='tally', password='pass')
+        self.client.post(f'/vote/{self.election.id}/', {'candidate_id': self.candidate.id})
+        tally = ElectionTally.objects.get(election=self.election)
+        self.assertEqual(tally.ballots_counted, 1)
+        self.assertNotIn(b'candidate:', bytes(tally.sealed_counts))
+        self.assertEqual(read_tally(self.election), {f'candidate:{self.candidate.id}': 1})
+
+    def test_missing_tally_is_seeded_from_ballots(self):
+        for _ in range(3):
+            Vote.objects.create(
+                election=self.election,
+                encrypted_vote_data=encrypt_vote(f'candidate:{self.candidate.id}', associated_data=str(self.election.id)),
+            )
+        self.assertEqual(read_tally(self.election), {f'candidate:{self.candidate.id}': 3})
+        self.assertTrue(ElectionTally.objects.filter(election=self.election).exists())
+        # chunk boundaries must not drop or double count ballots
+        self.assertEqual(count_ballots(self.election, chunk_size=2), ({f'candidate:{self.candidate.id}': 3}, 0))
+
+    def test_reconcile_detects_and_repairs_drift(self):
+        read_tally(self.election)
+        # a ballot inserted behind the tally's back
+        Vote.objects.create(
+            election=self.election,
+            encrypted_vote_data=encrypt_vote(f'candidate:{self.candidate.id}', associated_data=str(self.election.id)),
+        )
+        self.assertFalse(reconcile_tally(self.election)['match'])
+        with self.assertRaises(CommandError):
+            call_command('reconcile_tallies', self.election.id, stdout=io.StringIO())
+        call_command('reconcile_tallies', self.election.id, '--repair', stdout=io.StringIO())
+        self.assertTrue(reconcile_tally(self.election)['match'])
+
+    def test_reconcile_recount_does_not_hold_the_tally_lock(self):
+        read_tally(self.election)
+        calls = []
+
+        def counting(election, **kwargs):
+            calls.append(election.id)
+            counted = count_ballots(election, **kwargs)
+            if len(calls) == 1:
+                # a ballot stored while the first recount runs makes it stale
+                cast_ballot(self.user, self.election, self.candidate.id)
+            return counted
+
+        with mock.patch('elections.utils.tally.count_ballots', side_effect=counting):
+            report = reconcile_tally(self.election)
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(report['match'])
+        self.assertEqual(report['derived'], {f'candidate:{self.candidate.id}': 1})
+
+        def touching(election, **kwargs):
+            # ballots keep landing: every recount is stale
+            ElectionTally.objects.get(election=election).save()
+            return count_ballots(election, **kwargs)
+
+        with mock.patch('elections.utils.tally.count_ballots', side_effect=touching):
+            report = reconcile_tally(self.election)
+        self.assertEqual((report['busy'], report['match']), (True, None))
+
+
+class ResultSnapshotTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('root', 'root@example.com', 'pass')
+        self.voter = User.objects.create_user('val', password='pass')
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='SnapshotTest',
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            status='active',
+        )
+        self.a = Candidate.objects.create(election=self.election, name='Ann')
+        self.b = Candidate.objects.create(election=self.election, name='Ben')
+        VoterStatus.objects.create(user=self.voter, election=self.election)
+        self.client.login(username='val', password='pass')
+        self.client.post(f'/vote/{self.election.id}/', {'candidate_id': self.a.id})
+
+    def test_publish_builds_snapshot_once(self):
+        self.client.login(username='root', password='pass')
+        self.client.post(reverse('publish_results', args=[self.election.id]))
+        result = ElectionResult.objects.get(election=self.election)
+        self.assertEqual(result.total_votes, 1)
+        self.assertEqual(result.total_voters, 1)
+        self.assertEqual(result.winners_display, ['Ann'])
+        self.assertEqual(result.margin_votes, 1)
+        # ballots can no longer be cast, and the page is served from the snapshot
+        r = self.client.get(reverse('results', args=[self.election.id]))
+        self.assertContains(r, 'Ann')
+        self.assertEqual(r.context['total_votes'], 1)
+
+    def test_auto_conclude_builds_snapshot(self):
+        Election.objects.filter(pk=self.election.pk).update(end_time=timezone.now() - datetime.timedelta(minutes=1))
+        self.client.get('/')
+        self.election.refresh_from_db()
+        self.assertEqual(self.election.status, 'concluded')
+        self.assertEqual(ElectionResult.objects.get(election=self.election).tally, {f'candidate:{self.a.id}': 1})
+
+    def test_vote_rejected_after_early_publish(self):
+        other = User.objects.create_user('late', password='pass')
+        VoterStatus.objects.create(user=other, election=self.election)
+        Election.objects.filter(pk=self.election.pk).update(status='concluded')
+        self.client.login(username='late', password='pass')
+        r = self.client.post(f'/vote/{self.election.id}/', {'candidate_id': self.b.id})
+        self.assertContains(r, 'not active')
+        self.assertEqual(Vote.objects.filter(election=self.election).count(), 1)
+
+    def test_verify_command_flags_mismatch(self):
+        Election.objects.filter(pk=self.election.pk).update(status='concluded')
+        call_command('rebuild_results', self.election.id, stdout=io.StringIO())
+        call_command('rebuild_results', self.election.id, '--verify', stdout=io.StringIO())
+        Vote.objects.create(
+            election=self.election,
+            encrypted_vote_data=encrypt_vote(f'candidate:{self.b.id}', associated_data=str(self.election.id)),
+        )
+        with self.assertRaises(CommandError):
+            call_command('rebuild_results', self.election.id, '--verify', stdout=io.StringIO())
+
+
+class HomomorphicTallyTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('elg', 'elg@example.com', 'pass')
+        self.client.login(username='elg', password='pass')
+        now = timezone.now()
+        self.client.post(reverse('create_election'), {
+            'title': 'Homomorphic',
+            'start_time': (now - datetime.timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            'end_time': (now + datetime.timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            'start_time_utc': (now - datetime.timedelta(hours=1)).isoformat(),
+            'end_time_utc': (now + datetime.timedelta(hours=1)).isoformat(),
+            'ballot_scheme': Election.SCHEME_ELGAMAL,
+        })
+        self.election = Election.objects.get(title='Homomorphic')
+        self.a = Candidate.objects.create(election=self.election, name='Ada')
+        self.b = Candidate.objects.create(election=self.election, name='Bo')
+
+    def _vote(self, username, candidate):
+        user = User.objects.create_user(username, password='pass')
+        VoterStatus.objects.create(user=user, election=self.election)
+        self.client.login(username=username, password='pass')
+        self.client.post(f'/vote/{self.election.id}/', {'candidate_id': candidate.id})
+
+    def test_primitives_add_votes_under_encryption(self):
+        x, h = homomorphic.generate_keypair()
+        aggregate = {}
+        for chosen in (1, 2, 2, 3):
+            homomorphic.combine(aggregate, homomorphic.encrypt_choice(h, [1, 2, 3], chosen))
+        aggregate = homomorphic.loads(homomorphic.dumps(aggregate))
+        self.assertEqual(homomorphic.decrypt_aggregate(x, aggregate, upper=4), {1: 1, 2: 2, 3: 1})
+
+    def test_tally_never_decrypts_individual_ballots(self):
+        self.assertEqual(self.election.ballot_scheme, Election.SCHEME_ELGAMAL)
+        self.assertNotIn(b'elgamal', bytes(self.election.elgamal_secret_key))
+        self._vote('v1', self.a)
+        self._vote('v2', self.b)
+        self._vote('v3', self.b)
+        self.assertEqual(Vote.objects.filter(election=self.election).count(), 3)
+        with mock.patch('elections.utils.tally.homomorphic.decrypt_count', wraps=homomorphic.decrypt_count) as dec:
+            tally = read_tally(self.election)
+        # one decryption per candidate component of the aggregate, not per ballot
+        self.assertEqual(dec.call_count, 2)
+        self.assertEqual(tally, {f'candidate:{self.a.id}': 1, f'candidate:{self.b.id}': 2})
+        self.assertTrue(reconcile_tally(self.election)['match'])
+        self.client.login(username='elg', password='pass')
+        r = self.client.get(reverse('list_candidates', args=[self.election.id]))
+        self.assertEqual(r.context['tally'], {self.a.id: 1, self.b.id: 2})
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='LedgerTest',
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            status='active',
+        )
+        self.candidate = Candidate.objects.create(election=self.election, name='Lee')
+        # ballots cast before the ledger existed are appended when it is created
+        for _ in range(2):
+            Vote.objects.create(
+                election=self.election,
+                encrypted_vote_data=encrypt_vote(f'candidate:{self.candidate.id}', associated_data=str(self.election.id)),
+            )
+
+    def _vote(self, username):
+        user = User.objects.create_user(username, password='pass')
+        VoterStatus.objects.create(user=user, election=self.election)
+        self.client.login(username=username, password='pass')
+        return self.client.post(f'/vote/{self.election.id}/', {'candidate_id': self.candidate.id})
+
+    def test_votes_extend_ledger_and_proofs_verify(self):
+        receipts = [self._vote(f'l{i}').context for i in range(5)]
+        self.assertEqual([r['ledger_index'] for r in receipts], [2, 3, 4, 5, 6])
+        size, root = ledger_head(self.election)
+        self.assertEqual(size, 7)
+        self.assertTrue(audit_ledger(self.election)['match'])
+        with self.assertNumQueries(2):
+            proof = inclusion_proof(self.election, 3)
+        self.assertEqual(proof['root'], root)
+        self.assertTrue(verify_inclusion(receipts[1]['leaf_hash'], 3, size, proof['path'], root))
+        self.assertFalse(verify_inclusion(receipts[0]['leaf_hash'], 3, size, proof['path'], root))
+        # proofs against an earlier tree size still verify
+        old = inclusion_proof(self.election, 1, tree_size=4)
+        self.assertTrue(verify_inclusion(old['leaf_hash'], 1, 4, old['path'], old['root']))
+
+    def test_proof_endpoint_and_published_root(self):
+        r = self._vote('pub')
+        leaf = r.context['leaf_hash']
+        Election.objects.filter(pk=self.election.pk).update(end_time=timezone.now() - datetime.timedelta(minutes=1))
+        self.client.get('/')
+        published = ElectionResult.objects.get(election=self.election)
+        self.assertEqual((published.ledger_size, published.ledger_root), ledger_head(self.election))
+        data = self.client.get(reverse('ledger_proof', args=[self.election.id, 2]), {'leaf': leaf}).json()
+        self.assertTrue(data['verified'])
+        self.assertTrue(data['published'])
+        data = self.client.get(reverse('ledger_proof', args=[self.election.id, 1]), {'leaf': leaf}).json()
+        self.assertFalse(data['verified'])
+        self.assertEqual(self.client.get(reverse('ledger_proof', args=[self.election.id, 9])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('ledger_proof', args=[self.election.id, 0]), {'leaf': 'zz'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('ledger', args=[self.election.id])).json()['published_root'], published.ledger_root)
+
+    def test_election_concluded_before_ledger_is_seeded(self):
+        # no ballot cast since the upgrade: the ledger is created when first read
+        Election.objects.filter(pk=self.election.pk).update(end_time=timezone.now() - datetime.timedelta(minutes=1))
+        self.client.get('/')
+        published = ElectionResult.objects.get(election=self.election)
+        self.assertEqual(published.ledger_size, 2)
+        self.assertEqual((published.ledger_size, published.ledger_root), ledger_head(self.election))
+        out = io.StringIO()
+        call_command('audit_ledger', self.election.id, stdout=out)
+        self.assertIn('OK size=2', out.getvalue())
+
+    def test_audit_detects_tampered_ballot(self):
+        self._vote('t1')
+        vote = Vote.objects.filter(election=self.election).order_by('id').first()
+        vote.encrypted_vote_data = encrypt_vote('candidate:0', associated_data=str(self.election.id))
+        vote.save()
+        self.assertFalse(audit_ledger(self.election, chunk_size=2)['match'])
+        with self.assertRaises(CommandError):
+            call_command('audit_ledger', self.election.id, stdout=io.StringIO())
+
+
+class CastBallotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cass', password='pass')
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='CastTest',
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            status='active',
+        )
+        self.candidate = Candidate.objects.create(election=self.election, name='Cy')
+        other = Election.objects.create(title='Other', start_time=now, end_time=now)
+        self.foreign = Candidate.objects.create(election=other, name='Foreign')
+        VoterStatus.objects.create(user=self.user, election=self.election)
+
+    def test_rejects_candidate_from_other_election(self):
+        with self.assertRaises(InvalidCandidate):
+            cast_ballot(self.user, self.election, self.foreign.id)
+        self.assertFalse(VoterStatus.objects.get(user=self.user, election=self.election).has_voted)
+        self.client.login(username='cass', password='pass')
+        r = self.client.post(f'/vote/{self.election.id}/', {'candidate_id': self.foreign.id})
+        self.assertContains(r, 'Invalid candidate')
+        self.assertEqual(Vote.objects.count(), 0)
+
+    def test_ineligible_and_repeat_voters_are_refused(self):
+        stranger = User.objects.create_user('stranger', password='pass')
+        with self.assertRaises(NotEligible):
+            cast_ballot(stranger, self.election, self.candidate.id)
+        cast_ballot(self.user, self.election, self.candidate.id)
+        with self.assertRaises(AlreadyVoted):
+            cast_ballot(self.user, self.election, self.candidate.id)
+        self.assertEqual(Vote.objects.filter(election=self.election).count(), 1)
+
+
+@override_settings(BALLOT_INGEST_MODE='queue')
+class IngestQueueTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='QueueTest',
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            status='active',
+        )
+        self.a = Candidate.objects.create(election=self.election, name='Ann')
+        self.b = Candidate.objects.create(election=self.election, name='Ben')
+
+    def _cast(self, n, candidate):
+        receipts = []
+        for i in range(n):
+            user = User.objects.create_user(f'q{candidate.id}-{i}-{User.objects.count()}', password='pass')
+            VoterStatus.objects.create(user=user, election=self.election)
+            receipts.append(cast_ballot(user, self.election, candidate.id))
+        return receipts
+
+    def test_accepted_ballots_are_staged_then_flushed_in_batches(self):
+        receipts = self._cast(3, self.a) + self._cast(2, self.b)
+        self.assertTrue(all(r['ledger_index'] is None for r in receipts))
+        self.assertEqual(Vote.objects.count(), 0)
+        self.assertEqual(VoterStatus.objects.filter(has_voted=True).count(), 5)
+        self.assertEqual(queue_stats()['depth'], 5)
+        out = io.StringIO()
+        call_command('flush_ballots', '--stats', stdout=out)
+        self.assertEqual(set(json.loads(out.getvalue())), {'depth', 'oldest_age_seconds'})
+        # neither full nor old enough yet
+        self.assertEqual(flush_due(batch_size=10, interval=60), 0)
+        self.assertEqual(flush_due(batch_size=2, interval=60), 2)
+        self.assertEqual(flush_pending(batch_size=10), 3)
+        self.assertEqual(queue_stats()['depth'], 0)
+        self.assertEqual(read_tally(self.election), {f'candidate:{self.a.id}': 3, f'candidate:{self.b.id}': 2})
+        self.assertTrue(audit_ledger(self.election)['match'])
+        # every receipt handed out at accept time is in the ledger
+        size, root = ledger_head(self.election)
+        for vote in Vote.objects.filter(election=self.election):
+            proof = inclusion_proof(self.election, vote.ledger_index)
+            self.assertTrue(verify_inclusion(proof['leaf_hash'], vote.ledger_index, size, proof['path'], root))
+        self.assertEqual(
+            sorted(r['leaf_hash'] for r in receipts),
+            sorted(inclusion_proof(self.election, i)['leaf_hash'] for i in range(size)),
+        )
+
+    def test_crash_during_flush_loses_no_ballot(self):
+        self._cast(4, self.a)
+        with mock.patch('elections.utils.ingest.append_ballots', side_effect=RuntimeError('worker killed')):
+            with self.assertRaises(RuntimeError):
+                flush_pending()
+        # the whole batch rolled back: still staged, nothing counted twice
+        self.assertEqual(PendingBallot.objects.count(), 4)
+        self.assertEqual(Vote.objects.count(), 0)
+        self.assertEqual(sum(read_tally(self.election).values()), 0)
+        with mock.patch('elections.utils.ingest.Vote.objects.bulk_create', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                flush_pending()
+        self.assertEqual(ledger_head(self.election)[0], 0)
+        out = io.StringIO()
+        call_command('flush_ballots', '--once', stdout=out)
+        self.assertIn('Flushed 4 ballots', out.getvalue())
+        self.assertEqual(PendingBallot.objects.count(), 0)
+        self.assertEqual(read_tally(self.election), {f'candidate:{self.a.id}': 4})
+        self.assertTrue(audit_ledger(self.election)['match'])
+
+    def test_conclusion_drains_the_queue(self):
+        self._cast(2, self.b)
+        Election.objects.filter(pk=self.election.pk).update(end_time=timezone.now() - datetime.timedelta(minutes=1))
+        self.client.get('/')
+        result = ElectionResult.objects.get(election=self.election)
+        self.assertEqual(result.total_votes, 2)
+        self.assertEqual(result.ledger_size, 2)
+        self.assertEqual(PendingBallot.objects.count(), 0)
+
+    def test_vote_view_shows_queued_receipt(self):
+        user = User.objects.create_user('qv', password='pass')
+        VoterStatus.objects.create(user=user, election=self.election)
+        self.client.login(username='qv', password='pass')
+        r = self.client.post(f'/vote/{self.election.id}/', {'candidate_id': self.a.id})
+        self.assertContains(r, 'queued')
+        self.assertEqual(PendingBallot.objects.count(), 1)
+        r = self.client.post(f'/vote/{self.election.id}/', {'candidate_id': self.a.id})
+        self.assertContains(r, 'already voted')
+        out = io.StringIO()
+        call_command('flush_ballots', '--stats', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['depth'], 1)
+
+
+class LoadTestTests(TestCase):
+    def test_loadtest_command_reports_every_endpoint_and_cleans_up(self):
+        out = io.StringIO()
+        call_command('loadtest', '--voters', '3', '--concurrency', '1', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual((report['voters'], report['votes_completed'], report['votes_stored']), (3, 3, 3))
+        self.assertEqual(
+            set(report['endpoints']),
+            {'GET /login/', 'POST /login/', 'GET /dashboard/', 'GET /vote/<id>/', 'POST /vote/<id>/'},
+        )
+        for stats in report['endpoints'].values():
+            self.assertEqual((stats['count'], stats['errors']), (3, 0))
+            self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+            self.assertLessEqual(stats['p95_ms'], stats['p99_ms'])
+        self.assertFalse(User.objects.filter(username__startswith='lt-').exists())
+        self.assertFalse(Election.objects.exists())
+
+    def test_percentile_is_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual((percentile(values, 50), percentile(values, 95), percentile(values, 99)), (50.0, 95.0, 99.0))
+        self.assertEqual(percentile([7.0], 99), 7.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+class SiteStatsTests(TestCase):
+    def setUp(self):
+        invalidate_site_stats()
+        now = timezone.now()
+        self.users = [User.objects.create_user(username=f's{i}', password='pass') for i in range(4)]
+        self.elections = [
+            Election.objects.create(
+                title=f'E{i}', start_time=now - datetime.timedelta(hours=1),
+                end_time=now + datetime.timedelta(hours=1), status='active',
+            )
+            for i in range(3)
+        ]
+        first, second, _ = self.elections  # the third has no voter roll
+        c1 = Candidate.objects.create(election=first, name='A')
+        c2 = Candidate.objects.create(election=second, name='B')
+        for u in self.users:
+            VoterStatus.objects.create(user=u, election=first)
+        VoterStatus.objects.create(user=self.users[0], election=second)
+        cast_ballot(self.users[0], first, c1.id)
+        cast_ballot(self.users[0], second, c2.id)
+        invalidate_site_stats()
+
+    def test_aggregate_runs_one_query_and_matches_per_election_turnout(self):
+        with self.assertNumQueries(1):
+            stats = compute_site_stats()
+        # (1/4 + 1/1) / 2; the election with no voter roll is left out
+        self.assertEqual(stats, {'total_elections': 3, 'total_votes': 2, 'avg_turnout_pct': 62.5})
+
+    def test_cached_until_an_election_or_voter_roll_changes(self):
+        first = site_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(site_stats(), first)
+        self.elections[2].delete()
+        self.assertEqual(site_stats()['total_elections'], 2)
+        VoterStatus.objects.create(user=self.users[1], election=self.elections[1])
+        self.assertEqual(site_stats()['avg_turnout_pct'], 37.5)
+
+    def test_homepage_serves_cached_kpis(self):
+        self.client.get(reverse('index'))
+        with mock.patch('elections.utils.stats.compute_site_stats') as compute:
+            r = self.client.get(reverse('index'))
+        compute.assert_not_called()
+        self.assertEqual((r.context['total_elections'], r.context['total_votes']), (3, 2))
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.superuser = User.objects.create_superuser('root', 'root@example.com', 'pass')
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='Ending', start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=2), status='active',
+        )
+        candidate = Candidate.objects.create(election=self.election, name='A')
+        self.voters = [User.objects.create_user(username=f'd{i}', password='pass') for i in range(4)]
+        for u in self.voters:
+            VoterStatus.objects.create(user=u, election=self.election)
+        cast_ballot(self.voters[0], self.election, candidate.id)
+        self.client.force_login(self.superuser)
+
+    def test_dashboard_figures(self):
+        r = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(r.context['counts_by_status'], {'pending': 0, 'active': 1, 'concluded': 0})
+        self.assertEqual((r.context['votes_today'], r.context['avg_turnout_pct']), (1, 25.0))
+        self.assertEqual(r.context['voters_total'], 5)  # the superuser's profile has the default voter role
+        [ending] = r.context['ending_soon']
+        self.assertEqual((ending.eligible_count, ending.votes_cast, ending.turnout_pct, ending.low_turnout), (4, 1, 25.0, True))
+
+    def test_stale_kpis_are_served_while_refreshing_in_the_background(self):
+        self.client.get(reverse('admin_dashboard'))
+        Election.objects.create(
+            title='New', start_time=timezone.now() + datetime.timedelta(days=1),
+            end_time=timezone.now() + datetime.timedelta(days=2), status='pending',
+        )
+        executor = mock.Mock()
+        with mock.patch('elections.utils.stats.kpi_executor', return_value=executor):
+            r = self.client.get(reverse('admin_dashboard'))
+            self.assertEqual(r.context['total_elections'], 1)
+            executor.submit.assert_not_called()
+            with override_settings(DASHBOARD_KPI_TTL=-1):
+                r = self.client.get(reverse('admin_dashboard'))
+                self.client.get(reverse('admin_dashboard'))
+        # still the cached value, and one refresh queued for both stale requests
+        self.assertEqual(r.context['total_elections'], 1)
+        executor.submit.assert_called_once_with(refresh_dashboard_kpis, None, True)
+        refresh_dashboard_kpis(None)
+        self.assertEqual(self.client.get(reverse('admin_dashboard')).context['total_elections'], 2)
+
+    def test_election_list_shows_turnout_paginated(self):
+        url = reverse('admin_election_list', args=['active'])
+        r = self.client.get(url)
+        [e] = r.context['elections']
+        self.assertEqual((e.eligible_count, e.votes_cast, e.candidates_count, e.turnout_pct), (4, 1, 1, 25.0))
+        self.assertContains(r, 'Votes: 1 / Eligible: 4')
+        now = timezone.now()
+        Election.objects.bulk_create([
+            Election(title=f'Old {i}', start_time=now - datetime.timedelta(days=2), end_time=now - datetime.timedelta(days=1),
+                     status='concluded')
+            for i in range(ELECTIONS_PER_PAGE + 1)
+        ])
+        r = self.client.get(reverse('admin_election_list', args=['concluded']), {'page': 2})
+        self.assertEqual(len(r.context['elections']), 1)
+        self.assertContains(r, 'Page 2 of 2')
+
+
+class ActivityTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='Busy', start_time=now - datetime.timedelta(hours=3),
+            end_time=now + datetime.timedelta(hours=1), status='active',
+        )
+        self.candidate = Candidate.objects.create(election=self.election, name='A')
+        self.voters = [User.objects.create_user(username=f'a{i}') for i in range(4)]
+        for u in self.voters:
+            VoterStatus.objects.create(user=u, election=self.election)
+
+    def test_ballots_roll_up_per_hour_in_both_ingest_modes(self):
+        cast_ballot(self.voters[0], self.election, self.candidate.id)
+        with override_settings(BALLOT_INGEST_MODE='queue'):
+            cast_ballot(self.voters[1], self.election, self.candidate.id)
+            cast_ballot(self.voters[2], self.election, self.candidate.id)
+            flush_pending()
+        [bucket] = VoteActivity.objects.filter(election=self.election)
+        self.assertEqual((bucket.hour, bucket.count), (hour_of(timezone.now()), 3))
+
+    def test_dashboard_reads_the_rollup_not_the_ballots(self):
+        cast_ballot(self.voters[0], self.election, self.candidate.id)
+        with CaptureQueriesContext(connection) as ctx:
+            kpis = compute_dashboard_kpis()
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "elections_vote"' in q['sql']])
+        self.assertEqual(kpis['votes_today'], 1)
+        self.assertEqual(json.loads(kpis['activity_values_json'])[-1], 1)
+
+    def test_rebuild_and_turnout_series(self):
+        for u in self.voters[:3]:
+            cast_ballot(u, self.election, self.candidate.id)
+        # two of the ballots were cast two hours earlier
+        earlier = timezone.now() - datetime.timedelta(hours=2)
+        Vote.objects.filter(pk__in=Vote.objects.order_by('id').values('pk')[:2]).update(timestamp=earlier)
+        out = io.StringIO()
+        call_command('rebuild_activity', stdout=out)
+        self.assertIn('2 hourly bucket(s) rebuilt', out.getvalue())
+        self.assertEqual(
+            list(VoteActivity.objects.order_by('hour').values_list('hour', 'count')),
+            [(hour_of(earlier), 2), (hour_of(timezone.now()), 1)],
+        )
+        self.election.refresh_from_db()
+        labels, values = turnout_series(self.election)
+        self.assertEqual(values, [50.0, 50.0, 75.0])
+        self.assertEqual(len(labels), 3)
+
+
+class TurnoutStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.owner.profile.role = 'admin'
+        self.owner.profile.save()
+        self.election = Election.objects.create(
+            title='Live', start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1), status='active', created_by=self.owner,
+        )
+        self.candidate = Candidate.objects.create(election=self.election, name='A')
+        self.voters = [User.objects.create_user(username=f'l{i}') for i in range(4)]
+        for u in self.voters:
+            VoterStatus.objects.create(user=u, election=self.election)
+
+    def _events(self, chunks):
+        return [
+            {k: v for k, v in (line.split(': ', 1) for line in chunk.strip().splitlines())}
+            for chunk in chunks if chunk.startswith(('event', 'id'))
+        ]
+
+    @override_settings(TURNOUT_STREAM_INTERVAL=0)
+    def test_pushes_deltas_until_the_election_concludes(self):
+        # under WSGI each response is one event; EventSource reconnects with Last-Event-ID
+        chunks = list(stream_turnout(self.election.id))
+        self.assertTrue(chunks[0].startswith('retry:'))
+        [first] = self._events(chunks)
+        self.assertEqual((first['event'], json.loads(first['data'])['votes_cast']), ('turnout', 0))
+        cast_ballot(self.voters[0], self.election, self.candidate.id)
+        cast_ballot(self.voters[1], self.election, self.candidate.id)
+        [update] = self._events(stream_turnout(self.election.id, int(first['id'])))
+        data = json.loads(update['data'])
+        self.assertEqual((update['id'], data['delta'], data['turnout_pct'], data['votes_this_hour']), ('2', 2, 50.0, 2))
+        Election.objects.filter(pk=self.election.pk).update(status='concluded')
+        events = self._events(stream_turnout(self.election.id, 2))
+        self.assertEqual([e['event'] for e in events], ['turnout', 'end'])
+
+    @override_settings(TURNOUT_STREAM_INTERVAL=0)
+    async def test_asgi_stream_stays_open_and_pushes_changes(self):
+        stream = astream_turnout(self.election.id)
+        self.assertTrue((await anext(stream)).startswith('retry:'))
+        [first] = self._events([await anext(stream)])
+        self.assertEqual(json.loads(first['data'])['votes_cast'], 0)
+        await sync_to_async(cast_ballot)(self.voters[0], self.election, self.candidate.id)
+        [update] = self._events([await anext(stream)])
+        self.assertEqual(json.loads(update['data'])['delta'], 1)
+        await Election.objects.filter(pk=self.election.pk).aupdate(status='concluded')
+        events = self._events([chunk async for chunk in stream])
+        self.assertEqual([e['event'] for e in events], ['turnout', 'end'])
+
+    def test_one_computation_per_interval_is_shared(self):
+        with override_settings(TURNOUT_STREAM_INTERVAL=60):
+            first = turnout_snapshot(self.election.id)
+            cast_ballot(self.voters[0], self.election, self.candidate.id)
+            with self.assertNumQueries(0):
+                for _ in range(5):
+                    self.assertEqual(turnout_snapshot(self.election.id), first)
+        with override_settings(TURNOUT_STREAM_INTERVAL=0):
+            self.assertEqual(turnout_snapshot(self.election.id)['votes_cast'], 1)
+
+    def test_endpoint_is_for_the_owner_and_resumes_from_last_event_id(self):
+        Election.objects.filter(pk=self.election.pk).update(status='concluded', votes_cast=3)
+        other = User.objects.create_superuser('root', 'root@example.com', 'pass')
+        stranger = User.objects.create_user('stranger', password='pass')
+        stranger.profile.role = 'admin'
+        stranger.profile.save()
+        self.client.force_login(stranger)
+        self.assertEqual(self.client.get(reverse('turnout_stream', args=[self.election.id])).status_code, 403)
+        self.client.force_login(other)
+        r = self.client.get(reverse('turnout_stream', args=[self.election.id]), HTTP_LAST_EVENT_ID='1')
+        self.assertEqual(r['Content-Type'], 'text/event-stream')
+        events = self._events(chunk.decode() for chunk in r.streaming_content)
+        self.assertEqual([e['event'] for e in events], ['turnout', 'end'])
+        self.assertEqual(json.loads(events[0]['data'])['delta'], 2)
+
+    async def test_served_asynchronously_under_asgi(self):
+        await Election.objects.filter(pk=self.election.pk).aupdate(status='concluded')
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        r = await client.get(reverse('turnout_stream', args=[self.election.id]))
+        self.assertTrue(r.is_async)
+        chunks = [chunk.decode() async for chunk in r.streaming_content]
+        self.assertEqual([e['event'] for e in self._events(chunks)], ['turnout', 'end'])
+
+
+class RoleTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.admin = User.objects.create_user('boss', password='pass')
+        self.admin.profile.role = 'admin'
+        self.admin.profile.save()
+        self.election = Election.objects.create(
+            title='Mine', start_time=now, end_time=now + datetime.timedelta(hours=1), created_by=self.admin,
+        )
+
+    def test_sessions_from_the_old_backend_stay_logged_in(self):
+        self.client.force_login(self.admin, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('admin_dashboard')).status_code, 200)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'elections.backends.ProfileModelBackend')
+
+    async def test_old_backend_sessions_stay_logged_in_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual((await client.get(reverse('voter_dashboard'))).status_code, 200)
+
+    def _profile_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries if '"elections_profile"' in q['sql']]
+
+    def test_one_profile_lookup_per_request(self):
+        self.client.force_login(self.admin)
+        # index scopes three lists by role; the candidates page checks admin and owner; both render is_admin
+        for url in (reverse('index'), reverse('list_candidates', args=[self.election.id])):
+            [sql] = self._profile_queries(url)
+            # joined to the user loaded from the session
+            self.assertIn('FROM "auth_user"', sql)
+            r = self.client.get(url)
+            self.assertEqual((r.context['role'].name, r.context['is_admin']), ('admin', True))
+
+    def test_roles(self):
+        voter = User.objects.create_user('v', password='pass')
+        staff = User.objects.create_user('s', password='pass', is_staff=True)
+        root = User.objects.create_superuser('root', 'root@example.com', 'pass')
+        Profile.objects.filter(user=voter).delete()
+        roles = {u.username: resolve_role(User.objects.get(pk=u.pk)) for u in (voter, staff, root, self.admin)}
+        self.assertEqual(
+            {name: (r.name, r.is_admin, r.is_superuser) for name, r in roles.items()},
+            {'v': ('voter', False, False), 's': ('voter', True, False), 'root': ('superuser', True, True),
+             'boss': ('admin', True, False)},
+        )
+        self.assertFalse(resolve_role(None).is_authenticated)
+
+
+class BallotLinkTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='Linked', start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1), status='active',
+        )
+        self.candidate = Candidate.objects.create(election=self.election, name='A')
+        self.voter = User.objects.create_user('linked', 'linked@example.com', 'pass')
+        self.status = VoterStatus.objects.create(user=self.voter, election=self.election)
+
+    def _link(self, rotate=True):
+        [[(username, email, token)]] = issue_ballot_links(self.election, rotate=rotate)
+        return reverse('ballot_link', args=[token])
+
+    def test_link_opens_the_ballot_once_without_logging_in(self):
+        url = self._link()
+        self.assertContains(self.client.get(url), 'Vote: Linked')
+        r = self.client.post(url, {'candidate_id': self.candidate.id})
+        self.assertContains(r, 'Verify inclusion')
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+        self.status.refresh_from_db()
+        self.assertEqual((self.status.has_voted, self.status.ballot_nonce), (True, ''))
+        self.assertEqual(Vote.objects.filter(election=self.election).count(), 1)
+        self.assertContains(self.client.post(url, {'candidate_id': self.candidate.id}), 'already voted')
+
+    def test_reissued_revoked_expired_and_forged_links_are_refused(self):
+        first = self._link()
+        second = self._link()
+        self.assertEqual(self.client.get(first).status_code, 410)
+        self.assertEqual(self.client.get(second).status_code, 200)
+        with override_settings(BALLOT_LINK_MAX_AGE=-1):
+            self.assertContains(self.client.get(second), 'expired', status_code=410)
+        self.assertEqual(self.client.get(reverse('ballot_link', args=['not-a-token'])).status_code, 400)
+        # correctly signed, but not the nonce on the roll (a guessed one, a revoked one) or no such roll entry
+        for status_id, nonce in ((self.status.id, 'guessed'), (self.status.id, ''), (self.status.id + 1000, 'x')):
+            url = reverse('ballot_link', args=[make_ballot_token(status_id, nonce)])
+            self.assertEqual(self.client.get(url).status_code, 410)
+        out = io.StringIO()
+        call_command('issue_ballot_links', str(self.election.id), '--revoke', stdout=out)
+        self.assertIn('1 link(s) revoked', out.getvalue())
+        self.assertEqual(self.client.get(second).status_code, 410)
+
+    def test_nonce_is_claimed_with_has_voted(self):
+        self._link()
+        with self.assertRaises(InvalidBallotLink):
+            cast_ballot(self.voter, self.election, self.candidate.id, nonce='stale')
+        self.status.refresh_from_db()
+        self.assertFalse(self.status.has_voted)
+        # voting after logging in spends the outstanding link too
+        cast_ballot(self.voter, self.election, self.candidate.id)
+        self.status.refresh_from_db()
+        self.assertEqual(self.status.ballot_nonce, '')
+        with self.assertRaises(AlreadyVoted):
+            cast_ballot(self.voter, self.election, self.candidate.id, nonce='stale')
+        # a revoked (empty) nonce never matches
+        with self.assertRaises(InvalidBallotLink):
+            cast_ballot(self.voter, self.election, self.candidate.id, nonce='')
+
+    def test_command_writes_and_emails_links(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        path = os.path.join(tmp, 'links.csv')
+        out = io.StringIO()
+        call_command('issue_ballot_links', str(self.election.id), '--base-url', 'https://vote.example.org/',
+                     '--output', path, '--email', stdout=out)
+        self.assertIn('1 link(s) issued, 1 emailed', out.getvalue())
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        with open(path, newline='') as fh:
+            [row] = list(csv.DictReader(fh))
+        self.assertTrue(row['url'].startswith('https://vote.example.org/ballot/'))
+        [email] = mail.outbox
+        self.assertIn(row['url'], email.body)
+        self.assertEqual(self.client.get(row['url'].removeprefix('https://vote.example.org')).status_code, 200)
+
+    def test_outstanding_links_survive_reruns_and_aborted_runs(self):
+        first = self._link()
+        # without rotate, a voter holding a link is skipped and the link stays valid
+        self.assertEqual(list(issue_ballot_links(self.election)), [])
+        self.assertEqual(self.client.get(first).status_code, 200)
+        late = User.objects.create_user('late', 'late@example.com', 'pass')
+        late_status = VoterStatus.objects.create(user=late, election=self.election)
+        # a run that dies before its batch is delivered saves no nonces
+        links = issue_ballot_links(self.election, rotate=True)
+        self.assertEqual(len(next(links)), 2)
+        links.close()
+        self.assertEqual(self.client.get(first).status_code, 200)
+        late_status.refresh_from_db()
+        self.assertEqual(late_status.ballot_nonce, '')
+        # and the next run picks up the voter it missed
+        [[(username, email, token)]] = issue_ballot_links(self.election)
+        self.assertEqual(username, 'late')
+        self.assertEqual(self.client.get(reverse('ballot_link', args=[token])).status_code, 200)
+        self.assertEqual(self.client.get(first).status_code, 200)
+
+    def test_command_saves_nonces_after_delivery(self):
+        with mock.patch('elections.management.commands.issue_ballot_links.send_mass_mail', side_effect=OSError('smtp down')):
+            with self.assertRaises(OSError):
+                call_command('issue_ballot_links', str(self.election.id), '--base-url', 'https://vote.example.org',
+                             '--email', stdout=io.StringIO())
+        self.status.refresh_from_db()
+        self.assertEqual(self.status.ballot_nonce, '')
+        out = io.StringIO()
+        call_command('issue_ballot_links', str(self.election.id), '--base-url', 'https://vote.example.org',
+                     '--email', stdout=out)
+        self.assertIn('1 link(s) issued, 1 emailed', out.getvalue())
+        call_command('issue_ballot_links', str(self.election.id), '--base-url', 'https://vote.example.org',
+                     '--email', stdout=out)
+        self.assertIn('0 link(s) issued, 0 emailed', out.getvalue())
+        call_command('issue_ballot_links', str(self.election.id), '--base-url', 'https://vote.example.org',
+                     '--email', '--rotate', stdout=out)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(self.client.get(mail.outbox[0].body.split()[-1].removeprefix('https://vote.example.org')).status_code, 410)
+        self.assertEqual(self.client.get(mail.outbox[1].body.split()[-1].removeprefix('https://vote.example.org')).status_code, 200)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='Counted', start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1), status='active',
+        )
+        self.a = Candidate.objects.create(election=self.election, name='A')
+        self.b = Candidate.objects.create(election=self.election, name='B')
+        self.users = [User.objects.create_user(username=f'c{i}', password='pass') for i in range(3)]
+        for u in self.users:
+            VoterStatus.objects.create(user=u, election=self.election)
+
+    def counters(self):
+        self.election.refresh_from_db()
+        return self.election.eligible_count, self.election.votes_cast, self.election.candidates_count
+
+    def test_counters_follow_voters_ballots_and_candidates(self):
+        self.assertEqual(self.counters(), (3, 0, 2))
+        cast_ballot(self.users[0], self.election, self.a.id)
+        with override_settings(BALLOT_INGEST_MODE='queue'):
+            cast_ballot(self.users[1], self.election, self.a.id)
+        self.assertEqual(self.counters(), (3, 1, 2))  # the queued ballot is not stored yet
+        flush_pending()
+        self.assertEqual(self.counters(), (3, 2, 2))
+        self.b.delete()
+        VoterStatus.objects.filter(user=self.users[2]).delete()
+        self.assertEqual(self.counters(), (2, 2, 1))
+        self.assertEqual(recount(), [])
+
+    def test_saving_a_stale_election_keeps_the_counters(self):
+        stale = Election.objects.get(pk=self.election.pk)
+        for user in self.users:
+            cast_ballot(user, self.election, self.a.id)
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.counters(), (3, 3, 2))
+        self.assertEqual(self.election.title, 'Renamed')
+
+    def test_recount_command_repairs_drift(self):
+        Election.objects.filter(pk=self.election.pk).update(votes_cast=7, candidates_count=0)
+        with self.assertRaises(CommandError):
+            call_command('recount', '--check', stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('recount', self.election.id, stdout=out)
+        self.assertIn('1 election(s) repaired', out.getvalue())
+        self.assertEqual(self.counters(), (3, 0, 2))
+
+
+class VoterImportTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.admin = User.objects.create_superuser('root', 'root@example.com', 'pass')
+        self.election = Election.objects.create(
+            title='Roll', start_time=now, end_time=now + datetime.timedelta(hours=1), status='pending',
+        )
+        self.users = User.objects.bulk_create([User(username=f'v{i}') for i in range(40)])
+        VoterStatus.objects.create(user=self.users[0], election=self.election)
+        # uploaded rolls go to a scratch directory
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        setting = override_settings(VOTER_IMPORT_DIR=tmp)
+        setting.enable()
+        self.addCleanup(setting.disable)
+
+    def _csv(self, names):
+        return io.StringIO('username\n' + ''.join(f'{n}\n' for n in names))
+
+    def test_counts_and_rejected_rows(self):
+        names = ['v0', 'v1', 'v2', 'v1', 'ghost', '""', 'v3']
+        report = import_voters(self.election, self._csv(names), chunk_size=2)
+        self.assertEqual(
+            (report.rows, report.imported, report.duplicate, report.unknown), (7, 3, 2, 2),
+        )
+        self.assertEqual(
+            list(report.rejected_rows.order_by('line').values_list('line', 'username', 'reason')),
+            [(6, 'ghost', 'unknown user'), (7, '', 'missing username')],
+        )
+        self.election.refresh_from_db()
+        self.assertEqual(self.election.eligible_count, 4)
+        self.assertEqual(VoterStatus.objects.filter(election=self.election).count(), 4)
+
+    def test_queries_do_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            import_voters(self.election, self._csv([f'v{i}' for i in range(1, 5)]))
+        with CaptureQueriesContext(connection) as large:
+            import_voters(self.election, self._csv([f'v{i}' for i in range(5, 40)]))
+        self.assertEqual(len(small), len(large))
+
+    def test_voters_added_concurrently_are_counted_once(self):
+        real = VoterStatus.objects.bulk_create
+
+        def racing(objs, **kwargs):
+            # another import puts v1 on the roll between the lookup and the insert
+            VoterStatus.objects.create(user=self.users[1], election=self.election)
+            return real(objs, **kwargs)
+
+        with mock.patch.object(VoterStatus.objects, 'bulk_create', side_effect=racing):
+            import_voters(self.election, self._csv(['v1', 'v2']))
+        self.election.refresh_from_db()
+        self.assertEqual(self.election.eligible_count, 3)
+        self.assertEqual(VoterStatus.objects.filter(election=self.election).count(), 3)
+
+    def test_upload_reports_counts_and_serves_rejected_rows(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('voters.csv', b'\xef\xbb\xbfusername\r\nv5\r\nnobody\r\n', content_type='text/csv')
+        r = self.client.post(reverse('upload_voters', args=[self.election.id]), {'csv_file': upload}, follow=True)
+        self.assertContains(r, 'Imported 1 voters')
+        self.assertContains(r, '1 unknown')
+        report = VoterImport.objects.get()
+        self.assertEqual(report.status, 'done')
+        self.assertFalse(report.csv_file)
+        r = self.client.get(reverse('voter_import_rejected', args=[report.id]))
+        self.assertEqual(r['Content-Type'], 'text/csv')
+        self.assertEqual(b''.join(r.streaming_content).decode().splitlines(), ['line,username,reason', '3,nobody,unknown user'])
+
+
+    def _upload(self, names):
+        return SimpleUploadedFile('voters.csv', ('username\n' + ''.join(f'{n}\n' for n in names)).encode(), content_type='text/csv')
+
+    def test_large_upload_is_queued_for_the_worker(self):
+        self.client.force_login(self.admin)
+        with override_settings(VOTER_IMPORT_INLINE_BYTES=10):
+            r = self.client.post(reverse('upload_voters', args=[self.election.id]), {'csv_file': self._upload(['v1', 'v2', 'ghost'])})
+        job = VoterImport.objects.get()
+        self.assertRedirects(r, reverse('voter_import_status', args=[job.id]))
+        status = self.client.get(reverse('voter_import_status', args=[job.id]), {'format': 'json'}).json()
+        self.assertEqual((status['status'], status['rows'], status['progress_pct']), ('queued', 0, 0))
+        self.assertContains(self.client.get(r.url), 'waiting for the import worker')
+
+        out = io.StringIO()
+        call_command('run_import_jobs', '--once', stdout=out)
+        self.assertIn(f'Import {job.id}: 3 rows, 2 imported, 0 duplicate, 1 unknown', out.getvalue())
+        status = self.client.get(reverse('voter_import_status', args=[job.id]), {'format': 'json'}).json()
+        self.assertEqual((status['status'], status['total_rows'], status['progress_pct']), ('done', 3, 100))
+        job.refresh_from_db()
+        self.assertFalse(job.csv_file)
+        self.assertEqual(os.listdir(os.path.join(settings.VOTER_IMPORT_DIR, job.created_at.strftime('%Y/%m'))), [])
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_job_resumes_after_its_last_checkpoint(self):
+        job = create_import_job(self.election, self._upload([f'v{i}' for i in range(1, 11)]), created_by=self.admin)
+        self.assertEqual(claim_next_job().pk, job.pk)
+        # the worker died after committing the first chunk of four rows
+        import_voters(self.election, self._csv([f'v{i}' for i in range(1, 5)]))
+        stale = timezone.now() - datetime.timedelta(seconds=settings.VOTER_IMPORT_STALE_SECONDS + 1)
+        VoterImport.objects.filter(pk=job.pk).update(rows=4, imported=4, total_rows=10, updated_at=stale)
+        VoterImport.objects.exclude(pk=job.pk).delete()
+
+        job = claim_next_job()
+        self.assertEqual(job.progress_pct, 40.0)
+        with CaptureQueriesContext(connection) as ctx:
+            run_import_job(job, chunk_size=4)
+        self.assertEqual((job.status, job.rows, job.imported, job.duplicate), ('done', 10, 10, 0))
+        self.assertEqual(VoterStatus.objects.filter(election=self.election).count(), 11)
+        self.election.refresh_from_db()
+        self.assertEqual(self.election.eligible_count, 11)
+        # two resumed chunks, each checkpointed with its rows
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('INSERT') and '"elections_voterstatus"' in q['sql']]), 2)
+
+    def test_running_job_is_not_claimed_twice(self):
+        job = create_import_job(self.election, self._upload(['v1']), created_by=self.admin)
+        self.assertEqual(claim_next_job().pk, job.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_failed_job_records_the_error(self):
+        job = create_import_job(self.election, self._upload(['v1']), created_by=self.admin)
+        job.csv_file.delete(save=False)
+        job = run_import_job(claim_next_job())
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('FileNotFoundError', VoterImport.objects.get(pk=job.pk).error)
+
+
+# one-time passwords are hashed with a fast hasher here; forked pool workers inherit it
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ProvisioningTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(
+            title='Onboarding', start_time=now, end_time=now + datetime.timedelta(hours=1), status='pending',
+        )
+        self.existing = User.objects.create_user('old', password='keep')
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def _write(self, text):
+        path = os.path.join(self.tmp, 'voters.csv')
+        with open(path, 'w', newline='') as fh:
+            fh.write(text)
+        return path
+
+    def test_command_creates_accounts_and_links_them(self):
+        path = self._write(
+            'username,email,first_name,phone\n'
+            'ann,Ann@EXAMPLE.com,Ann,555\nbo,,,\nold,,,\nann,,,\nbad name!,,,\n,,,\ncy,,,\n'
+        )
+        creds = os.path.join(self.tmp, 'creds.csv')
+        out = io.StringIO()
+        call_command('provision_voters', path, '--election', str(self.election.id), '--credentials', creds,
+                     '--workers', '2', '--batch-size', '2', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            {k: report[k] for k in ('rows', 'created', 'existing', 'duplicate', 'invalid', 'linked')},
+            {'rows': 7, 'created': 3, 'existing': 1, 'duplicate': 1, 'invalid': 2, 'linked': 4},
+        )
+        ann = User.objects.select_related('profile').get(username='ann')
+        self.assertEqual((ann.email, ann.first_name, ann.profile.phone), ('Ann@example.com', 'Ann', '555'))
+        self.assertEqual((ann.profile.role, ann.profile.is_confirmed, ann.profile.is_approved), ('voter', True, True))
+        self.election.refresh_from_db()
+        self.assertEqual(self.election.eligible_count, 4)
+        self.assertEqual(VoterStatus.objects.filter(election=self.election).count(), 4)
+
+        self.assertEqual(os.stat(creds).st_mode & 0o777, 0o600)
+        with open(creds, newline='') as fh:
+            rows = list(csv.reader(fh))
+        self.assertEqual([r[0] for r in rows], ['username', 'ann', 'bo', 'cy'])
+        self.assertTrue(self.client.login(username='bo', password=rows[2][1]))
+        # an existing account keeps its password
+        self.assertTrue(self.client.login(username='old', password='keep'))
+
+    def test_queries_do_not_grow_with_rows(self):
+        def run(names):
+            with CaptureQueriesContext(connection) as ctx:
+                provision_voters(io.StringIO('username\n' + ''.join(f'{n}\n' for n in names)),
+                                 election=self.election, passwords=False, batch_size=1000)
+            return len(ctx)
+        self.assertEqual(run([f'a{i}' for i in range(3)]), run([f'b{i}' for i in range(90)]))
+        self.assertFalse(User.objects.get(username='b1').has_usable_password())
+
+    def test_passwords_need_a_credentials_file(self):
+        with self.assertRaisesMessage(CommandError, '--credentials'):
+            call_command('provision_voters', self._write('username\nann\n'))
+        self.assertFalse(User.objects.filter(username='ann').exists())
+
+
+class ScheduleTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pass')
+        self.starting = Election.objects.create(
+            title='Starting', start_time=now - datetime.timedelta(minutes=1),
+            end_time=now + datetime.timedelta(hours=1), status='pending',
+        )
+        self.ending = Election.objects.create(
+            title='Ending', start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=2), status='active', created_by=self.owner,
+        )
+        self.a = Candidate.objects.create(election=self.ending, name='A')
+        VoterStatus.objects.create(user=self.owner, election=self.ending)
+        cast_ballot(self.owner, self.ending, self.a.id)
+
+    def test_transitions_and_conclude_hooks_run_once(self):
+        later = timezone.now() + datetime.timedelta(hours=3)
+        hook = mock.Mock()
+        election_concluded.connect(hook)
+        self.addCleanup(election_concluded.disconnect, hook)
+        self.assertEqual(apply_due_transitions(later), {'activated': 0, 'reverted': 0, 'concluded': 2})
+        self.assertEqual(apply_due_transitions(later), {'activated': 0, 'reverted': 0, 'concluded': 0})
+        self.assertEqual(hook.call_count, 2)
+        self.assertEqual(ElectionResult.objects.get(election=self.ending).tally, {f'candidate:{self.a.id}': 1})
+        [email] = mail.outbox
+        self.assertEqual((email.to, email.subject), (['owner@example.com'], 'Results available: Ending'))
+
+    def test_reads_do_not_write_until_a_transition_is_due(self):
+        self.client.get('/')
+        self.starting.refresh_from_db()
+        self.assertEqual(self.starting.status, 'active')
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/')
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "elections_election"')])
+        self.assertFalse([q for q in ctx.captured_queries if 'MIN(' in q['sql']])
+        # once the cached next transition passes, the next request applies it
+        with mock.patch('elections.utils.schedule.timezone.now', return_value=self.ending.end_time):
+            self.client.get('/')
+        self.ending.refresh_from_db()
+        self.assertEqual(self.ending.status, 'concluded')
+
+    def test_scheduler_command_once(self):
+        out = io.StringIO()
+        call_command('run_scheduler', '--once', stdout=out)
+        self.assertIn('1 activated, 0 back to pending, 0 concluded', out.getvalue())
+        self.assertEqual(next_transition(), self.starting.end_time)
+
+
+class ConcurrentCastTests(TransactionTestCase):
+    def test_parallel_submissions_store_exactly_one_ballot(self):
+        from django.db import OperationalError, connection
+        user = User.objects.create_user('racer', password='pass')
+        now = timezone.now()
+        election = Election.objects.create(
+            title='Race',
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            status='active',
+        )
+        candidate = Candidate.objects.create(election=election, name='Rae')
+        VoterStatus.objects.create(user=user, election=election)
+        barrier = threading.Barrier(8)
+        outcomes = []
+
+        def submit():
+            try:
+                barrier.wait()
+                for _ in range(50):
+                    try:
+                        cast_ballot(user, election, candidate.id, [candidate.id])
+                        outcomes.append('cast')
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting; retry
+                        continue
+                    except AlreadyVoted:
+                        outcomes.append('refused')
+                        return
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(outcomes.count('cast'), 1)
+        self.assertEqual(outcomes.count('refused'), 7)
+        self.assertEqual(Vote.objects.filter(election=election).count(), 1)
+        self.assertEqual(read_tally(election), {f'candidate:{candidate.id}': 1})
+        self.assertEqual(ledger_head(election)[0], 1)
+
+
+class BudgetCoverageTests(TestCase):
+    def test_every_url_name_has_a_budget(self):
+        from elections.urls import urlpatterns
+        self.assertEqual({p.name for p in urlpatterns}, set(BUDGETS))
+
+
+POOL_VOTERS = 20
+ELIGIBLE_PER_ELECTION = 5
+
+
+def _seed_scale(n: int) -> dict:
+    """Seed ``n`` elections with candidates, eligible voters and ballots; return fixture ids.
+
+    Mostly concluded history with a handful of active and pending elections,
+    like a long-running deployment. The ``active`` and ``concluded`` target
+    elections have ballots cast through :func:`cast_ballot`, so they carry a
+    tally and a ledger.
+    """
+    now = timezone.now()
+    superuser = User.objects.create_superuser('budget-super', 'super@example.com', 'pass')
+    admin = User.objects.create_user('budget-admin', password='pass')
+    # through the cached profile: saving the user (e.g. on login) saves it back
+    admin.profile.role = 'admin'
+    admin.profile.save()
+    voter = User.objects.create_user('budget-voter', password='pass')
+    pool = User.objects.bulk_create([User(username=f'budget-pool-{i}') for i in range(POOL_VOTERS)])
+    Profile.objects.bulk_create([Profile(user=u, is_confirmed=True) for u in pool])
+
+    live = min(5, max(1, n // 3))
+    elections = []
+    for i in range(n):
+        if i < live:
+            status, start, end = 'active', now - datetime.timedelta(hours=1), now + datetime.timedelta(days=1)
+        elif i < 2 * live:
+            status, start, end = 'pending', now + datetime.timedelta(days=1), now + datetime.timedelta(days=2)
+        else:
+            status, start, end = 'concluded', now - datetime.timedelta(days=30, hours=i), now - datetime.timedelta(days=29, hours=i)
+        elections.append(Election(
+            title=f'Budget election {i}', status=status, start_time=start, end_time=end,
+            created_by=admin if i % 2 else None,
+        ))
+    elections = Election.objects.bulk_create(elections)
+    candidates = Candidate.objects.bulk_create(
+        [Candidate(election=e, name=f'Candidate {j}') for e in elections for j in range(2)]
+    )
+    statuses = []
+    votes = []
+    for i, e in enumerate(elections):
+        eligible = [pool[(i + k) % POOL_VOTERS] for k in range(ELIGIBLE_PER_ELECTION)]
+        voted = eligible[:2] if e.status == 'concluded' else []
+        statuses.extend(VoterStatus(user=u, election=e, has_voted=u in voted) for u in eligible)
+        votes.extend(
+            Vote(election=e, encrypted_vote_data=encrypt_vote(f'candidate:{candidates[2 * i].id}', associated_data=str(e.id)))
+            for _ in voted
+        )
+        if e.status == 'active':
+            statuses.append(VoterStatus(user=voter, election=e))
+    VoterStatus.objects.bulk_create(statuses)
+    Vote.objects.bulk_create(votes)
+
+    active = elections[0]
+    for u in pool[:2]:
+        cast_ballot(u, active, candidates[0].id)
+    # a concluded target with a tally, a ledger and a published snapshot
+    target = Election.objects.create(
+        title='Budget concluded', status='active', start_time=now - datetime.timedelta(hours=2), end_time=now + datetime.timedelta(hours=1),
+    )
+    target_candidates = Candidate.objects.bulk_create([Candidate(election=target, name=f'T{j}') for j in range(2)])
+    VoterStatus.objects.bulk_create([VoterStatus(user=u, election=target) for u in pool[:3]] + [VoterStatus(user=voter, election=target)])
+    for u in pool[:3]:
+        cast_ballot(u, target, target_candidates[0].id)
+    Election.objects.filter(pk=target.pk).update(status='concluded', end_time=now - datetime.timedelta(minutes=1))
+    target.refresh_from_db()
+    build_snapshot(target)
+    # the bulk inserts above skip the counter and activity updates
+    recount()
+    rebuild_activity()
+    VoterStatus.objects.filter(user=voter, election=active).update(ballot_nonce='budget')
+    return {
+        'users': {'superuser': superuser, 'admin': admin, 'voter': voter},
+        'ballot_token': make_ballot_token(VoterStatus.objects.get(user=voter, election=active).id, 'budget'),
+        'active': active.id,
+        'active_candidate': candidates[0].id,
+        'concluded': target.id,
+        'pending_profile': Profile.objects.get(user=pool[0]).id,
+        'voter_import': RejectedVoterRow.objects.create(
+            voter_import=VoterImport.objects.create(
+                election=active, created_by=superuser, status='done', total_rows=1, rows=1, unknown=1,
+            ),
+            line=2, username='ghost', reason='unknown user',
+        ).voter_import_id,
+    }
+
+
+def _budget_url(name: str, budget: Budget, fixture: dict) -> str:
+    return reverse(name, kwargs={
+        k: fixture[v[1:]] if isinstance(v, str) and v.startswith('@') else v for k, v in budget.kwargs.items()
+    })
+
+
+def _measure(client, url: str, runs: int = 3) -> tuple[int, float, int]:
+    """Request ``url`` once to warm caches, then ``runs`` times.
+
+    Returns ``(queries of the first measured run, fastest run in ms, status)``.
+    Streaming responses are consumed inside the measurement.
+    """
+    client.get(url)
+    queries = None
+    best = None
+    status = None
+    for _ in range(runs):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            resp = client.get(url)
+            if resp.streaming:
+                b''.join(resp.streaming_content)
+            elapsed = (time.perf_counter() - start) * 1000
+        if queries is None:
+            queries, status = len(ctx.captured_queries), resp.status_code
+        best = elapsed if best is None else min(best, elapsed)
+    return queries, best, status
+
+
+class _BudgetTestsMixin:
+    """Request every budgeted URL against ``scale`` seeded elections (see elections.budgets).
+
+    Query budgets are always checked; latency ceilings only with ``BUDGET_LATENCY`` set.
+    """
+    scale = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixture = _seed_scale(cls.scale)
+
+    def check_budget(self, name):
+        budget = BUDGETS[name]
+        client = Client()
+        if budget.user != 'anonymous':
+            client.force_login(self.fixture['users'][budget.user])
+        url = _budget_url(name, budget, self.fixture)
+        queries, ms, status = _measure(client, url, runs=1 if budget.known_n_plus_one else 3)
+        if os.getenv('BUDGET_REPORT'):
+            print(f'\nBUDGET {self.scale:>6} {name:<22} {queries:>6} queries {ms:>9.1f} ms')
+        self.assertEqual(status, budget.status, url)
+        self.assertLessEqual(queries, budget.queries, f'{name} ran {queries} queries with {self.scale} elections')
+        if CHECK_LATENCY:
+            ceiling = budget.ms[SCALES.index(self.scale)] * LATENCY_FACTOR
+            self.assertLessEqual(ms, ceiling, f'{name} took {ms:.0f} ms with {self.scale} elections')
+
+
+def _budget_test(name):
+    def test(self):
+        self.check_budget(name)
+    return unittest.expectedFailure(test) if BUDGETS[name].known_n_plus_one else test
+
+
+for _scale in SCALES:
+    _cls = type(f'BudgetTests{_scale}', (_BudgetTestsMixin, TestCase), {
+        'scale': _scale,
+        **{f'test_{name}': _budget_test(name) for name in BUDGETS},
+    })
+    globals()[_cls.__name__] = _cls
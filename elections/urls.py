@@ -15,6 +15,7 @@ urlpatterns = [
     path('terms/', views.terms_page, name='terms'),
     path('data-policy/', views.data_policy_page, name='data_policy'),
     path('vote/<int:election_id>/', views.vote_view, name='vote'),
+    path('ballot/<str:token>/', views.ballot_link_view, name='ballot_link'),
     path('results/<int:election_id>/', views.results_view, name='results'),
     path('manage-dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('manage/list/<str:status>/', views.admin_election_list, name='admin_election_list'),
@@ -22,11 +23,16 @@ urlpatterns = [
     path('manage/<int:election_id>/edit/', views.edit_election, name='edit_election'),
     path('manage/<int:election_id>/delete/', views.delete_election, name='delete_election'),
     path('manage/<int:election_id>/upload/', views.upload_voters, name='upload_voters'),
+    path('manage/imports/<int:import_id>/', views.voter_import_status, name='voter_import_status'),
+    path('manage/imports/<int:import_id>/rejected.csv', views.voter_import_rejected, name='voter_import_rejected'),
     path('manage/<int:election_id>/publish/', views.publish_results, name='publish_results'),
     path('manage/<int:election_id>/rotate-key/', views.rotate_publish_key, name='rotate_publish_key'),
     path('results/<int:election_id>/export/', views.export_results_csv, name='export_results_csv'),
+    path('ledger/<int:election_id>/', views.ledger_view, name='ledger'),
+    path('ledger/<int:election_id>/proof/<int:leaf_index>/', views.ledger_proof, name='ledger_proof'),
     path('manage/<int:election_id>/candidates/create/', views.create_candidate, name='create_candidate'),
     path('manage/<int:election_id>/candidates/', views.list_candidates, name='list_candidates'),
+    path('manage/<int:election_id>/turnout/stream/', views.turnout_stream, name='turnout_stream'),
     path('manage/<int:election_id>/candidates/<int:candidate_id>/edit/', views.edit_candidate, name='edit_candidate'),
     path('manage/<int:election_id>/candidates/<int:candidate_id>/delete/', views.delete_candidate, name='delete_candidate'),
     path('confirm-email/', views.confirm_email, name='confirm_email'),
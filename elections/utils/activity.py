@@ -0,0 +1,84 @@
+"""Hourly vote-activity rollup (``VoteActivity``).
+
+Storing ballots adds them to their election's bucket for the current UTC hour
+in the same transaction (:func:`record_activity`, called by
+``elections.utils.ballots`` and ``elections.utils.ingest``). That is one UPDATE
+per ballot or per flushed batch, plus one INSERT per election per hour.
+Dashboards and charts then read at most one row per election per hour, and
+never the ballots themselves. :func:`rebuild_activity` re-derives the buckets
+from ``Vote`` rows, for backfills and repairs (``manage.py rebuild_activity``).
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from elections.models import Vote, VoteActivity
+
+
+def hour_of(moment):
+    """The start of the UTC hour containing ``moment``."""
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def record_activity(election_id, n: int = 1, at=None) -> None:
+    """Add ``n`` ballots to ``election_id``'s bucket for the hour of ``at`` (default: now)."""
+    hour = hour_of(at or timezone.now())
+    bucket = VoteActivity.objects.filter(election_id=election_id, hour=hour)
+    if bucket.update(count=F('count') + n):
+        return
+    try:
+        # savepoint: losing the race for the first ballot of the hour keeps the outer transaction usable
+        with transaction.atomic():
+            VoteActivity.objects.create(election_id=election_id, hour=hour, count=n)
+    except IntegrityError:
+        bucket.update(count=F('count') + n)
+
+
+def hourly_counts(since, elections=None) -> dict:
+    """``{hour: ballots}`` from ``since`` on, summed over ``elections`` (a queryset; default all)."""
+    qs = VoteActivity.objects.filter(hour__gte=hour_of(since))
+    if elections is not None:
+        qs = qs.filter(election__in=elections)
+    return dict(qs.values('hour').annotate(n=Sum('count')).order_by('hour').values_list('hour', 'n'))
+
+
+def turnout_series(election) -> tuple[list, list]:
+    """Hourly labels and the cumulative turnout (% of the roll) at the end of each hour of voting."""
+    buckets = list(
+        VoteActivity.objects.filter(election=election).order_by('hour').values_list('hour', 'count')
+    )
+    if not buckets:
+        return [], []
+    labels, values = [], []
+    by_hour = dict(buckets)
+    hour, last = buckets[0][0], buckets[-1][0]
+    cast = 0
+    while hour <= last:
+        cast += by_hour.get(hour, 0)
+        labels.append(timezone.localtime(hour + timedelta(hours=1)).strftime('%d %b %H:%M'))
+        values.append(round(cast / election.eligible_count * 100, 2) if election.eligible_count else 0)
+        hour += timedelta(hours=1)
+    return labels, values
+
+
+def rebuild_activity(elections=None) -> int:
+    """Re-derive the buckets of ``elections`` (default: all) from their ``Vote`` rows; return how many."""
+    votes = Vote.objects.all()
+    buckets = VoteActivity.objects.all()
+    if elections is not None:
+        votes = votes.filter(election__in=elections)
+        buckets = buckets.filter(election__in=elections)
+    rows = (
+        votes.annotate(h=TruncHour('timestamp', tzinfo=dt_timezone.utc))
+        .values('election_id', 'h').annotate(n=Count('id')).order_by()
+    )
+    with transaction.atomic():
+        buckets.delete()
+        created = VoteActivity.objects.bulk_create(
+            [VoteActivity(election_id=r['election_id'], hour=r['h'], count=r['n']) for r in rows.iterator()],
+            batch_size=1000,
+        )
+    return len(created)
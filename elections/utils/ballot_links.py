@@ -0,0 +1,66 @@
+"""Signed, single-use ballot links.
+
+A ballot link lets a voter open their ballot for one election without logging
+in. No session is created and no password hash is checked, so when an
+election opens, the web tier spends its CPU on ballots rather than on PBKDF2.
+The token is ``django.core.signing`` over the voter's ``VoterStatus`` id and a
+random nonce stored on that row (``ballot_nonce``). It expires after
+``BALLOT_LINK_MAX_AGE`` seconds. Casting the ballot claims ``has_voted`` and
+clears the nonce in one conditional UPDATE (see ``elections.utils.ballots``),
+so a link works once. Issuing links skips voters who already hold one unless
+asked to rotate, which replaces their nonces and so invalidates earlier links;
+:func:`revoke_ballot_links` invalidates them without issuing new ones.
+"""
+import secrets
+
+from django.conf import settings
+from django.core import signing
+
+from elections.models import VoterStatus
+
+SALT = 'ballot-link'
+BATCH_SIZE = 1000
+
+
+def make_ballot_token(status_id: int, nonce: str) -> str:
+    return signing.dumps({'s': status_id, 'n': nonce}, salt=SALT, compress=True)
+
+
+def read_ballot_token(token: str) -> tuple[int, str]:
+    """Return ``(status_id, nonce)``; raises ``signing.SignatureExpired`` or ``signing.BadSignature``."""
+    data = signing.loads(token, salt=SALT, max_age=settings.BALLOT_LINK_MAX_AGE)
+    if not isinstance(data, dict) or not isinstance(data.get('s'), int) or not isinstance(data.get('n'), str):
+        raise signing.BadSignature('Malformed ballot token')
+    return data['s'], data['n']
+
+
+def issue_ballot_links(election, rotate: bool = False):
+    """Give the voters on ``election``'s roll who have not voted a link.
+
+    Only voters without an outstanding link get one, unless ``rotate`` is set.
+    Yields one list of ``(username, email, token)`` per batch. A batch's nonces
+    are saved, with one ``bulk_update``, only when the caller asks for the next
+    batch, i.e. after it has written or sent this one: if the caller stops
+    midway, the voters of the unsaved batch keep their earlier link (or none),
+    and a later run issues to them again.
+    """
+    statuses = VoterStatus.objects.filter(election=election, has_voted=False)
+    if not rotate:
+        statuses = statuses.filter(ballot_nonce='')
+    statuses = statuses.select_related('user').only('id', 'user__username', 'user__email').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(statuses.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            return
+        for status in batch:
+            status.ballot_nonce = secrets.token_urlsafe(16)
+        yield [(status.user.username, status.user.email, make_ballot_token(status.id, status.ballot_nonce))
+               for status in batch]
+        VoterStatus.objects.bulk_update(batch, ['ballot_nonce'])
+        last_id = batch[-1].id
+
+
+def revoke_ballot_links(election) -> int:
+    """Invalidate every outstanding link for ``election``; return how many there were."""
+    return VoterStatus.objects.filter(election=election).exclude(ballot_nonce='').update(ballot_nonce='')
@@ -0,0 +1,178 @@
+"""Ballot sealing for the election ballot schemes.
+
+``aes-gcm`` elections seal ``candidate:<id>`` with the AES keyring (see
+``elections.utils.crypto``). ``elgamal`` elections seal a one-hot vector of
+ElGamal ciphertexts under the election's own public key (see
+``elections.utils.homomorphic``), which lets tallies be computed without
+decrypting any individual ballot.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from elections.models import Election
+from elections.utils import homomorphic
+from elections.utils.crypto import decrypt_vote, encrypt_vote
+
+
+def _secret_aad(election_id) -> str:
+    return f'elgamal-key:{election_id}'
+
+
+def setup_ballot_scheme(election, scheme: str) -> None:
+    """Set ``election.ballot_scheme`` and create any key material it needs (unsaved)."""
+    election.ballot_scheme = scheme
+    if scheme == Election.SCHEME_ELGAMAL:
+        if election.pk is None:
+            raise ValueError('Save the election before creating its ElGamal key pair')
+        x, h = homomorphic.generate_keypair()
+        election.elgamal_public_key = format(h, 'x')
+        election.elgamal_secret_key = encrypt_vote(format(x, 'x'), associated_data=_secret_aad(election.pk))
+
+
+def public_key(election) -> int:
+    return int(election.elgamal_public_key, 16)
+
+
+def secret_key(election) -> int:
+    return int(decrypt_vote(election.elgamal_secret_key, associated_data=_secret_aad(election.pk)), 16)
+
+
+def seal_ballot(election, candidate_id: int, candidate_ids=None) -> bytes:
+    """Seal a vote for ``candidate_id`` under the election's ballot scheme.
+
+    ``candidate_ids`` (all candidates of the election) is needed for ElGamal
+    ballots and looked up when not given.
+    """
+    if election.ballot_scheme == Election.SCHEME_ELGAMAL:
+        if candidate_ids is None:
+            candidate_ids = list(election.candidates.values_list('id', flat=True))
+        return homomorphic.dumps(homomorphic.encrypt_choice(public_key(election), candidate_ids, candidate_id))
+    return encrypt_vote(f'candidate:{candidate_id}', associated_data=str(election.id))
+
+
+class BallotRejected(Exception):
+    """A ballot was refused; ``str(exc)`` is safe to show to the voter."""
+
+
+class NotEligible(BallotRejected):
+    pass
+
+
+class AlreadyVoted(BallotRejected):
+    pass
+
+
+class ElectionClosed(BallotRejected):
+    pass
+
+
+class InvalidCandidate(BallotRejected):
+    pass
+
+
+class InvalidBallotLink(BallotRejected):
+    pass
+
+
+def _check_ballot(election, candidate_id: int, candidate_ids) -> None:
+    now = timezone.now()
+    if election.status == 'concluded' or not (election.start_time <= now <= election.end_time):
+        raise ElectionClosed('Election is not active')
+    if candidate_id not in candidate_ids:
+        raise InvalidCandidate('Invalid candidate for this election')
+
+
+def _store_ballot(user, election, candidate_id: int, ct: bytes, nonce: str | None = None) -> dict:
+    # imported here: tally depends on this module for ElGamal keys
+    from elections.models import PendingBallot, Vote, VoterStatus
+    from elections.utils.activity import record_activity
+    from elections.utils.counters import bump
+    from elections.utils.ingest import queue_enabled
+    from elections.utils.ledger import append_ballot, leaf_hash
+    from elections.utils.tally import record_vote
+
+    with transaction.atomic():
+        if nonce == '':
+            # revoked links clear the nonce; an empty one must not match them
+            raise InvalidBallotLink('This ballot link is no longer valid')
+        claim = VoterStatus.objects.filter(user=user, election=election, has_voted=False)
+        if nonce is not None:
+            claim = claim.filter(ballot_nonce=nonce)
+        # voting by any route spends the voter's ballot link in the same UPDATE
+        claimed = claim.update(has_voted=True, ballot_nonce='')
+        if not claimed:
+            voted = VoterStatus.objects.filter(user=user, election=election).values_list('has_voted', flat=True).first()
+            if voted:
+                raise AlreadyVoted('You have already voted in this election')
+            if voted is None:
+                raise NotEligible('You are not eligible to vote in this election')
+            raise InvalidBallotLink('This ballot link is no longer valid')
+        if queue_enabled():
+            PendingBallot.objects.create(election=election, encrypted_vote_data=ct)
+            return {'ledger_index': None, 'leaf_hash': leaf_hash(ct)}
+        record_vote(election, f'candidate:{candidate_id}', ct)
+        ledger_index = append_ballot(election, ct)
+        Vote.objects.create(election=election, encrypted_vote_data=ct, ledger_index=ledger_index)
+        bump(election.id, votes_cast=1)
+        record_activity(election.id)
+    return {'ledger_index': ledger_index, 'leaf_hash': leaf_hash(ct)}
+
+
+def cast_ballot(user, election, candidate_id: int, candidate_ids=None, nonce: str | None = None) -> dict:
+    """Seal and store one ballot for ``user`` in ``election``.
+
+    The voter's ``has_voted`` flag is claimed with a conditional UPDATE in the
+    same transaction that updates the tally and ledger and inserts the
+    ``Vote``, so concurrent submissions by one voter store exactly one ballot.
+    ``candidate_ids`` (the election's candidate ids) saves a query when the
+    caller already has them. ``nonce`` (from a ballot link, see
+    ``elections.utils.ballot_links``) must match the voter's and is spent by
+    the same claim. Returns the voter's ledger receipt
+    (``ledger_index``, ``leaf_hash``); raises a :class:`BallotRejected`
+    subclass when the ballot is refused.
+
+    In the ``queue`` ingestion mode the ballot is staged in the same
+    transaction as the claim instead and ``ledger_index`` is ``None`` until
+    the ``flush_ballots`` worker stores it (see ``elections.utils.ingest``).
+    """
+    if candidate_ids is None:
+        candidate_ids = list(election.candidates.values_list('id', flat=True))
+    _check_ballot(election, candidate_id, candidate_ids)
+    # seal outside the transaction so row locks are not held during crypto work
+    ct = seal_ballot(election, candidate_id, candidate_ids)
+    return _store_ballot(user, election, candidate_id, ct, nonce)
+
+
+_CRYPTO_EXECUTOR = None
+_CRYPTO_EXECUTOR_LOCK = threading.Lock()
+
+
+def crypto_executor() -> ThreadPoolExecutor:
+    """Process-wide pool of ``CRYPTO_WORKERS`` threads for sealing ballots off the event loop."""
+    global _CRYPTO_EXECUTOR
+    if _CRYPTO_EXECUTOR is None:
+        with _CRYPTO_EXECUTOR_LOCK:
+            if _CRYPTO_EXECUTOR is None:
+                _CRYPTO_EXECUTOR = ThreadPoolExecutor(max_workers=settings.CRYPTO_WORKERS, thread_name_prefix='crypto')
+    return _CRYPTO_EXECUTOR
+
+
+async def acast_ballot(user, election, candidate_id: int, candidate_ids=None, nonce: str | None = None) -> dict:
+    """Async :func:`cast_ballot` for ASGI views.
+
+    Candidate ids are read with the async ORM, sealing runs on the bounded
+    :func:`crypto_executor` and the claim-and-store transaction, which the
+    async ORM cannot express, runs in Django's sync thread.
+    """
+    if candidate_ids is None:
+        candidate_ids = [cid async for cid in election.candidates.values_list('id', flat=True)]
+    _check_ballot(election, candidate_id, candidate_ids)
+    loop = asyncio.get_running_loop()
+    ct = await loop.run_in_executor(crypto_executor(), seal_ballot, election, candidate_id, candidate_ids)
+    return await sync_to_async(_store_ballot)(user, election, candidate_id, ct, nonce)
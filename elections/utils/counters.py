@@ -0,0 +1,59 @@
+"""Per-election counters stored on ``Election``: ``eligible_count``, ``votes_cast``, ``candidates_count``.
+
+Every write that adds or removes a voter-roll entry, ballot or candidate
+adjusts the counter with an ``F()`` update in the same transaction. Row-level
+saves and deletes of ``VoterStatus`` and ``Candidate`` do it through signals
+(``elections/signals.py``). Ballot storage and bulk inserts call :func:`bump`
+themselves; bulk inserts that may skip conflicting rows call :func:`resync`
+instead, since they cannot tell how many rows went in. :func:`recount`
+re-derives the counters from the rows.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from elections.models import Candidate, Election, Vote, VoterStatus
+
+COUNTERS = {'eligible_count': VoterStatus, 'votes_cast': Vote, 'candidates_count': Candidate}
+
+
+def bump(election_id, **deltas) -> None:
+    """Add ``deltas`` (e.g. ``votes_cast=3``) to one election's counters in a single UPDATE."""
+    Election.objects.filter(pk=election_id).update(**{name: F(name) + n for name, n in deltas.items() if n})
+
+
+def _derived(model):
+    return Coalesce(Subquery(
+        model.objects.filter(election=OuterRef('pk')).order_by()
+        .values('election').annotate(n=Count('pk')).values('n'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def resync(election_id, *names) -> None:
+    """Set one election's ``names`` counters (default: all) to the counts of its rows, in a single UPDATE."""
+    Election.objects.filter(pk=election_id).update(**{name: _derived(COUNTERS[name]) for name in names or COUNTERS})
+
+
+def recount(elections=None, repair: bool = True) -> list[dict]:
+    """Compare stored counters with the rows; return the drifted elections, fixing them if ``repair``.
+
+    Each entry is ``{'id', 'stored': {...}, 'derived': {...}}``.
+    """
+    qs = Election.objects.all() if elections is None else elections
+    rows = (
+        qs.order_by('id')
+        .annotate(**{f'derived_{name}': _derived(model) for name, model in COUNTERS.items()})
+        .values('id', *COUNTERS, *(f'derived_{name}' for name in COUNTERS))
+    )
+    drifted = []
+    for row in rows:
+        stored = {name: row[name] for name in COUNTERS}
+        derived = {name: row[f'derived_{name}'] for name in COUNTERS}
+        if stored != derived:
+            drifted.append({'id': row['id'], 'stored': stored, 'derived': derived})
+    if repair and drifted:
+        # one statement for all drifted rows, re-derived at write time
+        Election.objects.filter(id__in=[d['id'] for d in drifted]).update(
+            **{name: _derived(model) for name, model in COUNTERS.items()}
+        )
+    return drifted
@@ -1,40 +1,210 @@
 import os
 import binascii
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def _get_key() -> bytes:
+KEY_ID_MAX_LEN = 16
+
+
+class Keyring:
+    """Parsed AES-GCM keys with ready-to-use cipher objects.
+
+    ``active_id`` names the key new ballots are sealed with; every other key is
+    kept for decryption only, so ballots sealed before a rotation stay readable.
+    """
+
+    def __init__(self, active_id: str, keys: dict[str, bytes]):
+        self.active_id = active_id
+        self.ciphers = {kid: AESGCM(key) for kid, key in keys.items()}
+        self.active = self.ciphers[active_id]
+
+    def cipher(self, key_id: str) -> AESGCM:
+        try:
+            return self.ciphers[key_id]
+        except KeyError:
+            raise RuntimeError(f'No AES key with id {key_id!r} is loaded; add it to AES_RETIRED_KEYS') from None
+
+    def candidates(self):
+        """Ciphers to try for legacy ciphertexts that carry no key id, active key first."""
+        yield self.active
+        for kid, cipher in self.ciphers.items():
+            if kid != self.active_id:
+                yield cipher
+
+
+def _parse_key(hex_key: str, name: str = 'AES_KEY_HEX') -> bytes:
+    try:
+        key = binascii.unhexlify(hex_key)
+    except (binascii.Error, TypeError) as e:
+        raise RuntimeError(f'{name} must be a valid hex string representing 32 bytes') from e
+    if len(key) != 32:
+        raise RuntimeError(f'{name} must decode to 32 bytes (256 bits)')
+    return key
+
+
+def _check_key_id(key_id: str) -> str:
+    if not key_id or len(key_id) > KEY_ID_MAX_LEN or not all(c.isalnum() or c in '-_' for c in key_id):
+        raise RuntimeError(f'AES key id {key_id!r} must be 1-{KEY_ID_MAX_LEN} characters of [A-Za-z0-9_-]')
+    return key_id
+
+
+def load_keyring() -> Keyring:
+    """Build a keyring from the environment.
+
+    ``AES_KEY_HEX`` is the active key and ``AES_KEY_ID`` its id (default ``1``).
+    ``AES_RETIRED_KEYS`` optionally lists decrypt-only keys as
+    ``id:hex,id:hex`` for use during a key rotation.
+    """
     hex_key = os.getenv('AES_KEY_HEX')
     if not hex_key:
         raise RuntimeError(
             'AES_KEY_HEX must be set in the environment (e.g. in .env) and be a 64-character hex string (32 bytes)'
         )
-    try:
-        key = binascii.unhexlify(hex_key)
-        if len(key) != 32:
-            raise RuntimeError('AES_KEY_HEX must decode to 32 bytes (256 bits)')
-        return key
-    except (binascii.Error, TypeError) as e:
-        raise RuntimeError('AES_KEY_HEX must be a valid hex string representing 32 bytes') from e
+    active_id = _check_key_id(os.getenv('AES_KEY_ID', '1'))
+    keys = {}
+    for entry in filter(None, (e.strip() for e in os.getenv('AES_RETIRED_KEYS', '').split(','))):
+        kid, sep, retired_hex = entry.partition(':')
+        if not sep:
+            raise RuntimeError('AES_RETIRED_KEYS entries must look like <key id>:<64 hex chars>')
+        keys[_check_key_id(kid)] = _parse_key(retired_hex, f'AES_RETIRED_KEYS[{kid}]')
+    keys[active_id] = _parse_key(hex_key)
+    return Keyring(active_id, keys)
+
+
+_keyring = None
+_keyring_lock = threading.Lock()
+
 
-def encrypt_vote(plaintext: str, associated_data: str | None = None) -> str:
-    key = _get_key()
+def get_keyring() -> Keyring:
+    """Return the process-wide keyring, parsing the environment on first use."""
+    global _keyring
+    ring = _keyring
+    if ring is None:
+        with _keyring_lock:
+            if _keyring is None:
+                _keyring = load_keyring()
+            ring = _keyring
+    return ring
+
+
+def reload_keyring() -> Keyring:
+    """Re-read the keys from the environment, e.g. after a key rotation."""
+    global _keyring
+    with _keyring_lock:
+        _keyring = load_keyring()
+        return _keyring
+
+
+# Ballot envelope, version 1:
+#   version (1 byte) | key id length L (1 byte) | key id (L bytes, ascii)
+#   | nonce (12 bytes) | ciphertext + GCM tag
+# L == 0 marks ballots converted from the pre-key-id hex format; those are
+# tried against every loaded key.
+ENVELOPE_V1 = 1
+NONCE_LEN = 12
+
+
+def seal_envelope(key_id: str, nonce: bytes, ct: bytes) -> bytes:
+    kid = key_id.encode('ascii')
+    return bytes((ENVELOPE_V1, len(kid))) + kid + nonce + ct
+
+
+def parse_envelope(blob) -> tuple[str, memoryview, memoryview]:
+    """Split an envelope into ``(key_id, nonce, ciphertext)`` without copying the payload."""
+    view = memoryview(blob)
+    if len(view) < 2 + NONCE_LEN or view[0] != ENVELOPE_V1:
+        raise ValueError('Unsupported ballot envelope')
+    kid_end = 2 + view[1]
+    key_id = bytes(view[2:kid_end]).decode('ascii')
+    return key_id, view[kid_end:kid_end + NONCE_LEN], view[kid_end + NONCE_LEN:]
+
+
+def envelope_from_text(text: str) -> bytes:
+    """Convert a hex ballot (``<key id>:<hex>`` or bare hex) into an envelope."""
+    key_id, _, hex_data = text.rpartition(':')
+    data = binascii.unhexlify(hex_data)
+    return seal_envelope(key_id, data[:NONCE_LEN], data[NONCE_LEN:])
+
+
+def encrypt_vote(plaintext: str, associated_data: str | None = None) -> bytes:
+    ring = get_keyring()
     # AES-GCM authenticated encryption with 96-bit (12 byte) nonce
-    aesgcm = AESGCM(key)
-    nonce = os.urandom(12)
+    nonce = os.urandom(NONCE_LEN)
     aad = associated_data.encode('utf-8') if associated_data is not None else None
-    ct = aesgcm.encrypt(nonce, plaintext.encode('utf-8'), aad)
-    # store nonce + ciphertext (ciphertext includes tag)
-    return binascii.hexlify(nonce + ct).decode('ascii')
-
-def decrypt_vote(hex_ciphertext: str, associated_data: str | None = None) -> str:
-    key = _get_key()
-    data = binascii.unhexlify(hex_ciphertext)
-    nonce = data[:12]
-    ct = data[12:]
-    aesgcm = AESGCM(key)
+    ct = ring.active.encrypt(nonce, plaintext.encode('utf-8'), aad)
+    return seal_envelope(ring.active_id, nonce, ct)
+
+def decrypt_vote(ciphertext, associated_data: str | None = None) -> str:
+    """Decrypt a ballot envelope (``bytes``/``memoryview``) or a legacy hex string."""
+    if isinstance(ciphertext, str):
+        ciphertext = envelope_from_text(ciphertext)
+    ring = get_keyring()
+    key_id, nonce, ct = parse_envelope(ciphertext)
     aad = associated_data.encode('utf-8') if associated_data is not None else None
-    plaintext = aesgcm.decrypt(nonce, ct, aad)
-    return plaintext.decode('utf-8')
+    if key_id:
+        return ring.cipher(key_id).decrypt(nonce, ct, aad).decode('utf-8')
+    # ballots written before key ids were introduced: try every loaded key
+    for cipher in ring.candidates():
+        try:
+            return cipher.decrypt(nonce, ct, aad).decode('utf-8')
+        except InvalidTag:
+            continue
+    raise InvalidTag()
+
+def count_chunk(rows, associated_data: str | None = None) -> tuple[dict, int]:
+    """Decrypt a chunk of ``(id, ciphertext)`` rows and count the plaintexts.
+
+    Returns ``(counts, failed)``; rows that fail authentication are counted in
+    ``failed`` instead of raising. Module-level so it can run in worker processes.
+    """
+    counts = {}
+    failed = 0
+    for _id, ct in rows:
+        try:
+            choice = decrypt_vote(ct, associated_data=associated_data)
+        except Exception:
+            failed += 1
+            continue
+        counts[choice] = counts.get(choice, 0) + 1
+    return counts, failed
+
+
+def count_votes(chunks, associated_data: str | None = None, workers: int = 1) -> tuple[dict, int]:
+    """Aggregate plaintext counts over an iterable of row chunks.
+
+    Chunks are decrypted in a process pool when ``workers > 1``. At most
+    ``2 * workers`` chunks are in flight at once so memory stays flat no matter
+    how many ballots are streamed through; only the aggregated counts are kept.
+    """
+    totals = {}
+    failed = 0
+
+    def merge(result):
+        nonlocal failed
+        counts, chunk_failed = result
+        for choice, n in counts.items():
+            totals[choice] = totals.get(choice, 0) + n
+        failed += chunk_failed
+
+    if workers <= 1:
+        for chunk in chunks:
+            merge(count_chunk(chunk, associated_data))
+        return totals, failed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            # BinaryField rows come back as memoryview on PostgreSQL, which cannot be pickled
+            pending.add(pool.submit(count_chunk, [(i, bytes(ct)) for i, ct in chunk], associated_data))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    merge(fut.result())
+        for fut in pending:
+            merge(fut.result())
+    return totals, failed
@@ -0,0 +1,38 @@
+"""Password hashing spread over a process pool.
+
+PBKDF2 is deliberately slow (hundreds of milliseconds per password), so
+hashing 100k one-time passwords on one core takes hours. ``hash_batches``
+hashes batches in ``workers`` processes and yields them back in order, with at
+most ``2 * workers`` batches in flight, so the caller can insert each batch
+while later ones are still hashing.
+
+This module imports no models: worker processes started with the ``spawn``
+method import it without setting up Django's app registry.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+
+
+def hash_batch(passwords: list) -> list:
+    """``make_password`` over a batch; ``None`` entries get an unusable password."""
+    return [make_password(p) for p in passwords]
+
+
+def hash_batches(batches, workers: int = 1):
+    """Yield ``(payload, hashes)`` for each ``(payload, passwords)`` in ``batches``, in order."""
+    if workers <= 1:
+        for payload, passwords in batches:
+            yield payload, hash_batch(passwords)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for payload, passwords in batches:
+            pending.append((payload, pool.submit(hash_batch, passwords)))
+            if len(pending) >= workers * 2:
+                payload, fut = pending.popleft()
+                yield payload, fut.result()
+        while pending:
+            payload, fut = pending.popleft()
+            yield payload, fut.result()
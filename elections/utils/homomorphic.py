@@ -0,0 +1,176 @@
+"""Exponential ElGamal ballots for additively homomorphic tallies.
+
+An election using the ``elgamal`` ballot scheme has its own key pair. A ballot
+is a one-hot vector with one ElGamal ciphertext per candidate: an encryption of
+``g^1`` for the chosen candidate and ``g^0`` for every other one. Multiplying
+ciphertexts component-wise adds the underlying votes, so the tally is obtained
+by multiplying all ballots together and decrypting the single aggregate; no
+individual ballot is ever decrypted.
+
+The group is the 2048-bit MODP group 14 of RFC 3526 (a safe prime ``p = 2q + 1``
+where ``g = 2`` generates the subgroup of prime order ``q``).
+
+Ballot validity (exactly one ``1`` per ballot) is not proven to a third party;
+ballots are sealed server-side from a validated candidate id, the same trust
+model as the AES-GCM scheme.
+"""
+import functools
+import math
+import secrets
+
+P = int(
+    'FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74'
+    '020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437'
+    '4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED'
+    'EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05'
+    '98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB'
+    '9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B'
+    'E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718'
+    '3995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF',
+    16,
+)
+Q = (P - 1) // 2
+G = 2
+ELEMENT_LEN = (P.bit_length() + 7) // 8
+# RFC 3526 section 8 estimates 320-bit exponents for this group's strength
+EXPONENT_BITS = 320
+CANDIDATE_ID_LEN = 8
+RECORD_LEN = CANDIDATE_ID_LEN + 2 * ELEMENT_LEN
+# first byte of a serialized vector, next to the AES-GCM envelope version (1)
+VECTOR_VERSION = 2
+WINDOW_BITS = 8
+
+
+class FixedBase:
+    """Precomputed powers of a fixed base for fast ``EXPONENT_BITS`` exponentiation.
+
+    ``table[i][d] == base^(d * 2^(WINDOW_BITS * i))`` so an exponentiation costs
+    one multiplication per window instead of a full square-and-multiply.
+    """
+
+    def __init__(self, base: int):
+        windows = -(-EXPONENT_BITS // WINDOW_BITS)
+        self.table = []
+        b = base
+        for _ in range(windows):
+            row = [1] * (1 << WINDOW_BITS)
+            for d in range(1, 1 << WINDOW_BITS):
+                row[d] = row[d - 1] * b % P
+            self.table.append(row)
+            b = row[-1] * b % P
+        self.mask = (1 << WINDOW_BITS) - 1
+
+    def pow(self, exponent: int) -> int:
+        acc = 1
+        for row in self.table:
+            d = exponent & self.mask
+            if d:
+                acc = acc * row[d] % P
+            exponent >>= WINDOW_BITS
+        return acc
+
+
+_G_TABLE = None
+
+
+def _g_table() -> FixedBase:
+    global _G_TABLE
+    if _G_TABLE is None:
+        _G_TABLE = FixedBase(G)
+    return _G_TABLE
+
+
+@functools.lru_cache(maxsize=32)
+def _public_table(public_key: int) -> FixedBase:
+    # one table per election key, built on the first ballot this process seals
+    return FixedBase(public_key)
+
+
+def generate_keypair() -> tuple[int, int]:
+    """Return ``(secret x, public h = g^x mod p)``."""
+    x = secrets.randbelow(Q - 1) + 1
+    return x, pow(G, x, P)
+
+
+def encrypt_bit(public_key: int, m: int) -> tuple[int, int]:
+    r = secrets.randbits(EXPONENT_BITS) | 1
+    c2 = _public_table(public_key).pow(r)
+    if m:
+        c2 = c2 * G % P
+    return _g_table().pow(r), c2
+
+
+def encrypt_choice(public_key: int, candidate_ids, chosen_id: int) -> dict:
+    """One-hot ballot: ``{candidate_id: (c1, c2)}`` for every candidate id."""
+    return {cid: encrypt_bit(public_key, 1 if cid == chosen_id else 0) for cid in candidate_ids}
+
+
+def combine(aggregate: dict, ballot: dict) -> dict:
+    """Add ``ballot`` into ``aggregate`` in place (component-wise product) and return it.
+
+    Candidates missing from either side count as an encryption of zero, so
+    ballots cast before a candidate was added still combine cleanly.
+    """
+    for cid, (b1, b2) in ballot.items():
+        a1, a2 = aggregate.get(cid, (1, 1))
+        aggregate[cid] = (a1 * b1 % P, a2 * b2 % P)
+    return aggregate
+
+
+def _discrete_log(target: int, upper: int) -> int:
+    """Solve ``g^m == target`` for ``0 <= m <= upper`` by baby-step giant-step."""
+    step = math.isqrt(upper) + 1
+    baby = {}
+    e = 1
+    for j in range(step):
+        baby.setdefault(e, j)
+        e = e * G % P
+    giant = pow(G, P - 1 - step, P)  # g^-step
+    gamma = target
+    for i in range(step + 1):
+        j = baby.get(gamma)
+        if j is not None:
+            return i * step + j
+        gamma = gamma * giant % P
+    raise ValueError('Aggregate does not decrypt to a count within range')
+
+
+def decrypt_count(secret_key: int, ciphertext: tuple[int, int], upper: int) -> int:
+    c1, c2 = ciphertext
+    gm = c2 * pow(c1, P - 1 - secret_key, P) % P
+    return _discrete_log(gm, upper)
+
+
+def decrypt_aggregate(secret_key: int, aggregate: dict, upper: int) -> dict:
+    """Decrypt each component of ``aggregate`` to ``{candidate_id: count}``.
+
+    ``upper`` bounds every count (the number of ballots combined).
+    """
+    return {cid: decrypt_count(secret_key, ct, upper) for cid, ct in aggregate.items()}
+
+
+def dumps(vector: dict) -> bytes:
+    """Serialize ``{candidate_id: (c1, c2)}`` as fixed-size binary records."""
+    out = bytearray((VECTOR_VERSION,))
+    for cid in sorted(vector):
+        c1, c2 = vector[cid]
+        out += cid.to_bytes(CANDIDATE_ID_LEN, 'big')
+        out += c1.to_bytes(ELEMENT_LEN, 'big')
+        out += c2.to_bytes(ELEMENT_LEN, 'big')
+    return bytes(out)
+
+
+def loads(blob) -> dict:
+    view = memoryview(blob)
+    if not len(view) or view[0] != VECTOR_VERSION or (len(view) - 1) % RECORD_LEN:
+        raise ValueError('Unsupported ElGamal vector')
+    vector = {}
+    for off in range(1, len(view), RECORD_LEN):
+        cid = int.from_bytes(view[off:off + CANDIDATE_ID_LEN], 'big')
+        off += CANDIDATE_ID_LEN
+        c1 = int.from_bytes(view[off:off + ELEMENT_LEN], 'big')
+        c2 = int.from_bytes(view[off + ELEMENT_LEN:off + 2 * ELEMENT_LEN], 'big')
+        if not (0 < c1 < P and 0 < c2 < P):
+            raise ValueError('ElGamal ciphertext out of range')
+        vector[cid] = (c1, c2)
+    return vector
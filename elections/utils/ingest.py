@@ -0,0 +1,116 @@
+"""Write-behind ballot ingestion for peak voting windows.
+
+With ``BALLOT_INGEST_MODE = 'queue'``, ``cast_ballot`` claims the voter's
+``has_voted`` flag and inserts the sealed ballot into the ``PendingBallot``
+staging table in one short transaction, and returns. The ``flush_ballots``
+worker then group-commits batches: each flush opens the tally and extends the
+ledger once per election, bulk-inserts the ``Vote`` rows and deletes the staged
+rows in a single transaction, so a crash at any point leaves every accepted
+ballot either staged or stored, never both and never neither.
+
+A batch is flushed once ``INGEST_BATCH_SIZE`` ballots are waiting or the oldest
+has waited ``INGEST_FLUSH_INTERVAL`` seconds. Results snapshots drain the
+election's queue first (see ``elections.utils.results.build_snapshot``).
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from elections.models import Election, PendingBallot, Vote
+from elections.utils.activity import record_activity
+from elections.utils.counters import bump
+from elections.utils.crypto import decrypt_vote
+from elections.utils.ledger import append_ballots
+from elections.utils.tally import record_votes
+
+# flush metrics of this process only, logged by the flush_ballots worker; other
+# processes (e.g. flush_ballots --stats) cannot see them
+FLUSH_STATS = {'flushes': 0, 'ballots': 0, 'seconds_total': 0.0, 'seconds_last': 0.0, 'seconds_max': 0.0}
+
+
+def queue_enabled() -> bool:
+    return settings.BALLOT_INGEST_MODE == 'queue'
+
+
+def _choice(election, ballot: bytes):
+    # ElGamal ballots are multiplied into the aggregate without decrypting
+    if election.ballot_scheme == Election.SCHEME_ELGAMAL:
+        return None
+    return decrypt_vote(ballot, associated_data=str(election.id))
+
+
+def flush_pending(batch_size: int | None = None, election=None) -> int:
+    """Move up to ``batch_size`` of the oldest staged ballots into ``Vote``; return how many.
+
+    Everything happens in one transaction. Where the database supports it,
+    rows locked by another flusher are skipped so several workers can run.
+    """
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    started = time.perf_counter()
+    with transaction.atomic():
+        qs = PendingBallot.objects.select_for_update(skip_locked=True).order_by('id')
+        if election is not None:
+            qs = qs.filter(election=election)
+        rows = list(qs.values_list('id', 'election_id', 'encrypted_vote_data')[:batch_size])
+        if not rows:
+            return 0
+        groups = defaultdict(list)
+        for _, election_id, ballot in rows:
+            groups[election_id].append(bytes(ballot))
+        elections = Election.objects.in_bulk(groups.keys())
+        votes = []
+        for election_id, ballots in groups.items():
+            target = elections[election_id]
+            record_votes(target, [(_choice(target, b), b) for b in ballots])
+            indices = append_ballots(target, ballots)
+            votes.extend(
+                Vote(election=target, encrypted_vote_data=b, ledger_index=i) for b, i in zip(ballots, indices)
+            )
+            bump(election_id, votes_cast=len(ballots))
+            record_activity(election_id, len(ballots))
+        Vote.objects.bulk_create(votes)
+        PendingBallot.objects.filter(id__in=[r[0] for r in rows]).delete()
+    elapsed = time.perf_counter() - started
+    FLUSH_STATS['flushes'] += 1
+    FLUSH_STATS['ballots'] += len(rows)
+    FLUSH_STATS['seconds_total'] += elapsed
+    FLUSH_STATS['seconds_last'] = elapsed
+    FLUSH_STATS['seconds_max'] = max(FLUSH_STATS['seconds_max'], elapsed)
+    return len(rows)
+
+
+def drain(election=None, batch_size: int | None = None) -> int:
+    """Flush until nothing is staged (for ``election`` only, if given); return the total."""
+    total = 0
+    while True:
+        flushed = flush_pending(batch_size, election=election)
+        if not flushed:
+            return total
+        total += flushed
+
+
+def queue_stats() -> dict:
+    """Queue depth and age of the oldest staged ballot, read from the database by any process."""
+    agg = PendingBallot.objects.aggregate(depth=Count('id'), oldest=Min('accepted_at'))
+    oldest = agg['oldest']
+    return {
+        'depth': agg['depth'],
+        'oldest_age_seconds': (timezone.now() - oldest).total_seconds() if oldest else 0.0,
+    }
+
+
+def flush_due(batch_size: int | None = None, interval: float | None = None) -> int:
+    """Flush one batch if it is full or its oldest ballot has waited ``interval`` seconds."""
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    interval = settings.INGEST_FLUSH_INTERVAL if interval is None else interval
+    full = PendingBallot.objects.order_by('id')[batch_size - 1:batch_size].exists()
+    if not full:
+        cutoff = timezone.now() - timedelta(seconds=interval)
+        if not PendingBallot.objects.filter(accepted_at__lte=cutoff).exists():
+            return 0
+    return flush_pending(batch_size)
@@ -0,0 +1,273 @@
+"""Append-only Merkle ledger over ballot ciphertexts.
+
+Each election's ballots form an RFC 6962 / 9162 Merkle tree: leaf hashes are
+``SHA-256(0x00 || ballot)`` and interior nodes ``SHA-256(0x01 || left || right)``.
+Only complete subtrees are persisted (``LedgerNode``), so appending a ballot
+writes the leaf plus the subtrees it completes, and the root or any inclusion
+proof needs O(log n) nodes, fetched with a single query.
+
+``cast_ballot`` appends each ballot via :func:`append_ballot` in the transaction
+that stores the ``Vote`` (the ingestion queue appends whole batches with
+:func:`append_ballots`). The head (size and root) is kept on ``BallotLedger``
+and copied into the results snapshot when the election concludes.
+:func:`audit_ledger` recomputes the root from the ballots as a chunked stream.
+"""
+import hashlib
+from functools import reduce
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from elections.models import BallotLedger, LedgerNode, Vote
+
+EMPTY_ROOT = hashlib.sha256(b'').hexdigest()
+
+
+def leaf_hash(ballot) -> str:
+    return hashlib.sha256(b'\x00' + bytes(ballot)).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(b'\x01' + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def _fold(digests) -> str:
+    # right fold over subtree roots, largest (leftmost) first
+    return reduce(lambda right, left: node_hash(left, right), reversed(digests[:-1]), digests[-1])
+
+
+def _range_pieces(start: int, end: int) -> list[tuple[int, int]]:
+    """Complete subtrees ``(level, index)`` covering leaves ``[start, end)``, left to right.
+
+    ``start`` must be aligned to the largest piece, which holds for every range
+    RFC 6962 hashing produces.
+    """
+    pieces = []
+    n = end - start
+    for level in range(n.bit_length() - 1, -1, -1):
+        if n >> level & 1:
+            pieces.append((level, start >> level))
+            start += 1 << level
+    return pieces
+
+
+def _proof_ranges(m: int, start: int, n: int) -> list[tuple[int, int]]:
+    """Leaf ranges whose hashes form the RFC 6962 audit path of leaf ``start + m``."""
+    if n <= 1:
+        return []
+    k = 1 << ((n - 1).bit_length() - 1)  # largest power of two below n
+    if m < k:
+        return _proof_ranges(m, start, k) + [(start + k, start + n)]
+    return _proof_ranges(m - k, start + k, n - k) + [(start, start + k)]
+
+
+def _fetch(election, keys) -> dict:
+    keys = set(keys)
+    if not keys:
+        return {}
+    cond = Q()
+    for level, index in keys:
+        cond |= Q(level=level, index=index)
+    rows = LedgerNode.objects.filter(cond, election=election).values_list('level', 'index', 'digest')
+    nodes = {(level, index): digest for level, index, digest in rows}
+    missing = keys - nodes.keys()
+    if missing:
+        raise LookupError(f'Ledger of election {election.id} is missing nodes {sorted(missing)[:3]}')
+    return nodes
+
+
+def _range_hash(nodes: dict, start: int, end: int) -> str:
+    return _fold([nodes[p] for p in _range_pieces(start, end)])
+
+
+class _Frontier:
+    """Streaming tree builder holding one pending subtree per level (O(log n) memory)."""
+
+    def __init__(self):
+        self.stack = []  # (level, index, digest), strictly decreasing levels
+        self.size = 0
+
+    def push(self, digest: str) -> list[tuple[int, int, str]]:
+        """Add the next leaf; return every complete subtree it produced, leaf first."""
+        created = [(0, self.size, digest)]
+        level, index = 0, self.size
+        while self.stack and self.stack[-1][0] == level:
+            _, left_index, left = self.stack.pop()
+            digest = node_hash(left, digest)
+            level, index = level + 1, left_index >> 1
+            created.append((level, index, digest))
+        self.stack.append((level, index, digest))
+        self.size += 1
+        return created
+
+    def root(self) -> str:
+        return _fold([d for _, _, d in self.stack]) if self.stack else EMPTY_ROOT
+
+
+def _seed_ledger(election) -> BallotLedger:
+    """Create the ledger of ``election``, appending ballots cast before the ledger existed."""
+    chunk_size = settings.TALLY_CHUNK_SIZE
+    frontier = _Frontier()
+    qs = Vote.objects.filter(election=election, ledger_index__isnull=True).order_by('id')
+    last_id = 0
+    while True:
+        votes = list(qs.filter(id__gt=last_id).only('id', 'encrypted_vote_data')[:chunk_size])
+        if not votes:
+            break
+        nodes = []
+        for vote in votes:
+            vote.ledger_index = frontier.size
+            nodes.extend(frontier.push(leaf_hash(vote.encrypted_vote_data)))
+        LedgerNode.objects.bulk_create([
+            LedgerNode(election=election, level=level, index=index, digest=digest) for level, index, digest in nodes
+        ])
+        Vote.objects.bulk_update(votes, ['ledger_index'])
+        last_id = votes[-1].id
+    return BallotLedger.objects.create(election=election, size=frontier.size, root=frontier.root())
+
+
+def _locked_ledger(election) -> BallotLedger:
+    ledger = BallotLedger.objects.select_for_update().filter(election=election).first()
+    if ledger is None:
+        try:
+            with transaction.atomic():
+                _seed_ledger(election)
+        except IntegrityError:
+            pass
+        ledger = BallotLedger.objects.select_for_update().get(election=election)
+    return ledger
+
+
+def _load_frontier(election, size: int) -> _Frontier:
+    # the frontier of a tree is exactly its peaks
+    peaks = _range_pieces(0, size)
+    nodes = _fetch(election, peaks)
+    frontier = _Frontier()
+    frontier.stack = [(level, index, nodes[(level, index)]) for level, index in peaks]
+    frontier.size = size
+    return frontier
+
+
+def append_ballots(election, ballots) -> list[int]:
+    """Append ``ballots`` in order to the ledger of ``election``; return their leaf indices.
+
+    Must be called inside ``transaction.atomic()``; store each index on its
+    ``Vote``. The current peaks are read in one query and all new nodes are
+    written with one ``bulk_create``, however many ballots are appended.
+    """
+    ledger = _locked_ledger(election)
+    frontier = _load_frontier(election, ledger.size)
+    indices = []
+    created = []
+    for ballot in ballots:
+        indices.append(frontier.size)
+        created.extend(frontier.push(leaf_hash(ballot)))
+    LedgerNode.objects.bulk_create([
+        LedgerNode(election=election, level=level, index=index, digest=digest) for level, index, digest in created
+    ])
+    ledger.size = frontier.size
+    ledger.root = frontier.root()
+    ledger.save(update_fields=['size', 'root', 'updated_at'])
+    return indices
+
+
+def append_ballot(election, ballot) -> int:
+    """Append one ballot; see :func:`append_ballots`."""
+    return append_ballots(election, [ballot])[0]
+
+
+def ledger_head(election) -> tuple[int, str]:
+    """Current ``(size, root)`` of the ledger of ``election``.
+
+    An election whose ballots were all cast before the ledger existed (e.g. one
+    that concluded before the upgrade) gets its ledger seeded here, under the
+    ledger lock, so its head covers every stored ballot.
+    """
+    ledger = BallotLedger.objects.filter(election=election).first()
+    if ledger is None:
+        with transaction.atomic():
+            ledger = _locked_ledger(election)
+    return ledger.size, ledger.root
+
+
+def inclusion_proof(election, leaf_index: int, tree_size: int | None = None) -> dict:
+    """Audit path proving leaf ``leaf_index`` is in the ledger of size ``tree_size``.
+
+    Defaults to the current ledger size. Reads O(log n) nodes in one query.
+    """
+    size, _ = ledger_head(election)
+    tree_size = size if tree_size is None else tree_size
+    if not 0 <= leaf_index < tree_size <= size:
+        raise ValueError('Leaf index or tree size out of range')
+    ranges = _proof_ranges(leaf_index, 0, tree_size)
+    nodes = _fetch(election, [(0, leaf_index)] + [p for r in ranges for p in _range_pieces(*r)] + _range_pieces(0, tree_size))
+    return {
+        'leaf_index': leaf_index,
+        'tree_size': tree_size,
+        'leaf_hash': nodes[(0, leaf_index)],
+        'path': [_range_hash(nodes, *r) for r in ranges],
+        'root': _range_hash(nodes, 0, tree_size),
+    }
+
+
+def verify_inclusion(leaf: str, leaf_index: int, tree_size: int, path: list[str], root: str) -> bool:
+    """RFC 9162 section 2.1.3.2 inclusion proof verification."""
+    if leaf_index >= tree_size:
+        return False
+    fn, sn = leaf_index, tree_size - 1
+    r = leaf
+    for p in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            if not fn & 1:
+                while fn and not fn & 1:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+def audit_ledger(election, chunk_size: int | None = None) -> dict:
+    """Recompute the ledger root of ``election`` from its ballots.
+
+    Streams ballots in ledger order in chunks, keeping only the frontier in
+    memory. Returns ``size``, ``root``, the stored head and ``unindexed``
+    (ballots never appended) alongside ``match``.
+    """
+    chunk_size = chunk_size or settings.TALLY_CHUNK_SIZE
+    # read (and if need be seed) the head first, so seeded ballots are indexed below
+    stored_size, stored_root = ledger_head(election)
+    frontier = _Frontier()
+    qs = (
+        Vote.objects.filter(election=election, ledger_index__isnull=False)
+        .order_by('ledger_index')
+        .values_list('ledger_index', 'encrypted_vote_data')
+    )
+    gaps = 0
+    last = -1
+    while True:
+        rows = list(qs.filter(ledger_index__gt=last)[:chunk_size])
+        if not rows:
+            break
+        for index, ballot in rows:
+            if index != frontier.size:
+                gaps += 1
+            frontier.push(leaf_hash(ballot))
+        last = rows[-1][0]
+    unindexed = Vote.objects.filter(election=election, ledger_index__isnull=True).count()
+    root = frontier.root()
+    return {
+        'size': frontier.size,
+        'root': root,
+        'stored_size': stored_size,
+        'stored_root': stored_root,
+        'unindexed': unindexed,
+        'gaps': gaps,
+        'match': (frontier.size, root) == (stored_size, stored_root) and not gaps and not unindexed,
+    }
@@ -0,0 +1,133 @@
+"""Live turnout for admins, as a Server-Sent Events stream.
+
+Every connected admin reads :func:`turnout_snapshot`. The snapshot comes from
+the cache and is recomputed at most once every ``TURNOUT_STREAM_INTERVAL``
+seconds per election, by one caller (one query over the election's counters
+and the current hour of the vote rollup). Everyone else keeps getting the
+previous value meanwhile. N watching admins therefore cost one small query per
+interval, not N dashboard aggregations per refresh.
+
+Under ASGI, :func:`astream_turnout` keeps the connection open on the event
+loop and checks the snapshot once per interval, so updates are coalesced to at
+most one event per interval. It sends an event only when the figures change, a
+keep-alive comment every ``TURNOUT_STREAM_KEEPALIVE`` seconds otherwise, and
+closes when the election concludes or after ``TURNOUT_STREAM_MAX_SECONDS``
+(``EventSource`` reconnects by itself). Under WSGI an open stream would hold a
+sync worker for its whole life, so :func:`stream_turnout` sends the current
+figures and closes; ``EventSource`` reconnects after the ``retry`` delay, i.e.
+it polls once per interval.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import IntegerField, OuterRef, Subquery
+from django.utils import timezone
+
+from elections.models import Election, VoteActivity
+from elections.utils.activity import hour_of
+
+TURNOUT_KEY = 'elections:turnout:{election_id}'
+FIELDS = ('status', 'votes_cast', 'eligible_count', 'votes_this_hour')
+
+
+def compute_turnout(election_id) -> dict | None:
+    """Current turnout figures for one election, from one query; ``None`` if it no longer exists."""
+    this_hour = VoteActivity.objects.filter(election=OuterRef('pk'), hour=hour_of(timezone.now())).values('count')
+    row = (
+        Election.objects.filter(pk=election_id)
+        .annotate(votes_this_hour=Subquery(this_hour, output_field=IntegerField()))
+        .values('status', 'votes_cast', 'eligible_count', 'votes_this_hour')
+        .first()
+    )
+    if row is None:
+        return None
+    row['votes_this_hour'] = row['votes_this_hour'] or 0
+    row['turnout_pct'] = round(row['votes_cast'] / row['eligible_count'] * 100, 2) if row['eligible_count'] else 0
+    row['election_id'] = election_id
+    return row
+
+
+def turnout_snapshot(election_id) -> dict | None:
+    """:func:`compute_turnout`, shared by every stream and recomputed once per ``TURNOUT_STREAM_INTERVAL``."""
+    key = TURNOUT_KEY.format(election_id=election_id)
+    cached = cache.get(key)
+    if cached is None:
+        return _refresh(key, election_id)
+    computed_at, snapshot = cached
+    # one caller per interval recomputes; the others serve what is cached meanwhile
+    if time.time() - computed_at < settings.TURNOUT_STREAM_INTERVAL or not cache.add(key + ':computing', 1, 30):
+        return snapshot
+    try:
+        return _refresh(key, election_id)
+    finally:
+        cache.delete(key + ':computing')
+
+
+def _refresh(key, election_id):
+    snapshot = compute_turnout(election_id)
+    cache.set(key, (time.time(), snapshot), max(60, settings.TURNOUT_STREAM_INTERVAL * 10))
+    return snapshot
+
+
+def _event(name: str, data: dict, event_id=None) -> str:
+    head = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{head}event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+class _TurnoutStream:
+    """What one connection sends, given the snapshot it sees at each tick."""
+
+    def __init__(self, election_id, last_votes=None):
+        self.election_id = election_id
+        self.last = None
+        self.last_votes = last_votes
+        self.started = self.last_sent = time.monotonic()
+        self.done = False
+
+    def tick(self, snapshot) -> list[str]:
+        now = time.monotonic()
+        if snapshot is None:
+            self.done = True
+            return [_event('end', {'election_id': self.election_id, 'reason': 'deleted'})]
+        out = []
+        if self.last is None or any(snapshot[f] != self.last[f] for f in FIELDS):
+            delta = 0 if self.last_votes is None else snapshot['votes_cast'] - self.last_votes
+            # the id lets a reconnecting EventSource resume the deltas (Last-Event-ID)
+            out.append(_event('turnout', {**snapshot, 'delta': delta}, event_id=snapshot['votes_cast']))
+            self.last, self.last_votes, self.last_sent = snapshot, snapshot['votes_cast'], now
+        elif now - self.last_sent >= settings.TURNOUT_STREAM_KEEPALIVE:
+            out.append(': keep-alive\n\n')
+            self.last_sent = now
+        if snapshot['status'] == 'concluded':
+            self.done = True
+            out.append(_event('end', {'election_id': self.election_id, 'reason': 'concluded'}))
+        elif now - self.started >= settings.TURNOUT_STREAM_MAX_SECONDS:
+            self.done = True
+        return out
+
+
+def _retry() -> str:
+    # reconnect delay for EventSource, in ms
+    return f'retry: {int(settings.TURNOUT_STREAM_INTERVAL * 1000)}\n\n'
+
+
+def stream_turnout(election_id, last_votes=None):
+    """Synchronous SSE response (WSGI): one event, then the connection closes and the browser reconnects."""
+    yield _retry()
+    yield from _TurnoutStream(election_id, last_votes).tick(turnout_snapshot(election_id))
+
+
+async def astream_turnout(election_id, last_votes=None):
+    """Asynchronous SSE stream (ASGI): waiting connections hold no thread."""
+    stream = _TurnoutStream(election_id, last_votes)
+    yield _retry()
+    while True:
+        for chunk in stream.tick(await sync_to_async(turnout_snapshot)(election_id)):
+            yield chunk
+        if stream.done:
+            return
+        await asyncio.sleep(settings.TURNOUT_STREAM_INTERVAL)
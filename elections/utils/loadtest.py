@@ -0,0 +1,208 @@
+"""Simulated election opening: N voters log in, open their dashboard and vote.
+
+Used by the ``loadtest`` management command and ``benchmarks/election_open_bench.py``.
+:func:`seed` creates the voters and an active election, :func:`run_load`
+drives ``/login/``, ``/dashboard/`` and ``/vote/<id>/`` for each of them with
+a pool of concurrent clients and returns throughput and p50/p95/p99 latency
+per endpoint. Requests go through Django's test client in-process, or over
+HTTP to a running server when ``base_url`` is given.
+"""
+import http.cookiejar
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.utils import timezone
+
+from elections.models import Candidate, Election, Profile, Vote, VoterStatus
+
+DEFAULT_PASSWORD = 'LoadTest-pass-1'
+SEED_BATCH = 1000
+
+
+def seed(voters: int, candidates: int = 3, password: str = DEFAULT_PASSWORD) -> dict:
+    """Create ``voters`` eligible users and an active election; return the run description.
+
+    All users share one password hash, so seeding costs one hash however many
+    voters there are; logging in still verifies it per request.
+    """
+    prefix = f'lt-{uuid.uuid4().hex[:8]}'
+    now = timezone.now()
+    hashed = make_password(password)
+    with transaction.atomic():
+        election = Election.objects.create(
+            title=f'Load test {prefix}',
+            start_time=now - timedelta(minutes=1),
+            end_time=now + timedelta(hours=2),
+            status='active',
+            # bulk inserts below skip the counter signals
+            eligible_count=voters,
+            candidates_count=candidates,
+        )
+        candidate_ids = [
+            c.id for c in Candidate.objects.bulk_create(
+                [Candidate(election=election, name=f'Candidate {i + 1}') for i in range(candidates)]
+            )
+        ]
+        usernames = [f'{prefix}-{i}' for i in range(voters)]
+        for start in range(0, voters, SEED_BATCH):
+            # bulk_create skips the post_save signal that creates profiles
+            users = User.objects.bulk_create(
+                [User(username=name, password=hashed) for name in usernames[start:start + SEED_BATCH]]
+            )
+            Profile.objects.bulk_create([Profile(user=u, is_confirmed=True, is_approved=True) for u in users])
+            VoterStatus.objects.bulk_create([VoterStatus(user=u, election=election) for u in users])
+    return {
+        'prefix': prefix,
+        'election_id': election.id,
+        'candidate_ids': candidate_ids,
+        'usernames': usernames,
+        'password': password,
+    }
+
+
+def cleanup(run: dict) -> None:
+    """Delete the users and election created by :func:`seed`."""
+    Election.objects.filter(pk=run['election_id']).delete()
+    User.objects.filter(username__startswith=f'{run["prefix"]}-').delete()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class _HttpSession:
+    """Cookie-keeping HTTP client for a running server; redirects are not followed."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect())
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def request(self, method: str, path: str, data: dict | None = None) -> tuple[int, bytes]:
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if method == 'POST':
+            req.add_header('X-CSRFToken', self._csrf())
+            req.add_header('Referer', self.base_url + path)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read()
+
+
+class _ClientSession:
+    """In-process session backed by Django's test client."""
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method: str, path: str, data: dict | None = None) -> tuple[int, bytes]:
+        resp = self.client.post(path, data) if method == 'POST' else self.client.get(path)
+        return resp.status_code, resp.content
+
+
+def _voter_flow(session, run: dict, i: int) -> list[tuple[str, float, bool]]:
+    vote_path = f'/vote/{run["election_id"]}/'
+    candidate_id = run['candidate_ids'][i % len(run['candidate_ids'])]
+    # (method, path, report label, form data, expected status, body marker)
+    steps = [
+        ('GET', '/login/', '/login/', None, 200, None),
+        ('POST', '/login/', '/login/', {'username': run['usernames'][i], 'password': run['password']}, 302, None),
+        ('GET', '/dashboard/', '/dashboard/', None, 200, None),
+        ('GET', vote_path, '/vote/<id>/', None, 200, None),
+        ('POST', vote_path, '/vote/<id>/', {'candidate_id': candidate_id}, 200, b'Thanks'),
+    ]
+    samples = []
+    for method, path, label, data, expected, marker in steps:
+        start = time.perf_counter()
+        status, body = session.request(method, path, data)
+        elapsed = time.perf_counter() - start
+        ok = status == expected and (marker is None or marker in body)
+        samples.append((f'{method} {label}', elapsed, ok))
+        if not ok:
+            break
+    return samples
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples, elapsed: float) -> dict:
+    """Per-endpoint ``count``, ``errors``, ``throughput_rps`` and latency percentiles (ms)."""
+    by_endpoint = defaultdict(list)
+    errors = defaultdict(int)
+    for endpoint, seconds, ok in samples:
+        by_endpoint[endpoint].append(seconds)
+        errors[endpoint] += not ok
+    report = {}
+    for endpoint, values in by_endpoint.items():
+        values.sort()
+        report[endpoint] = {
+            'count': len(values),
+            'errors': errors[endpoint],
+            'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2),
+        }
+    return report
+
+
+def run_load(run: dict, concurrency: int = 10, base_url: str | None = None) -> dict:
+    """Drive every seeded voter through login, dashboard and vote; return the JSON report.
+
+    With ``concurrency == 1`` voters run one after another on the calling
+    thread (and its database connection).
+    """
+    voters = len(run['usernames'])
+
+    def one(i):
+        session = _HttpSession(base_url) if base_url else _ClientSession()
+        try:
+            return _voter_flow(session, run, i)
+        finally:
+            if not base_url and concurrency > 1:
+                # each pool thread opened its own connection
+                connection.close()
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            flows = list(pool.map(one, range(voters)))
+    else:
+        flows = [one(i) for i in range(voters)]
+    elapsed = time.perf_counter() - started
+    samples = [s for flow in flows for s in flow]
+    completed = sum(1 for flow in flows if len(flow) == 5 and flow[-1][2])
+    return {
+        'target': base_url or 'in-process',
+        'database': connection.vendor,
+        'voters': voters,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'votes_completed': completed,
+        'votes_per_s': round(completed / elapsed, 2) if elapsed else 0.0,
+        'votes_stored': Vote.objects.filter(election_id=run['election_id']).count(),
+        'endpoints': summarize(samples, elapsed),
+    }
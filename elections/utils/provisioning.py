@@ -0,0 +1,122 @@
+"""Bulk provisioning of voter accounts.
+
+:func:`provision_voters` creates ``User`` and ``Profile`` rows for a CSV of
+voters (header ``username``, optionally ``email``, ``first_name``,
+``last_name``, ``phone``) with ``bulk_create``, in batches of
+``PROVISION_BATCH_SIZE``. Profiles are created confirmed and approved.
+Unlike ``register`` this fires no ``post_save`` signals, so nothing is saved
+twice. Each account gets a random one-time password, hashed in a process pool
+(see ``elections.utils.hashing``) while earlier batches are inserted. Given an
+election, the batch's users (new and existing) are put on its voter roll in
+the same transaction.
+"""
+import csv
+import secrets
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User, UserManager
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from elections.models import Profile, VoterStatus
+from elections.utils.counters import resync
+from elections.utils.hashing import hash_batches
+from elections.utils.stats import invalidate_site_stats
+
+FIELDS = ('username', 'email', 'first_name', 'last_name', 'phone')
+
+
+def _valid(username: str) -> bool:
+    if not username or len(username) > User._meta.get_field('username').max_length:
+        return False
+    try:
+        User.username_validator(username)
+    except ValidationError:
+        return False
+    return True
+
+
+def _batches(rows, batch_size, report, passwords):
+    """Group valid, unseen rows into ``(batch, passwords)``; the passwords are hashed next."""
+    seen = set()
+    batch = []
+    for row in rows:
+        report['rows'] += 1
+        entry = {f: (row.get(f) or '').strip() for f in FIELDS}
+        if not _valid(entry['username']):
+            report['invalid'] += 1
+        elif entry['username'] in seen:
+            report['duplicate'] += 1
+        else:
+            seen.add(entry['username'])
+            entry['password'] = secrets.token_urlsafe(12) if passwords else None
+            batch.append(entry)
+        if len(batch) >= batch_size:
+            yield batch, [e['password'] for e in batch]
+            batch = []
+    if batch:
+        yield batch, [e['password'] for e in batch]
+
+
+def _insert_batch(batch, hashes, election, report, credentials) -> None:
+    with transaction.atomic():
+        existing = dict(User.objects.filter(username__in=[e['username'] for e in batch]).values_list('username', 'id'))
+        new = [
+            User(
+                username=e['username'], password=h, email=UserManager.normalize_email(e['email']),
+                first_name=e['first_name'][:150], last_name=e['last_name'][:150],
+            )
+            for e, h in zip(batch, hashes) if e['username'] not in existing
+        ]
+        User.objects.bulk_create(new)
+        phones = {e['username']: e['phone'][:20] for e in batch}
+        Profile.objects.bulk_create([
+            Profile(user=u, phone=phones[u.username], role='voter', is_confirmed=True, is_approved=True) for u in new
+        ])
+        report['created'] += len(new)
+        report['existing'] += len(existing)
+        if election is not None:
+            on_roll = set(
+                VoterStatus.objects.filter(election=election, user_id__in=list(existing.values())).values_list('user_id', flat=True)
+            )
+            ids = [u.id for u in new] + [uid for uid in existing.values() if uid not in on_roll]
+            VoterStatus.objects.bulk_create([VoterStatus(election=election, user_id=uid) for uid in ids], ignore_conflicts=True)
+            # rows a concurrent import added meanwhile were skipped: re-derive the counter from the roll
+            resync(election.id, 'eligible_count')
+            report['linked'] += len(ids)
+    if credentials is not None:
+        # written only once the accounts are committed
+        credentials.writerows((e['username'], e['password']) for e in batch if e['username'] not in existing)
+
+
+def provision_voters(csv_file, election=None, passwords: bool = True, credentials=None,
+                     workers: int | None = None, batch_size: int | None = None) -> dict:
+    """Create confirmed, approved voter accounts for the rows of ``csv_file`` (a text stream).
+
+    With ``passwords`` each new account gets a random one-time password, written
+    as ``username,password`` rows to the ``credentials`` stream; otherwise the
+    accounts get unusable passwords (e.g. for ballot links sent by email).
+    Existing usernames are left unchanged but still put on ``election``'s roll.
+
+    Returns ``rows``, ``created``, ``existing``, ``duplicate`` (repeated in the
+    file), ``invalid`` (missing or malformed username), ``linked`` (added to the
+    roll) and ``seconds``.
+    """
+    started = time.perf_counter()
+    workers = workers or settings.PROVISION_WORKERS
+    batch_size = batch_size or settings.PROVISION_BATCH_SIZE
+    report = dict.fromkeys(('rows', 'created', 'existing', 'duplicate', 'invalid', 'linked'), 0)
+    writer = None
+    if credentials is not None and passwords:
+        writer = csv.writer(credentials)
+        writer.writerow(['username', 'password'])
+    batches = _batches(csv.DictReader(csv_file), batch_size, report, passwords)
+    # unusable passwords are cheap: no point starting a pool for them
+    for batch, hashes in hash_batches(batches, workers if passwords else 1):
+        _insert_batch(batch, hashes, election, report, writer)
+    if report['created'] or report['linked']:
+        # bulk_create skips the signal that drops the homepage KPIs
+        invalidate_site_stats()
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
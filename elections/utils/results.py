@@ -0,0 +1,103 @@
+"""Election results snapshots.
+
+Results are computed once, when an election concludes (``publish_results`` or
+the scheduled conclusion in ``elections.utils.schedule``), and stored as an
+``ElectionResult``. Later requests serve the stored row instead of
+re-aggregating. ``verify_snapshot`` recounts the ballots for audit.
+"""
+from django.db import IntegrityError, transaction
+
+from elections.models import Candidate, ElectionResult, VoterStatus
+from elections.utils.ingest import drain
+from elections.utils.ledger import ledger_head
+from elections.utils.tally import count_ballots, read_tally
+
+
+def compute_results(election, tally: dict | None = None) -> dict:
+    """Derive display-ready results for ``election`` from a ``{choice: count}`` tally.
+
+    Uses the running tally unless ``tally`` is given. Candidate names are
+    resolved with a single query.
+    """
+    if tally is None:
+        tally = read_tally(election)
+    total_votes = sum(tally.values())
+    names = dict(Candidate.objects.filter(election=election).values_list('id', 'name'))
+
+    def display(choice):
+        # votes are stored as 'candidate:<id>'; map to the candidate name when possible
+        if isinstance(choice, str) and choice.startswith('candidate:'):
+            try:
+                return names.get(int(choice.split(':', 1)[1]), choice)
+            except ValueError:
+                pass
+        return choice
+
+    rows = []
+    for choice, count in tally.items():
+        pct = (count / total_votes * 100) if total_votes > 0 else 0
+        rows.append({'choice': display(choice), 'raw_choice': choice, 'count': count, 'percentage': round(pct, 2)})
+
+    winners = []
+    margin_votes = 0
+    margin_percentage = 0
+    if tally:
+        max_votes = max(tally.values())
+        winners = [c for c, v in tally.items() if v == max_votes]
+        # winning margin (difference between top and second place); a tie has zero margin
+        if len(winners) == 1 and total_votes > 0:
+            sorted_counts = sorted(tally.values(), reverse=True)
+            second = sorted_counts[1] if len(sorted_counts) > 1 else 0
+            margin_votes = sorted_counts[0] - second
+            margin_percentage = round((margin_votes / total_votes * 100), 2)
+
+    total_voters = VoterStatus.objects.filter(election=election).count()
+    labels = list(tally.keys())
+    ledger_size, ledger_root = ledger_head(election)
+    return {
+        'rows': rows,
+        'winners': winners,
+        'winners_display': [display(w) for w in winners],
+        'total_votes': total_votes,
+        'total_voters': total_voters,
+        'casting_percentage': round((total_votes / total_voters * 100), 2) if total_voters > 0 else 0,
+        'margin_votes': margin_votes,
+        'margin_percentage': margin_percentage,
+        'chart_labels': labels,
+        'chart_values': [tally[k] for k in labels],
+        'ledger_size': ledger_size,
+        'ledger_root': ledger_root,
+    }
+
+
+def build_snapshot(election) -> ElectionResult:
+    """Return the results snapshot of ``election``, computing it if it does not exist yet."""
+    snapshot = ElectionResult.objects.filter(election=election).first()
+    if snapshot is not None:
+        return snapshot
+    # ballots still in the ingestion queue were accepted and must be counted
+    drain(election)
+    try:
+        with transaction.atomic():
+            return ElectionResult.objects.create(election=election, **compute_results(election))
+    except IntegrityError:
+        # another request concluded the election first
+        return ElectionResult.objects.get(election=election)
+
+
+def rebuild_snapshot(election) -> ElectionResult:
+    """Recompute the snapshot of ``election`` from its running tally and overwrite it."""
+    drain(election)
+    snapshot, _ = ElectionResult.objects.update_or_create(election=election, defaults=compute_results(election))
+    return snapshot
+
+
+def verify_snapshot(election) -> dict:
+    """Compare the stored snapshot of ``election`` with a recount of its ballots.
+
+    Returns ``{'stored': {...} | None, 'derived': {...}, 'undecryptable': n, 'match': bool}``.
+    """
+    snapshot = ElectionResult.objects.filter(election=election).first()
+    derived, failed = count_ballots(election)
+    stored = snapshot.tally if snapshot else None
+    return {'stored': stored, 'derived': derived, 'undecryptable': failed, 'match': stored == derived}
@@ -0,0 +1,93 @@
+"""Election status transitions: pending -> active -> concluded.
+
+``apply_due_transitions`` moves every election whose start or end time has
+passed and fires ``election_concluded`` (see ``elections/signals.py``: result
+snapshot, creator notification) once per concluded election. The
+``run_scheduler`` command calls it exactly when the next transition is due.
+
+Request handlers call ``ensure_statuses`` instead. It keeps the time of the
+next transition in process memory and does nothing until that time has
+passed, so reads do not write. Saving an election through the ORM clears the
+cached time. Changes made elsewhere (``.update()``, another process) are
+picked up within ``SCHEDULE_RECHECK_SECONDS``.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from elections.models import Election
+from elections.signals import election_concluded
+
+_NEXT = {'due': None, 'checked': 0.0}
+_LOCK = threading.Lock()
+
+
+def next_transition(now=None):
+    """Return when the next transition is due: a datetime, ``now`` if one is overdue, or ``None``."""
+    now = now or timezone.now()
+    row = Election.objects.aggregate(
+        next_start=Min('start_time', filter=Q(status='pending')),
+        next_end=Min('end_time', filter=~Q(status='concluded')),
+        # an active election edited to start in the future goes back to pending
+        reverted=Count('pk', filter=Q(status='active', start_time__gt=now)),
+    )
+    if row['reverted']:
+        return now
+    times = [t for t in (row['next_start'], row['next_end']) if t is not None]
+    return min(times) if times else None
+
+
+def apply_due_transitions(now=None) -> dict:
+    """Apply every transition due at ``now``; return ``{'activated', 'reverted', 'concluded'}`` counts."""
+    now = now or timezone.now()
+    activated = Election.objects.filter(status='pending', start_time__lte=now, end_time__gt=now).update(status='active')
+    reverted = Election.objects.filter(status='active', start_time__gt=now).update(status='pending')
+    concluded = 0
+    for election_id in Election.objects.filter(end_time__lte=now).exclude(status='concluded').values_list('id', flat=True):
+        # claimed one by one so that of two concurrent schedulers only one fires the hooks
+        claimed = Election.objects.filter(pk=election_id).exclude(status='concluded').update(
+            status='concluded',
+            published_at=now,
+            published_by=None,
+            publish_attempts=0,
+            publish_blocked_until=None,
+        )
+        if claimed:
+            concluded += 1
+            election_concluded.send(sender=Election, election=Election.objects.get(pk=election_id), automatic=True)
+    _remember(next_transition(now))
+    return {'activated': activated, 'reverted': reverted, 'concluded': concluded}
+
+
+def _remember(due) -> None:
+    with _LOCK:
+        _NEXT['due'] = due
+        _NEXT['checked'] = time.monotonic()
+
+
+def forget_next_transition() -> None:
+    """Drop the cached next-transition time; the next ``ensure_statuses`` call re-reads it."""
+    with _LOCK:
+        _NEXT['checked'] = 0.0
+
+
+def ensure_statuses() -> None:
+    """Apply transitions if one is overdue; otherwise return without touching the database.
+
+    Re-reads the next transition time at most every ``SCHEDULE_RECHECK_SECONDS``.
+    """
+    now = timezone.now()
+    with _LOCK:
+        due, checked = _NEXT['due'], _NEXT['checked']
+    fresh = checked and time.monotonic() - checked < settings.SCHEDULE_RECHECK_SECONDS
+    if fresh and (due is None or due > now):
+        return
+    if not fresh:
+        due = next_transition(now)
+        if due is None or due > now:
+            _remember(due)
+            return
+    apply_due_transitions(now)
@@ -0,0 +1,156 @@
+"""Site-wide KPIs for the homepage and the admin dashboard.
+
+``site_stats`` computes the election count, ballot count and average turnout
+with one aggregate query and caches the result for
+``SITE_STATS_TTL`` seconds, so the homepage costs the same however many
+elections exist. Creating or deleting an election and changing a voter roll
+drop the cached value (see ``elections/signals.py``); new ballots show up once
+the TTL expires, so a busy voting window does not recompute it on every page view.
+
+``dashboard_kpis`` serves the admin dashboard's global figures from the cache
+and, once they are older than ``DASHBOARD_KPI_TTL`` seconds, recomputes them on
+a background thread while requests keep getting the previous value.
+Both read the per-election counters on ``Election`` (see ``elections.utils.counters``)
+and the hourly vote rollup (``elections.utils.activity``), never the ballots.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Avg, Case, Count, F, FloatField, Q, Sum, When
+from django.utils import timezone
+
+from elections.models import Election, Profile
+from elections.utils.activity import hour_of, hourly_counts
+
+CACHE_KEY = 'elections:site_stats'
+KPI_CACHE_KEY = 'elections:dashboard_kpis:{scope}'
+
+
+def _avg_turnout():
+    # mean of votes/eligible over elections with at least one eligible voter
+    return Avg(Case(
+        When(eligible_count__gt=0, then=F('votes_cast') * 1.0 / F('eligible_count')),
+        output_field=FloatField(),
+    ))
+
+
+def compute_site_stats() -> dict:
+    """Return ``total_elections``, ``total_votes`` and ``avg_turnout_pct`` from one query over the election counters."""
+    row = Election.objects.aggregate(
+        total_elections=Count('pk'), total_votes=Sum('votes_cast'), avg_turnout=_avg_turnout(),
+    )
+    return {
+        'total_elections': row['total_elections'],
+        'total_votes': row['total_votes'] or 0,
+        'avg_turnout_pct': round(row['avg_turnout'] * 100, 2) if row['avg_turnout'] is not None else 0,
+    }
+
+
+def site_stats() -> dict:
+    """Cached :func:`compute_site_stats`."""
+    stats = cache.get(CACHE_KEY)
+    if stats is None:
+        stats = compute_site_stats()
+        cache.set(CACHE_KEY, stats, settings.SITE_STATS_TTL)
+    return stats
+
+
+def invalidate_site_stats() -> None:
+    cache.delete(CACHE_KEY)
+
+
+def compute_dashboard_kpis(created_by_id: int | None = None) -> dict:
+    """Admin dashboard KPIs, over all elections or those created by ``created_by_id``."""
+    elections = Election.objects.all()
+    if created_by_id is not None:
+        elections = elections.filter(created_by_id=created_by_id)
+    row = elections.aggregate(
+        total_elections=Count('pk'),
+        pending=Count('pk', filter=Q(status='pending')),
+        active=Count('pk', filter=Q(status='active')),
+        concluded=Count('pk', filter=Q(status='concluded')),
+        avg_turnout=_avg_turnout(),
+    )
+    voters = Profile.objects.filter(role='voter').aggregate(
+        voters_total=Count('pk'),
+        voters_confirmed=Count('pk', filter=Q(is_confirmed=True)),
+        approvals_pending=Count('pk', filter=Q(is_confirmed=True, is_approved=False)),
+    )
+    now = timezone.now()
+    # votes per hour over the last 24h, and since local midnight, from the hourly rollup
+    # (local midnight is an hour boundary for whole-hour UTC offsets such as TIME_ZONE's)
+    midnight = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = hour_of(now) - timedelta(hours=23)
+    bucket = hourly_counts(min(start, midnight))
+    votes_today = sum(n for h, n in bucket.items() if h >= midnight)
+    hourly_labels = []
+    hourly_values = []
+    for i in range(24):
+        t = start + timedelta(hours=i)
+        hourly_labels.append(timezone.localtime(t).strftime('%H:%M'))
+        hourly_values.append(bucket.get(t, 0))
+
+    return {
+        'total_elections': row['total_elections'],
+        'counts_by_status': {k: row[k] for k in ('pending', 'active', 'concluded')},
+        **voters,
+        'votes_today': votes_today,
+        'avg_turnout_pct': round(row['avg_turnout'] * 100, 2) if row['avg_turnout'] is not None else 0,
+        'activity_labels_json': json.dumps(hourly_labels),
+        'activity_values_json': json.dumps(hourly_values),
+    }
+
+
+_KPI_EXECUTOR = None
+_KPI_EXECUTOR_LOCK = threading.Lock()
+
+
+def kpi_executor() -> ThreadPoolExecutor:
+    """Process-wide single thread that recomputes stale dashboard KPIs."""
+    global _KPI_EXECUTOR
+    if _KPI_EXECUTOR is None:
+        with _KPI_EXECUTOR_LOCK:
+            if _KPI_EXECUTOR is None:
+                _KPI_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kpi')
+    return _KPI_EXECUTOR
+
+
+def _kpi_scope(user) -> int | None:
+    return None if getattr(user, 'is_superuser', False) else user.pk
+
+
+def refresh_dashboard_kpis(created_by_id: int | None = None, background: bool = False) -> dict:
+    """Recompute and cache the KPIs for one scope (``None``: every election)."""
+    key = KPI_CACHE_KEY.format(scope=created_by_id or 'all')
+    try:
+        kpis = compute_dashboard_kpis(created_by_id)
+        # kept well past the TTL so stale values can be served while refreshing
+        cache.set(key, (time.time(), kpis), settings.DASHBOARD_KPI_TTL * 10)
+        return kpis
+    finally:
+        cache.delete(key + ':refreshing')
+        if background:
+            connection.close()
+
+
+def dashboard_kpis(user) -> dict:
+    """Cached :func:`compute_dashboard_kpis` for the elections ``user`` administers.
+
+    Computed inline only when nothing is cached. A value older than
+    ``DASHBOARD_KPI_TTL`` is still returned while one background refresh runs.
+    """
+    scope = _kpi_scope(user)
+    key = KPI_CACHE_KEY.format(scope=scope or 'all')
+    cached = cache.get(key)
+    if cached is None:
+        return refresh_dashboard_kpis(scope)
+    computed_at, kpis = cached
+    if time.time() - computed_at > settings.DASHBOARD_KPI_TTL and cache.add(key + ':refreshing', 1, 60):
+        kpi_executor().submit(refresh_dashboard_kpis, scope, True)
+    return kpis
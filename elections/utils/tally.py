@@ -0,0 +1,214 @@
+"""Running per-election tallies.
+
+``cast_ballot`` calls :func:`record_vote` inside the transaction that stores the
+``Vote``, so results pages can read the current counts with a single
+decryption via :func:`read_tally` instead of decrypting every ballot.
+:func:`count_ballots` re-derives the counts from the ballot ciphertexts and is
+used to seed missing tallies and by the ``reconcile_tallies`` command.
+
+For ``elgamal`` elections the stored state is not a sealed count but the
+homomorphic aggregate of all ballots: casting multiplies the new ballot in
+(no decryption at all) and reading decrypts the aggregate once.
+"""
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from elections.models import Election, ElectionTally, Vote
+from elections.utils import homomorphic
+from elections.utils.ballots import secret_key
+from elections.utils.crypto import count_votes, encrypt_vote, decrypt_vote
+
+# recounts redone when ballots land in the tally while one runs (see reconcile_tally)
+RECONCILE_ATTEMPTS = 3
+
+
+def _tally_aad(election_id) -> str:
+    # distinct from the ballot AAD (plain election id) so a sealed tally can
+    # never be passed off as a ballot or vice versa
+    return f'tally:{election_id}'
+
+
+def seal_counts(election_id, counts: dict) -> bytes:
+    return encrypt_vote(json.dumps(counts, separators=(',', ':')), associated_data=_tally_aad(election_id))
+
+
+def open_counts(election_id, sealed) -> dict:
+    return json.loads(decrypt_vote(sealed, associated_data=_tally_aad(election_id)))
+
+
+def iter_ballot_chunks(election, chunk_size: int):
+    """Yield lists of ``(id, encrypted_vote_data)`` for ``election`` in id order.
+
+    Uses keyset pagination so each chunk is one short query and no model
+    instances or long-lived cursors are kept around.
+    """
+    qs = Vote.objects.filter(election=election).order_by('id').values_list('id', 'encrypted_vote_data')
+    last_id = 0
+    while True:
+        rows = list(qs.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def aggregate_ballots(election, chunk_size: int | None = None) -> tuple[dict, int, int]:
+    """Multiply together every ElGamal ballot of ``election``.
+
+    Returns ``(aggregate, ballots combined, malformed ballots)``; nothing is decrypted.
+    """
+    chunk_size = chunk_size or settings.TALLY_CHUNK_SIZE
+    aggregate = {}
+    combined = 0
+    failed = 0
+    for rows in iter_ballot_chunks(election, chunk_size):
+        for _id, blob in rows:
+            try:
+                homomorphic.combine(aggregate, homomorphic.loads(blob))
+            except ValueError:
+                failed += 1
+                continue
+            combined += 1
+    return aggregate, combined, failed
+
+
+def _decrypt_aggregate(election, aggregate: dict, ballots: int) -> dict:
+    counts = homomorphic.decrypt_aggregate(secret_key(election), aggregate, upper=ballots)
+    # same shape as AES tallies: only choices that received votes
+    return {f'candidate:{cid}': n for cid, n in counts.items() if n}
+
+
+def count_ballots(election, workers: int | None = None, chunk_size: int | None = None) -> tuple[dict, int]:
+    """Decrypt every ballot of ``election`` and return ``(counts, undecryptable)``.
+
+    Ballots are streamed from the database in chunks and decrypted by
+    ``TALLY_WORKERS`` processes. Ballots that fail authentication (missing key /
+    tampered) are skipped and reported in the second element rather than
+    aborting the count. ElGamal ballots are aggregated and only the aggregate
+    is decrypted.
+    """
+    if election.ballot_scheme == Election.SCHEME_ELGAMAL:
+        aggregate, combined, failed = aggregate_ballots(election, chunk_size)
+        return _decrypt_aggregate(election, aggregate, combined), failed
+    workers = workers or settings.TALLY_WORKERS
+    chunk_size = chunk_size or settings.TALLY_CHUNK_SIZE
+    return count_votes(iter_ballot_chunks(election, chunk_size), associated_data=str(election.id), workers=workers)
+
+
+def _state_from_ballots(election) -> tuple[bytes, int]:
+    """Stored tally state re-derived from the ballots: ``(sealed state, ballots)``."""
+    if election.ballot_scheme == Election.SCHEME_ELGAMAL:
+        aggregate, combined, _ = aggregate_ballots(election)
+        return homomorphic.dumps(aggregate), combined
+    counts, _ = count_ballots(election)
+    return seal_counts(election.id, counts), sum(counts.values())
+
+
+def _open_state(election, tally) -> dict:
+    if election.ballot_scheme == Election.SCHEME_ELGAMAL:
+        return _decrypt_aggregate(election, homomorphic.loads(tally.sealed_counts), tally.ballots_counted)
+    return open_counts(election.id, tally.sealed_counts)
+
+
+def _seed_tally(election) -> ElectionTally:
+    sealed, ballots = _state_from_ballots(election)
+    return ElectionTally.objects.create(election=election, sealed_counts=sealed, ballots_counted=ballots)
+
+
+def read_tally(election) -> dict:
+    """Return the current ``{choice: count}`` mapping for ``election``.
+
+    Elections that predate the tally store are counted from their ballots once
+    and the result is persisted.
+    """
+    tally = ElectionTally.objects.filter(election=election).first()
+    if tally is None:
+        try:
+            with transaction.atomic():
+                tally = _seed_tally(election)
+        except IntegrityError:
+            tally = ElectionTally.objects.get(election=election)
+    return _open_state(election, tally)
+
+
+def record_vote(election, choice: str, ballot=None) -> None:
+    """Add one ballot for ``choice`` to the running tally of ``election``.
+
+    Must be called inside ``transaction.atomic()`` *before* the ``Vote`` row is
+    inserted; the tally row is locked so concurrent ballots serialise here.
+    ElGamal elections need the sealed ``ballot`` itself, which is multiplied
+    into the aggregate without being decrypted.
+    """
+    record_votes(election, [(choice, ballot)])
+
+
+def record_votes(election, entries) -> None:
+    """Add ``(choice, ballot)`` pairs to the running tally with a single open/seal.
+
+    Same contract as :func:`record_vote`; ``choice`` may be ``None`` for
+    ElGamal ballots.
+    """
+    tally = ElectionTally.objects.select_for_update().filter(election=election).first()
+    if tally is None:
+        try:
+            with transaction.atomic():
+                tally = _seed_tally(election)
+        except IntegrityError:
+            pass
+        tally = ElectionTally.objects.select_for_update().get(election=election)
+    if election.ballot_scheme == Election.SCHEME_ELGAMAL:
+        aggregate = homomorphic.loads(tally.sealed_counts)
+        for _, ballot in entries:
+            homomorphic.combine(aggregate, homomorphic.loads(ballot))
+        tally.sealed_counts = homomorphic.dumps(aggregate)
+    else:
+        counts = open_counts(election.id, tally.sealed_counts)
+        for choice, _ in entries:
+            counts[choice] = counts.get(choice, 0) + 1
+        tally.sealed_counts = seal_counts(election.id, counts)
+    tally.ballots_counted = (tally.ballots_counted or 0) + len(entries)
+    tally.save(update_fields=['sealed_counts', 'ballots_counted', 'updated_at'])
+
+
+def _recount(election, workers: int | None = None) -> tuple[dict, int, bytes, int]:
+    """Full recount: ``(counts, undecryptable, sealed state, ballots)``, the last two as stored on the tally row."""
+    if election.ballot_scheme == Election.SCHEME_ELGAMAL:
+        aggregate, combined, failed = aggregate_ballots(election)
+        return _decrypt_aggregate(election, aggregate, combined), failed, homomorphic.dumps(aggregate), combined
+    counts, failed = count_ballots(election, workers=workers)
+    return counts, failed, seal_counts(election.id, counts), sum(counts.values())
+
+
+def reconcile_tally(election, repair: bool = False, workers: int | None = None) -> dict:
+    """Compare the stored tally of ``election`` with a full recount.
+
+    Returns a report dict with ``stored``, ``derived``, ``undecryptable``,
+    ``match`` and ``busy``. With ``repair=True`` a mismatching (or missing)
+    tally is replaced by the recount.
+
+    The recount runs without the tally lock, so ballots keep being cast; the
+    lock is held only to compare and repair. If the tally changed during the
+    recount, the recount is stale and is redone, up to
+    ``RECONCILE_ATTEMPTS`` times. A tally still changing after that is left
+    alone and reported ``busy`` (``match`` is ``None``).
+    """
+    for _ in range(RECONCILE_ATTEMPTS):
+        seen = ElectionTally.objects.filter(election=election).values_list('updated_at', 'ballots_counted').first()
+        derived, failed, sealed, ballots = _recount(election, workers)
+        with transaction.atomic():
+            tally = ElectionTally.objects.select_for_update().filter(election=election).first()
+            if (tally and (tally.updated_at, tally.ballots_counted)) != seen:
+                continue
+            stored = _open_state(election, tally) if tally else None
+            match = stored == derived
+            if repair and not match:
+                if tally is None:
+                    ElectionTally.objects.create(election=election, sealed_counts=sealed, ballots_counted=ballots)
+                else:
+                    tally.sealed_counts = sealed
+                    tally.ballots_counted = ballots
+                    tally.save(update_fields=['sealed_counts', 'ballots_counted', 'updated_at'])
+        return {'stored': stored, 'derived': derived, 'undecryptable': failed, 'match': match, 'busy': False}
+    return {'stored': None, 'derived': derived, 'undecryptable': failed, 'match': None, 'busy': True}
@@ -0,0 +1,164 @@
+"""Voter-roll CSV import, run as background jobs.
+
+:func:`import_voters` reads a CSV (header ``username``) as a stream, in chunks
+of ``VOTER_IMPORT_CHUNK_SIZE`` rows. Each chunk costs the same few queries
+however large it is: the usernames are resolved with ``username__in``, the
+voters already on the roll are looked up, the new ``VoterStatus`` rows are
+inserted with ``bulk_create(ignore_conflicts=True)``, and the chunk's rejected
+rows are appended to ``RejectedVoterRow``. The import's progress counters are
+saved in the same transaction. Memory stays bounded by the chunk size.
+``ignore_conflicts`` silently skips voters that a concurrent import added
+meanwhile, so the election's ``eligible_count`` is re-derived from the roll
+once, when the import stops.
+
+Uploads become jobs: :func:`create_import_job` stores the file and queues a
+``VoterImport``, and the ``run_import_jobs`` worker claims queued jobs with
+:func:`claim_next_job` and runs them with :func:`run_import_job`. Progress is
+checkpointed per chunk, so a job whose worker died, i.e. one still
+``running`` but not updated for ``VOTER_IMPORT_STALE_SECONDS``, is claimed
+again and resumes after its last committed chunk.
+"""
+import csv
+import time
+from datetime import timedelta
+from io import TextIOWrapper
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from elections.models import RejectedVoterRow, VoterImport, VoterStatus
+from elections.utils.counters import resync
+from elections.utils.stats import invalidate_site_stats
+
+CHECKPOINT_FIELDS = ['rows', 'imported', 'duplicate', 'unknown', 'seconds', 'updated_at']
+
+
+def _import_chunk(election, chunk, report) -> None:
+    started = time.perf_counter()
+    lines = {}
+    rejected = []
+    for line, username in chunk:
+        if not username:
+            report.unknown += 1
+            rejected.append((line, '', 'missing username'))
+        elif username in lines:
+            report.duplicate += 1
+        else:
+            lines[username] = line
+    with transaction.atomic():
+        ids = dict(User.objects.filter(username__in=list(lines)).values_list('username', 'id'))
+        for username, line in lines.items():
+            if username not in ids:
+                report.unknown += 1
+                rejected.append((line, username, 'unknown user'))
+        on_roll = set(
+            VoterStatus.objects.filter(election=election, user_id__in=list(ids.values())).values_list('user_id', flat=True)
+        )
+        new = [VoterStatus(election=election, user_id=uid) for uid in ids.values() if uid not in on_roll]
+        VoterStatus.objects.bulk_create(new, ignore_conflicts=True)
+        report.imported += len(new)
+        report.duplicate += len(on_roll)
+        report.rows += len(chunk)
+        if rejected:
+            RejectedVoterRow.objects.bulk_create([
+                RejectedVoterRow(voter_import=report, line=line, username=username, reason=reason)
+                for line, username, reason in sorted(rejected)
+            ])
+        report.seconds += time.perf_counter() - started
+        # the checkpoint commits with the chunk: a resumed job skips exactly these rows
+        report.save(update_fields=CHECKPOINT_FIELDS)
+
+
+def _import(report, csv_file, chunk_size=None) -> None:
+    chunk_size = chunk_size or settings.VOTER_IMPORT_CHUNK_SIZE
+    skip = report.rows
+    reader = csv.DictReader(csv_file)
+    chunk = []
+    try:
+        for row in reader:
+            if skip:
+                skip -= 1
+                continue
+            chunk.append((reader.line_num, (row.get('username') or '').strip()))
+            if len(chunk) >= chunk_size:
+                _import_chunk(report.election, chunk, report)
+                chunk = []
+        if chunk:
+            _import_chunk(report.election, chunk, report)
+    finally:
+        # once per import rather than per chunk, and also after a failed chunk
+        resync(report.election_id, 'eligible_count')
+    if report.imported:
+        # bulk_create skips the signal that drops the homepage KPIs
+        invalidate_site_stats()
+
+
+def import_voters(election, csv_file, created_by=None, chunk_size: int | None = None) -> VoterImport:
+    """Add the users named in ``csv_file`` (a text stream) to ``election``'s voter roll, in this process.
+
+    Returns the saved :class:`VoterImport` with ``rows``, ``imported``,
+    ``duplicate`` (already on the roll or repeated in the file) and ``unknown``
+    (no such user, or no username) counts.
+    """
+    report = VoterImport.objects.create(election=election, created_by=created_by, status='running')
+    _import(report, csv_file, chunk_size)
+    report.status = 'done'
+    report.finished_at = timezone.now()
+    report.save()
+    return report
+
+
+def create_import_job(election, uploaded_file, created_by=None, queued: bool = True) -> VoterImport:
+    """Store ``uploaded_file`` and queue a :class:`VoterImport` job for it.
+
+    With ``queued=False`` the job is created already claimed, for the caller
+    to run with :func:`run_import_job`; if the caller dies, the job goes stale
+    and a worker resumes it.
+    """
+    job = VoterImport(election=election, created_by=created_by, status='queued' if queued else 'running')
+    job.csv_file.save(f'election-{election.id}.csv', uploaded_file, save=False)
+    job.save()
+    return job
+
+
+def claim_next_job() -> VoterImport | None:
+    """Claim the oldest queued job, or a running one whose worker stopped checkpointing."""
+    now = timezone.now()
+    claimable = Q(status='queued') | Q(
+        status='running', updated_at__lt=now - timedelta(seconds=settings.VOTER_IMPORT_STALE_SECONDS)
+    )
+    for job_id in VoterImport.objects.filter(claimable).order_by('id').values_list('id', flat=True)[:5]:
+        # conditional UPDATE: of two workers racing for a job only one wins it
+        if VoterImport.objects.filter(claimable, pk=job_id).update(status='running', updated_at=now):
+            return VoterImport.objects.select_related('election').get(pk=job_id)
+    return None
+
+
+def _count_rows(path) -> int:
+    with open(path, 'rb') as fh:
+        lines = sum(1 for line in fh if line.strip())
+    return max(0, lines - 1)
+
+
+def run_import_job(job, chunk_size: int | None = None) -> VoterImport:
+    """Run (or resume) a claimed job to completion; failures are recorded on the job, not raised."""
+    try:
+        if job.total_rows is None:
+            job.total_rows = _count_rows(job.csv_file.path)
+            job.save(update_fields=['total_rows', 'updated_at'])
+        with job.csv_file.open('rb') as fh:
+            _import(job, TextIOWrapper(fh, encoding='utf-8-sig', newline=''), chunk_size)
+    except Exception as exc:
+        job.status = 'failed'
+        job.error = f'{type(exc).__name__}: {exc}'
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return job
+    job.status = 'done'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at', 'updated_at'])
+    # the roll is imported; the uploaded file is not kept
+    job.csv_file.delete(save=True)
+    return job
@@ -1,6 +1,8 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, HttpResponseForbidden, HttpResponseRedirect
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseRedirect, StreamingHttpResponse, JsonResponse
 from django.contrib.auth import login, authenticate
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib.auth import logout
 from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
@@ -8,114 +10,74 @@ from .forms import RegistrationForm
 from .forms import ContactForm
 from django.contrib.auth.models import User
 from .models import Profile
+from .middleware import resolve_role
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.utils import timezone
-from django.db.models import Count, Q
-from django.db.models.functions import TruncHour
 from datetime import timedelta
-from .models import Election, Candidate, Vote, VoterStatus, Feedback
+from .models import Election, Candidate, VoterStatus, Feedback, ElectionResult, VoterImport, VoteActivity
+from .signals import election_concluded
 from .forms import VoteForm
-from .utils.crypto import encrypt_vote, decrypt_vote
+from .utils.ballots import (
+    BallotRejected, InvalidCandidate, NotEligible, acast_ballot, setup_ballot_scheme,
+)
+from .utils.ballot_links import read_ballot_token
+from .utils.tally import read_tally
+from .utils.results import build_snapshot
+from .utils.activity import turnout_series
+from .utils.live import astream_turnout, stream_turnout
+from .utils.schedule import ensure_statuses
+from .utils.stats import dashboard_kpis, site_stats
+from .utils.voter_import import create_import_job, run_import_job
+from .utils.ledger import inclusion_proof, ledger_head, verify_inclusion
 from .forms import ElectionForm, VoterUploadForm
 from .forms import PublishKeyRotateForm
 from .forms import CandidateForm
 from datetime import datetime, timezone as _timezone
 import csv
-from io import TextIOWrapper
-from django.http import HttpResponse
-import io
+import itertools
 import json
+import re
 from django.core import signing
 from django.core.mail import send_mail
 from django.conf import settings
 
 
+def _role_scoped(request, elections):
+    """The ``elections`` the requester may see: all for superusers, their own for admins, eligible ones for voters."""
+    role = request.role
+    if not role.is_authenticated:
+        # Anonymous users do not see restricted elections
+        return elections.none()
+    if role.is_superuser:
+        return elections
+    if role.name == 'admin':
+        return elections.filter(created_by=request.user)
+    return elections.filter(voterstatus__user=request.user)
+
+
 def index(request):
     # Enhanced home with active/upcoming elections and stats
     now = timezone.now()
-    # Auto-sync statuses so pending -> active when start_time passes
-    _sync_election_statuses()
+    # Apply pending -> active -> concluded if a transition is overdue (no writes otherwise)
+    ensure_statuses()
     # Active elections with quick metrics, filtered by role
-    active_qs = Election.objects.filter(start_time__lte=now, end_time__gte=now)
-    if request.user.is_authenticated:
-        # Superusers see all
-        if getattr(request.user, 'is_superuser', False):
-            pass
-        else:
-            # Admins see only their own; voters only eligible
-            try:
-                if request.user.profile.role == 'admin':
-                    active_qs = active_qs.filter(created_by=request.user)
-                else:
-                    active_qs = active_qs.filter(voterstatus__user=request.user)
-            except Exception:
-                active_qs = active_qs.filter(voterstatus__user=request.user)
-    else:
-        # Anonymous users do not see restricted elections
-        active_qs = active_qs.none()
-
-    active = (
-        active_qs
-        .annotate(
-            candidates_count=Count('candidates', distinct=True),
-            votes_cast=Count('votes', distinct=True),
-        )
-        .order_by('end_time')
-    )
+    active_qs = _role_scoped(request, Election.objects.filter(start_time__lte=now, end_time__gte=now))
+    # candidates_count and votes_cast are counters on Election
+    active = active_qs.order_by('end_time')
     # Upcoming elections (role-scoped)
-    upcoming_qs = Election.objects.filter(start_time__gt=now)
-    if request.user.is_authenticated:
-        if getattr(request.user, 'is_superuser', False):
-            pass
-        else:
-            try:
-                if request.user.profile.role == 'admin':
-                    upcoming_qs = upcoming_qs.filter(created_by=request.user)
-                else:
-                    upcoming_qs = upcoming_qs.filter(voterstatus__user=request.user)
-            except Exception:
-                upcoming_qs = upcoming_qs.filter(voterstatus__user=request.user)
-    else:
-        upcoming_qs = upcoming_qs.none()
-    upcoming = upcoming_qs.order_by('start_time')[:6]
-
+    upcoming = _role_scoped(request, Election.objects.filter(start_time__gt=now)).order_by('start_time')[:6]
     # Recently concluded (role-scoped)
-    concluded_qs = Election.objects.filter(status='concluded')
-    if request.user.is_authenticated:
-        if getattr(request.user, 'is_superuser', False):
-            pass
-        else:
-            try:
-                if request.user.profile.role == 'admin':
-                    concluded_qs = concluded_qs.filter(created_by=request.user)
-                else:
-                    concluded_qs = concluded_qs.filter(voterstatus__user=request.user)
-            except Exception:
-                concluded_qs = concluded_qs.filter(voterstatus__user=request.user)
-    else:
-        concluded_qs = concluded_qs.none()
-    concluded_recent = concluded_qs.order_by('-end_time')[:2]
-
-    # Totals and average turnout across elections with eligible > 0
-    total_elections = Election.objects.count()
-    total_votes = Vote.objects.count()
-
-    # average turnout: avg(votes/eligible) per election
-    turnouts = []
-    for e in Election.objects.all():
-        eligible = VoterStatus.objects.filter(election=e).count()
-        votes_cast = Vote.objects.filter(election=e).count()
-        if eligible > 0:
-            turnouts.append(votes_cast / eligible)
-    avg_turnout_pct = round((sum(turnouts) / len(turnouts) * 100), 2) if turnouts else 0
+    concluded_recent = _role_scoped(request, Election.objects.filter(status='concluded')).order_by('-end_time')[:2]
+
+    # Totals and average turnout across elections with eligible > 0 (cached)
+    stats = site_stats()
 
     context = {
         'elections': active,
         'upcoming': upcoming,
         'concluded_recent': concluded_recent,
-        'total_elections': total_elections,
-        'total_votes': total_votes,
-        'avg_turnout_pct': avg_turnout_pct,
+        **stats,
         'now': now,
     }
     return render(request, 'index.html', context)
@@ -308,11 +270,7 @@ def user_login(request):
             user = form.get_user()
             login(request, user)
             # redirect admins to admin dashboard
-            try:
-                is_admin = user.is_superuser or user.is_staff or user.profile.role == 'admin'
-            except Exception:
-                is_admin = False
-            if is_admin:
+            if resolve_role(user).is_admin:
                 return redirect('admin_dashboard')
             return redirect('voter_dashboard')
     else:
@@ -321,50 +279,97 @@ def user_login(request):
 
 
 @login_required
-def voter_dashboard(request):
+async def voter_dashboard(request):
     # list elections the user is eligible for (voters only)
     now = timezone.now()
-    _sync_election_statuses()
-    statuses = (
-        VoterStatus.objects
-        .filter(user=request.user, election__start_time__lte=now, election__end_time__gte=now)
+    await sync_to_async(ensure_statuses)()
+    user = await request.auser()
+    statuses = [
+        s async for s in VoterStatus.objects
+        .filter(user=user, election__start_time__lte=now, election__end_time__gte=now)
         .select_related('election')
         .order_by('election__end_time')
-    )
-    return render(request, 'voter_dashboard.html', {'statuses': statuses, 'now': now})
+    ]
+    # rendered in the sync thread: the context processors use the sync ORM
+    return await sync_to_async(render)(request, 'voter_dashboard.html', {'statuses': statuses, 'now': now})
 
 
 @login_required
-def vote_view(request, election_id):
-    election = get_object_or_404(Election, pk=election_id)
-    # Only eligible voters can vote; admins/superusers cannot cast votes by default
-    try:
-        status = VoterStatus.objects.get(user=request.user, election=election)
-    except VoterStatus.DoesNotExist:
+async def vote_view(request, election_id):
+    election = await aget_object_or_404(Election, pk=election_id)
+    user = await request.auser()
+    # Only eligible voters can vote; admins/superusers cannot cast votes by default.
+    # Checked before a ballot is sealed, so refused POSTs cost no crypto work.
+    status = await VoterStatus.objects.filter(user=user, election=election).values_list('has_voted', flat=True).afirst()
+    if status is None:
         return HttpResponseForbidden('You are not eligible to vote in this election')
-    if status.has_voted:
+    if status:
         return HttpResponse('You have already voted in this election')
-    if not (election.start_time <= timezone.now() <= election.end_time):
+    # results are snapshotted at conclusion, so no ballots after an early publish either
+    if election.status == 'concluded' or not (election.start_time <= timezone.now() <= election.end_time):
         return HttpResponse('Election is not active')
+    if request.method == 'POST':
+        form = VoteForm(request.POST)
+        if form.is_valid():
+            # claim eligibility, seal and store in one transaction (see cast_ballot)
+            try:
+                receipt = await acast_ballot(user, election, form.cleaned_data['candidate_id'])
+            except NotEligible as exc:
+                return HttpResponseForbidden(str(exc))
+            except InvalidCandidate as exc:
+                form.add_error('candidate_id', str(exc))
+            except BallotRejected as exc:
+                return HttpResponse(str(exc))
+            else:
+                # receipt lets the voter later check their ballot is in the published ledger
+                return await sync_to_async(render)(request, 'vote_success.html', {'election': election, **receipt})
+    else:
+        form = VoteForm()
+    candidates = [c async for c in election.candidates.all()]
+    return await sync_to_async(render)(request, 'vote.html', {'election': election, 'candidates': candidates, 'form': form})
 
-    candidates = election.candidates.all()
+
+async def ballot_link_view(request, token):
+    """A voter's ballot, opened from a signed single-use link instead of a login (see ``elections.utils.ballot_links``)."""
+    try:
+        status_id, nonce = read_ballot_token(token)
+    except signing.SignatureExpired:
+        return HttpResponse('This ballot link has expired', status=410)
+    except signing.BadSignature:
+        return HttpResponse('Invalid ballot link', status=400)
+    status = await VoterStatus.objects.select_related('election', 'user').filter(pk=status_id).afirst()
+    if status is not None and status.has_voted:
+        return HttpResponse('You have already voted in this election')
+    if status is None or not nonce or status.ballot_nonce != nonce:
+        # reissued or revoked since this link was sent
+        return HttpResponse('This ballot link is no longer valid', status=410)
+    election = status.election
     if request.method == 'POST':
         form = VoteForm(request.POST)
         if form.is_valid():
-            candidate_id = form.cleaned_data['candidate_id']
-            # encrypt and save vote, bind ciphertext to election id
-            ct = encrypt_vote(f'candidate:{candidate_id}', associated_data=str(election.id))
-            Vote.objects.create(election=election, encrypted_vote_data=ct)
-            status.has_voted = True
-            status.save()
-            return render(request, 'vote_success.html', {'election': election})
+            try:
+                # the link's nonce is spent together with has_voted
+                receipt = await acast_ballot(status.user, election, form.cleaned_data['candidate_id'], nonce=nonce)
+            except InvalidCandidate as exc:
+                form.add_error('candidate_id', str(exc))
+            except BallotRejected as exc:
+                return HttpResponse(str(exc))
+            else:
+                return await sync_to_async(render)(
+                    request, 'vote_success.html', {'election': election, 'ballot_link': True, **receipt},
+                )
     else:
         form = VoteForm()
-    return render(request, 'vote.html', {'election': election, 'candidates': candidates, 'form': form})
+    if election.status == 'concluded' or not (election.start_time <= timezone.now() <= election.end_time):
+        return HttpResponse('Election is not active')
+    candidates = [c async for c in election.candidates.all()]
+    return await sync_to_async(render)(
+        request, 'vote.html', {'election': election, 'candidates': candidates, 'form': form, 'ballot_link': True},
+    )
 
 
-def results_view(request, election_id):
-    election = get_object_or_404(Election, pk=election_id)
+async def results_view(request, election_id):
+    election = await aget_object_or_404(Election, pk=election_id)
     # Results visible when election concluded; visibility scope:
     # - Superusers/staff: all
     # - Admins: their own elections
@@ -372,152 +377,168 @@ def results_view(request, election_id):
     concluded = (timezone.now() >= election.end_time or election.status == 'concluded')
     if not concluded:
         return HttpResponseForbidden('Results are not available until election has concluded')
-    # After conclusion, results are public
-
-    votes = election.votes.all()
-    decrypted = [decrypt_vote(v.encrypted_vote_data, associated_data=str(election.id)) for v in votes]
-    # simple aggregation
-    tally = {}
-    total_votes = 0
-    for d in decrypted:
-        tally[d] = tally.get(d, 0) + 1
-        total_votes += 1
-
-    # compute per-candidate percentages and determine winner(s)
-    percentages = {}
-    for choice, count in tally.items():
-        pct = (count / total_votes * 100) if total_votes > 0 else 0
-        percentages[choice] = round(pct, 2)
-
-    if tally:
-        max_votes = max(tally.values())
-        winners = [c for c, v in tally.items() if v == max_votes]
-    else:
-        winners = []
+    # After conclusion, results are public; serve the snapshot taken at conclusion
+    result = await ElectionResult.objects.filter(election=election).afirst()
+    if result is None:
+        result = await sync_to_async(build_snapshot)(election)
+    turnout_labels, turnout_values = await sync_to_async(turnout_series)(election)
+    return await sync_to_async(render)(request, 'results.html', {
+        'election': election,
+        'tally': result.tally,
+        'results_list': result.rows,
+        'percentages': result.percentages,
+        'total_votes': result.total_votes,
+        'winners': result.winners,
+        'winners_display': result.winners_display,
+        'total_voters': result.total_voters,
+        'casting_percentage': result.casting_percentage,
+        'margin_votes': result.margin_votes,
+        'margin_percentage': result.margin_percentage,
+        'chart_labels_json': json.dumps(result.chart_labels),
+        'chart_values_json': json.dumps(result.chart_values),
+        'turnout_labels_json': json.dumps(turnout_labels),
+        'turnout_values_json': json.dumps(turnout_values),
+    })
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: write() hands the encoded row straight back."""
 
-    # Build a results list for template consumption and map candidate tokens to names
-    results_list = []
-    for choice, count in tally.items():
-        display = choice
-        # if vote stored as 'candidate:<id>' map to candidate name when possible
+    def write(self, value):
+        return value
+
+
+def _export_records(election, result, hourly):
+    # candidate names come from one prefetched map rather than a query per row
+    names = dict(Candidate.objects.filter(election=election).values_list('id', 'name'))
+    for row in result.rows:
+        choice = row['raw_choice']
+        cid = None
         if isinstance(choice, str) and choice.startswith('candidate:'):
             try:
                 cid = int(choice.split(':', 1)[1])
-                cand = Candidate.objects.filter(id=cid, election=election).first()
-                if cand:
-                    display = cand.name
-            except Exception:
+            except ValueError:
                 pass
-        results_list.append({
-            'choice': display,
-            'raw_choice': choice,
-            'count': count,
-            'percentage': percentages.get(choice, 0),
-        })
-
-    # prepare chart data JSON
-    labels = list(tally.keys())
-    values = [tally[k] for k in labels]
-    chart_labels_json = json.dumps(labels)
-    chart_values_json = json.dumps(values)
-    # total eligible voters for this election
-    from .models import VoterStatus
-    total_voters = VoterStatus.objects.filter(election=election).count()
-    casting_percentage = round((total_votes / total_voters * 100), 2) if total_voters > 0 else 0
-
-    # compute winning margin (difference between top and second place)
-    margin_votes = 0
-    margin_percentage = 0
-    if winners and total_votes > 0 and len(tally) > 0:
-        if len(winners) == 1:
-            # find runner-up
-            sorted_counts = sorted(tally.values(), reverse=True)
-            top = sorted_counts[0]
-            second = sorted_counts[1] if len(sorted_counts) > 1 else 0
-            margin_votes = top - second
-            margin_percentage = round((margin_votes / total_votes * 100), 2) if total_votes > 0 else 0
+        yield 'result', {
+            'choice': choice,
+            'count': row['count'],
+            'percentage': row['percentage'],
+            'candidate_id': cid,
+            'candidate_name': names.get(cid, row['choice']),
+        }
+    if hourly:
+        per_hour = VoteActivity.objects.filter(election=election).order_by('hour').values_list('hour', 'count')
+        for hour, n in per_hour.iterator():
+            yield 'hour', {'hour': timezone.localtime(hour).isoformat(), 'votes': n}
+
+
+def _stream_csv(records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['choice', 'count', 'percentage', 'candidate_id', 'candidate_name'])
+    in_hours = False
+    for kind, rec in records:
+        if kind == 'hour':
+            if not in_hours:
+                # hourly counts follow as a second table after a blank line
+                yield writer.writerow([])
+                yield writer.writerow(['hour', 'votes'])
+                in_hours = True
+            yield writer.writerow([rec['hour'], rec['votes']])
         else:
-            # tie -> zero margin
-            margin_votes = 0
-            margin_percentage = 0
-
-    # prepare human-friendly winner names for the template
-    winners_display = []
-    for w in winners:
-        wd = w
-        if isinstance(w, str) and w.startswith('candidate:'):
-            try:
-                cid = int(w.split(':', 1)[1])
-                cand = Candidate.objects.filter(id=cid, election=election).first()
-                if cand:
-                    wd = cand.name
-            except Exception:
-                pass
-        winners_display.append(wd)
+            yield writer.writerow([rec['choice'], rec['count'], rec['percentage'], rec['candidate_id'] or '', rec['candidate_name']])
 
-    return render(request, 'results.html', {
-        'election': election,
-        'tally': tally,
-        'results_list': results_list,
-        'percentages': percentages,
-        'total_votes': total_votes,
-        'winners': winners,
-        'winners_display': winners_display,
-        'total_voters': total_voters,
-        'casting_percentage': casting_percentage,
-        'margin_votes': margin_votes,
-        'margin_percentage': margin_percentage,
-        'chart_labels_json': chart_labels_json,
-        'chart_values_json': chart_values_json,
-    })
+
+def _stream_ndjson(election, result, records):
+    yield json.dumps({
+        'type': 'election',
+        'id': election.id,
+        'title': election.title,
+        'total_votes': result.total_votes,
+        'total_voters': result.total_voters,
+        'casting_percentage': result.casting_percentage,
+    }) + '\n'
+    for kind, rec in records:
+        yield json.dumps({'type': kind, **rec}) + '\n'
 
 
 @login_required
 def export_results_csv(request, election_id):
-    # export decrypted results as CSV (admin or public after conclusion)
+    """Stream the results snapshot as CSV (default) or newline-delimited JSON.
+
+    ``?format=ndjson`` selects JSON lines and ``?hourly=1`` appends per-hour
+    vote counts. Rows are generated lazily so memory use does not grow with
+    the size of the election.
+    """
     election = get_object_or_404(Election, pk=election_id)
     if timezone.now() < election.end_time:
         return HttpResponseForbidden('Results are not available until election has concluded')
     # After conclusion, allow export publicly
-    votes = election.votes.all()
-    decrypted = [decrypt_vote(v.encrypted_vote_data, associated_data=str(election.id)) for v in votes]
-    tally = {}
-    for d in decrypted:
-        tally[d] = tally.get(d, 0) + 1
-
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(['choice', 'count'])
-    for choice, count in tally.items():
-        writer.writerow([choice, count])
-    resp = HttpResponse(buffer.getvalue(), content_type='text/csv')
-    resp['Content-Disposition'] = f'attachment; filename="results_{election.id}.csv"'
+    result = build_snapshot(election)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return HttpResponse('Unsupported format; use csv or ndjson', status=400)
+    records = _export_records(election, result, hourly=request.GET.get('hourly') in ('1', 'true', 'yes'))
+    if fmt == 'ndjson':
+        resp = StreamingHttpResponse(_stream_ndjson(election, result, records), content_type='application/x-ndjson')
+        resp['Content-Disposition'] = f'attachment; filename="results_{election.id}.ndjson"'
+    else:
+        resp = StreamingHttpResponse(_stream_csv(records), content_type='text/csv')
+        resp['Content-Disposition'] = f'attachment; filename="results_{election.id}.csv"'
     return resp
 
 
-def _is_admin(user):
-    if not user or not getattr(user, 'is_authenticated', False):
-        return False
-    # Superusers and staff are admins
-    if getattr(user, 'is_superuser', False) or getattr(user, 'is_staff', False):
-        return True
+@login_required
+def ledger_view(request, election_id):
+    """Current head of the election's ballot ledger, plus the root published with the results."""
+    election = get_object_or_404(Election, pk=election_id)
+    size, root = ledger_head(election)
+    published = getattr(election, 'result', None) if election.status == 'concluded' else None
+    return JsonResponse({
+        'election': election.id,
+        'size': size,
+        'root': root,
+        'published_size': published.ledger_size if published else None,
+        'published_root': published.ledger_root if published else None,
+    })
+
+
+@login_required
+def ledger_proof(request, election_id, leaf_index):
+    """Inclusion proof for one ballot, checked against the published root when there is one.
+
+    ``?leaf=<hex>`` (the hash on the voter's receipt) is compared with the
+    stored leaf; ``?size=<n>`` proves against an earlier tree size.
+    """
+    election = get_object_or_404(Election, pk=election_id)
+    published = getattr(election, 'result', None) if election.status == 'concluded' else None
     try:
-        return user.profile.role == 'admin'
-    except Exception:
-        return False
+        size = int(request.GET['size']) if 'size' in request.GET else (published.ledger_size if published else None)
+        proof = inclusion_proof(election, leaf_index, size)
+    except (ValueError, LookupError):
+        return JsonResponse({'error': 'No such ballot in this ledger'}, status=404)
+    expected_leaf = request.GET.get('leaf') or proof['leaf_hash']
+    if not re.fullmatch(r'[0-9a-fA-F]{64}', expected_leaf):
+        return JsonResponse({'error': 'leaf must be a 64-character hex SHA-256 hash'}, status=400)
+    expected_leaf = expected_leaf.lower()
+    proof['verified'] = verify_inclusion(expected_leaf, leaf_index, proof['tree_size'], proof['path'], proof['root'])
+    proof['published'] = bool(published and published.ledger_size == proof['tree_size'] and published.ledger_root == proof['root'])
+    return JsonResponse(proof)
+
+
+def _is_admin(user):
+    # superusers, staff and profile role 'admin'; resolved once per request (see RoleMiddleware)
+    return resolve_role(user).is_admin
 
 
 def _is_super_or_owner(user, election: Election) -> bool:
-    if not user or not getattr(user, 'is_authenticated', False):
+    role = resolve_role(user)
+    if not role.is_authenticated:
         return False
-    if getattr(user, 'is_superuser', False):
+    if role.is_superuser:
         return True
     # If election has no explicit owner, allow admins to act
-    try:
-        if election.created_by_id is None and _is_admin(user):
-            return True
-    except Exception:
-        pass
+    if election.created_by_id is None and role.is_admin:
+        return True
     # Treat the creator as owner regardless of profile role; outer guards restrict to admins
     return election.created_by_id == user.id
 
@@ -526,144 +547,58 @@ def _is_super_or_owner(user, election: Election) -> bool:
 def admin_dashboard(request):
     if not _is_admin(request.user):
         return HttpResponseForbidden('Admins only')
-    _sync_election_statuses()
-    # Elections with aggregated stats
-    base_qs = Election.objects.all()
-    # Non-super admins see only their own elections
-    if getattr(request.user, 'is_superuser', False):
-        elections_qs = base_qs
-    else:
-        elections_qs = base_qs.filter(created_by=request.user)
-    elections_qs = (
-        elections_qs
-        .annotate(
-            votes_cast=Count('votes', distinct=True),
-            candidates_count=Count('candidates', distinct=True),
-        )
-        .order_by('-start_time')
-    )
-
-    # Convert to list so we can attach computed fields
-    elections_list = list(elections_qs)
-
-    # Compute per-election turnout percent and low-turnout flag
-    for e in elections_list:
-        # compute eligible from VoterStatus to avoid reverse-name ambiguity
-        eligible = VoterStatus.objects.filter(election=e).count()
-        e.eligible = eligible
-        votes_cast = getattr(e, 'votes_cast', 0) or 0
-        e.turnout_pct = round((votes_cast / eligible * 100), 2) if eligible > 0 else 0
-        e.low_turnout = (eligible > 0 and (votes_cast / eligible) < 0.3 and e.status == 'active')
-
-    # KPI counts
-    total_elections = len(elections_list)
-    counts_by_status = {
-        'pending': len([1 for e in elections_list if e.status == 'pending']),
-        'active': len([1 for e in elections_list if e.status == 'active']),
-        'concluded': len([1 for e in elections_list if e.status == 'concluded']),
-    }
+    ensure_statuses()
+    # Global KPIs from the cache, refreshed in the background when stale
+    kpis = dashboard_kpis(request.user)
 
-    # Users/Voters metrics
-    voters_total = Profile.objects.filter(role='voter').count()
-    voters_confirmed = Profile.objects.filter(role='voter', is_confirmed=True).count()
-    approvals_pending = Profile.objects.filter(role='voter', is_confirmed=True, is_approved=False).count()
-
-    # Votes today
-    votes_today = Vote.objects.filter(timestamp__date=timezone.now().date()).count()
-
-    # Average turnout across elections with eligible > 0
-    turnouts = []
-    for e in elections_list:
-        eligible = getattr(e, 'eligible', 0) or 0
-        votes_cast = getattr(e, 'votes_cast', 0) or 0
-        if eligible > 0:
-            turnouts.append(votes_cast / eligible)
-    avg_turnout_pct = round((sum(turnouts) / len(turnouts) * 100), 2) if turnouts else 0
-
-    # Ending soon (next 48h)
+    # Ending soon (next 48h); turnout comes from the election's counters
     now = timezone.now()
-    # ending soon from the list
-    ending_soon = [e for e in elections_list if e.status == 'active' and e.end_time <= now + timedelta(hours=48)]
-    ending_soon = sorted(ending_soon, key=lambda x: x.end_time)[:6]
-
-    # Votes per hour (last 24h)
-    start = now - timedelta(hours=23)
-    vp = (
-        Vote.objects.filter(timestamp__gte=start)
-        .annotate(h=TruncHour('timestamp'))
-        .values('h')
-        .annotate(n=Count('id'))
-        .order_by('h')
-    )
-    # Build 24 hourly buckets
-    hourly_labels = []
-    hourly_counts = []
-    bucket = {row['h']: row['n'] for row in vp}
-    for i in range(24):
-        t = (start + timedelta(hours=i)).replace(minute=0, second=0, microsecond=0)
-        hourly_labels.append(t.strftime('%H:%M'))
-        hourly_counts.append(bucket.get(t, 0))
-
-    import json
-    chart_labels_json = json.dumps(hourly_labels)
-    chart_values_json = json.dumps(hourly_counts)
+    elections_qs = Election.objects.filter(status='active', end_time__lte=now + timedelta(hours=48))
+    # Non-super admins see only their own elections
+    if not request.role.is_superuser:
+        elections_qs = elections_qs.filter(created_by=request.user)
+    ending_soon = list(elections_qs.order_by('end_time')[:6])
 
     # Recent feedback for superusers only
     recent_feedback = []
-    if getattr(request.user, 'is_superuser', False):
+    if request.role.is_superuser:
         recent_feedback = list(Feedback.objects.order_by('-created_at')[:5])
 
     context = {
-    'elections': elections_list,
-        'total_elections': total_elections,
-        'counts_by_status': counts_by_status,
-        'voters_total': voters_total,
-        'voters_confirmed': voters_confirmed,
-        'approvals_pending': approvals_pending,
-        'votes_today': votes_today,
-        'avg_turnout_pct': avg_turnout_pct,
+        **kpis,
         'ending_soon': ending_soon,
-        'activity_labels_json': chart_labels_json,
-        'activity_values_json': chart_values_json,
         'recent_feedback': recent_feedback,
     }
     return render(request, 'admin_dashboard.html', context)
 
 
+ELECTIONS_PER_PAGE = 50
+
+
 @login_required
 def admin_election_list(request, status: str):
     if not _is_admin(request.user):
         return HttpResponseForbidden('Admins only')
-    _sync_election_statuses()
+    ensure_statuses()
     status = (status or '').lower()
     if status not in {'pending', 'active', 'concluded'}:
         status = 'active'
 
     base_qs = Election.objects.filter(status=status)
-    if getattr(request.user, 'is_superuser', False):
+    if request.role.is_superuser:
         qs = base_qs
     else:
         qs = base_qs.filter(created_by=request.user)
-    qs = (
-        qs
-        .annotate(
-            votes_cast=Count('votes', distinct=True),
-            candidates_count=Count('candidates', distinct=True),
-        )
-        .order_by('-start_time')
-    )
-    elections = list(qs)
-    for e in elections:
-        e.eligible = VoterStatus.objects.filter(election=e).count()
-        vc = getattr(e, 'votes_cast', 0) or 0
-        eg = e.eligible or 0
-        e.turnout_pct = round((vc / eg * 100), 2) if eg > 0 else 0
+    # paginated so a long election history renders in bounded time
+    page = Paginator(qs.order_by('-start_time', '-id'), ELECTIONS_PER_PAGE).get_page(request.GET.get('page'))
+    elections = page.object_list
 
     status_title = status.capitalize()
     return render(request, 'admin_election_list.html', {
         'status': status,
         'status_title': status_title,
         'elections': elections,
+        'page_obj': page,
     })
 
 
@@ -707,6 +642,10 @@ def create_election(request):
                 created_by=request.user,
                 publish_key_hash=publish_key_hash,
             )
+            scheme = form.cleaned_data.get('ballot_scheme') or Election.SCHEME_AES
+            if scheme != Election.SCHEME_AES:
+                setup_ballot_scheme(eobj, scheme)
+                eobj.save(update_fields=['ballot_scheme', 'elgamal_public_key', 'elgamal_secret_key'])
             messages.warning(request, f"Store this publish key safely: {publish_key_plain}")
             messages.info(request, 'You will need this key to publish the results.')
             return redirect('admin_election_list', status='pending')
@@ -721,7 +660,7 @@ def edit_election(request, election_id):
         return HttpResponseForbidden('Admins only')
     election = get_object_or_404(Election, pk=election_id)
     # keep statuses in sync for consistency
-    _sync_election_statuses()
+    ensure_statuses()
     if not _is_super_or_owner(request.user, election):
         return HttpResponseForbidden('Not allowed to edit this election')
     if request.method == 'POST':
@@ -763,7 +702,7 @@ def edit_election(request, election_id):
 @login_required
 def delete_election(request, election_id):
     # Only superusers can delete elections, and only after they are concluded
-    if not getattr(request.user, 'is_superuser', False):
+    if not request.role.is_superuser:
         return HttpResponseForbidden('Superusers only')
     election = get_object_or_404(Election, pk=election_id)
     if election.status != 'concluded':
@@ -785,7 +724,7 @@ def publish_results(request, election_id):
     election = get_object_or_404(Election, pk=election_id)
     if not _is_super_or_owner(request.user, election):
         return HttpResponseForbidden('Not allowed to publish this election')
-    is_super = getattr(request.user, 'is_superuser', False)
+    is_super = request.role.is_superuser
     now = timezone.now()
     is_after_end = now >= election.end_time
     # Key is required only for early publish (before end time) and only for non-superusers
@@ -841,6 +780,7 @@ def publish_results(request, election_id):
     election.publish_attempts = 0
     election.publish_blocked_until = None
     election.save()
+    election_concluded.send(sender=Election, election=election, automatic=False)
     messages.success(request, 'Results published successfully')
     return redirect('admin_dashboard')
 
@@ -884,26 +824,56 @@ def upload_voters(request, election_id):
     if request.method == 'POST':
         form = VoterUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            f = TextIOWrapper(request.FILES['csv_file'].file, encoding='utf-8')
-            reader = csv.DictReader(f)
-            imported = 0
-            from django.contrib.auth.models import User
-            for row in reader:
-                username = row.get('username')
-                if not username:
-                    continue
-                try:
-                    user = User.objects.get(username=username)
-                    VoterStatus.objects.get_or_create(user=user, election=election)
-                    imported += 1
-                except User.DoesNotExist:
-                    continue
-            return render(request, 'upload_result.html', {'imported': imported, 'election': election})
+            upload = request.FILES['csv_file']
+            # small rolls are imported in the request; larger ones by the run_import_jobs worker
+            inline = upload.size <= settings.VOTER_IMPORT_INLINE_BYTES
+            job = create_import_job(election, upload, created_by=request.user, queued=not inline)
+            if inline:
+                run_import_job(job)
+            return redirect('voter_import_status', import_id=job.id)
     else:
         form = VoterUploadForm()
     return render(request, 'upload_voters.html', {'form': form, 'election': election})
 
 
+@login_required
+def voter_import_status(request, import_id):
+    if not _is_admin(request.user):
+        return HttpResponseForbidden('Admins only')
+    report = get_object_or_404(VoterImport.objects.select_related('election'), pk=import_id)
+    if not _is_super_or_owner(request.user, report.election):
+        return HttpResponseForbidden('Not allowed to view this import')
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id': report.id,
+            'election_id': report.election_id,
+            'status': report.status,
+            'total_rows': report.total_rows,
+            'rows': report.rows,
+            'progress_pct': report.progress_pct,
+            'imported': report.imported,
+            'duplicate': report.duplicate,
+            'unknown': report.unknown,
+            'error': report.error,
+        })
+    return render(request, 'upload_result.html', {'imported': report.imported, 'report': report, 'election': report.election})
+
+
+@login_required
+def voter_import_rejected(request, import_id):
+    if not _is_admin(request.user):
+        return HttpResponseForbidden('Admins only')
+    report = get_object_or_404(VoterImport.objects.select_related('election'), pk=import_id)
+    if not _is_super_or_owner(request.user, report.election):
+        return HttpResponseForbidden('Not allowed to view this import')
+    rows = report.rejected_rows.order_by('line').values_list('line', 'username', 'reason')
+    writer = csv.writer(_Echo())
+    lines = itertools.chain([writer.writerow(['line', 'username', 'reason'])], (writer.writerow(r) for r in rows.iterator()))
+    resp = StreamingHttpResponse(lines, content_type='text/csv')
+    resp['Content-Disposition'] = f'attachment; filename="rejected-voters-{report.election_id}-{report.id}.csv"'
+    return resp
+
+
 @login_required
 def create_candidate(request, election_id):
     if not _is_admin(request.user):
@@ -934,32 +904,41 @@ def list_candidates(request, election_id):
     if not _is_super_or_owner(request.user, election):
         return HttpResponseForbidden('Not allowed to view candidates for this election')
     candidates = election.candidates.all()
-    # secure decrypt-and-aggregate per candidate
+    # per-candidate counts from the sealed running tally (one decryption)
     tally = {c.id: 0 for c in candidates}
-    votes = election.votes.all()
-    for v in votes:
-        try:
-            plaintext = decrypt_vote(v.encrypted_vote_data, associated_data=str(election.id))
-        except Exception:
-            # skip votes that can't be decrypted (missing key / tampered)
-            continue
-        if isinstance(plaintext, bytes):
-            try:
-                plaintext = plaintext.decode('utf-8')
-            except Exception:
-                continue
+    for plaintext, count in read_tally(election).items():
         # expected format: 'candidate:<id>'
-        if not isinstance(plaintext, str):
-            continue
         if plaintext.startswith('candidate:'):
             try:
                 cid = int(plaintext.split(':', 1)[1])
             except Exception:
                 continue
-            tally[cid] = tally.get(cid, 0) + 1
+            tally[cid] = tally.get(cid, 0) + count
     return render(request, 'list_candidates.html', {'election': election, 'candidates': candidates, 'tally': tally})
 
 
+@login_required
+def turnout_stream(request, election_id):
+    """Server-Sent Events: the election's turnout, pushed as it changes (see ``elections.utils.live``)."""
+    if not _is_admin(request.user):
+        return HttpResponseForbidden('Admins only')
+    election = get_object_or_404(Election, pk=election_id)
+    if not _is_super_or_owner(request.user, election):
+        return HttpResponseForbidden('Not allowed to watch this election')
+    # a reconnecting EventSource sends the vote count it last saw, so deltas carry on
+    last_votes = request.headers.get('Last-Event-ID')
+    last_votes = int(last_votes) if last_votes and last_votes.isdigit() else None
+    if isinstance(request, ASGIRequest):
+        events = astream_turnout(election.id, last_votes)
+    else:
+        events = stream_turnout(election.id, last_votes)
+    resp = StreamingHttpResponse(events, content_type='text/event-stream')
+    resp['Cache-Control'] = 'no-cache'
+    # stop nginx from buffering the stream
+    resp['X-Accel-Buffering'] = 'no'
+    return resp
+
+
 @login_required
 def edit_candidate(request, election_id, candidate_id):
     if not _is_admin(request.user):
@@ -998,20 +977,3 @@ def delete_candidate(request, election_id, candidate_id):
         candidate.delete()
         return redirect('list_candidates', election_id=election_id)
     return render(request, 'confirm_delete.html', {'object': candidate, 'type': 'candidate'})
-
-
-# Internal: keep Election.status aligned with time windows
-def _sync_election_statuses():
-    now = timezone.now()
-    # Move pending -> active when start time reached
-    Election.objects.filter(status='pending', start_time__lte=now).update(status='active')
-    # If an active election was edited to a future start, revert to pending
-    Election.objects.filter(status='active', start_time__gt=now).update(status='pending')
-    # Auto-conclude when end time reached (publish automatically)
-    Election.objects.filter(end_time__lte=now).exclude(status='concluded').update(
-        status='concluded',
-        published_at=now,
-        published_by=None,
-        publish_attempts=0,
-        publish_blocked_until=None,
-    )
@@ -26,10 +26,16 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'elections.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ModelBackend that loads the session's user with their profile in one query
+# (see elections.middleware). Sessions that still name Django's ModelBackend are
+# moved to it by RoleMiddleware, so switching backends logs nobody out.
+AUTHENTICATION_BACKENDS = ['elections.backends.ProfileModelBackend']
+
 ROOT_URLCONF = 'safeballot.urls'
 
 TEMPLATES = [
@@ -95,3 +101,60 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # LOGIN_URL is '/accounts/login/' which caused redirects to a non-existent path.
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
+
+# Ballot tallying: number of decryption processes and ballots per streamed chunk
+# used when tallies are re-derived from the encrypted ballots.
+TALLY_WORKERS = int(os.getenv('TALLY_WORKERS', '1'))
+TALLY_CHUNK_SIZE = int(os.getenv('TALLY_CHUNK_SIZE', '5000'))
+
+# Ballot ingestion: 'sync' stores each ballot in the request, 'queue' stages it
+# for the flush_ballots worker, which commits batches of up to INGEST_BATCH_SIZE
+# ballots or whatever is pending once the oldest has waited INGEST_FLUSH_INTERVAL seconds.
+BALLOT_INGEST_MODE = os.getenv('BALLOT_INGEST_MODE', 'sync')
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '500'))
+INGEST_FLUSH_INTERVAL = float(os.getenv('INGEST_FLUSH_INTERVAL', '0.5'))
+
+# Threads sealing ballots for the async (ASGI) vote view, per server process.
+CRYPTO_WORKERS = int(os.getenv('CRYPTO_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Seconds the homepage KPIs (elections, ballots, average turnout) stay cached.
+SITE_STATS_TTL = int(os.getenv('SITE_STATS_TTL', '30'))
+
+# Seconds before the admin dashboard KPIs are recomputed in the background;
+# until the refresh lands, requests keep getting the previous values.
+DASHBOARD_KPI_TTL = int(os.getenv('DASHBOARD_KPI_TTL', '60'))
+
+# Election status transitions are applied by `manage.py run_scheduler`; request
+# handlers only re-read the next transition time this often (seconds) and apply
+# a transition themselves only when one is overdue.
+SCHEDULE_RECHECK_SECONDS = float(os.getenv('SCHEDULE_RECHECK_SECONDS', '30'))
+
+# Rows per chunk when importing a voter-roll CSV: one username lookup and one
+# bulk insert per chunk.
+VOTER_IMPORT_CHUNK_SIZE = int(os.getenv('VOTER_IMPORT_CHUNK_SIZE', '5000'))
+
+# Voter-roll imports run as background jobs (`manage.py run_import_jobs`).
+# Uploaded CSVs are kept here, outside MEDIA_ROOT, until their job finishes;
+# uploads up to VOTER_IMPORT_INLINE_BYTES are imported in the request instead.
+# A running job not checkpointed for VOTER_IMPORT_STALE_SECONDS is resumed.
+VOTER_IMPORT_DIR = os.getenv('VOTER_IMPORT_DIR', str(BASE_DIR / 'var' / 'voter_imports'))
+VOTER_IMPORT_INLINE_BYTES = int(os.getenv('VOTER_IMPORT_INLINE_BYTES', str(64 * 1024)))
+VOTER_IMPORT_STALE_SECONDS = int(os.getenv('VOTER_IMPORT_STALE_SECONDS', '300'))
+
+# Bulk voter provisioning (`manage.py provision_voters`): accounts per insert
+# batch, and processes hashing their one-time passwords.
+PROVISION_BATCH_SIZE = int(os.getenv('PROVISION_BATCH_SIZE', '500'))
+PROVISION_WORKERS = int(os.getenv('PROVISION_WORKERS', str(os.cpu_count() or 1)))
+
+# Live turnout stream (SSE) for admins: figures are recomputed and pushed at most
+# once per TURNOUT_STREAM_INTERVAL seconds, shared by every connected admin; idle
+# streams send a keep-alive every TURNOUT_STREAM_KEEPALIVE seconds and close after
+# TURNOUT_STREAM_MAX_SECONDS (browsers reconnect on their own). Under WSGI each
+# request sends one event and closes, so browsers poll once per interval.
+TURNOUT_STREAM_INTERVAL = float(os.getenv('TURNOUT_STREAM_INTERVAL', '2'))
+TURNOUT_STREAM_KEEPALIVE = float(os.getenv('TURNOUT_STREAM_KEEPALIVE', '15'))
+TURNOUT_STREAM_MAX_SECONDS = float(os.getenv('TURNOUT_STREAM_MAX_SECONDS', '600'))
+
+# Signed single-use ballot links (`manage.py issue_ballot_links`): seconds a
+# link stays valid after it is issued.
+BALLOT_LINK_MAX_AGE = int(os.getenv('BALLOT_LINK_MAX_AGE', str(7 * 24 * 3600)))